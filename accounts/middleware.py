@@ -1,11 +1,11 @@
 # accounts/middleware.py
-class ClearRegisterErrorsMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
+from django.utils.deprecation import MiddlewareMixin
 
-    def __call__(self, request):
-        response = self.get_response(request)
 
+class ClearRegisterErrorsMiddleware(MiddlewareMixin):
+    # MiddlewareMixin يجعله يعمل مع views الـ async تحت ASGI دون تحويل السلسلة
+    # كلها إلى الوضع المتزامن
+    def process_response(self, request, response):
         # مسح أخطاء التسجيل بعد عرضها
         if hasattr(request, 'session'):
             if 'register_errors' in request.session:
@@ -13,4 +13,4 @@ class ClearRegisterErrorsMiddleware:
             if 'register_form_data' in request.session:
                 del request.session['register_form_data']
 
-        return response
\ No newline at end of file
+        return response
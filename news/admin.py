@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.utils import timezone
+
 from .models import *
 
 
@@ -39,3 +41,18 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields={'slug':('name',)}
     search_fields = ['name']
     readonly_fields = ['created_at']
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'from_email', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'from_email']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['requeue']
+
+    @admin.action(description='إعادة إرسال الرسائل المحددة')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutgoingEmail.Status.SENT).update(
+            status=OutgoingEmail.Status.PENDING, attempts=0, next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f'أُعيدت {updated} رسالة إلى قائمة الإرسال')
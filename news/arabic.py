@@ -0,0 +1,59 @@
+"""
+أدوات تطبيع النص العربي قبل الفهرسة والبحث.
+"""
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import slugify
+
+# التشكيل (الفتحة .. السكون) والألف الخنجرية
+_DIACRITICS = re.compile('[\u064B-\u0652\u0670]')
+_TATWEEL = '\u0640'
+_CHAR_MAP = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+# حروف لاتينية تقريبية للحروف العربية (بعد normalize_arabic) لأن روابط
+# المقالات تستخدم <slug:slug> الذي يقبل الحروف اللاتينية فقط
+_TRANSLITERATION = str.maketrans({
+    'ا': 'a', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j', 'ح': 'h', 'خ': 'kh',
+    'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'sh', 'ص': 's',
+    'ض': 'd', 'ط': 't', 'ظ': 'z', 'ع': 'a', 'غ': 'gh', 'ف': 'f', 'ق': 'q',
+    'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'w', 'ي': 'y',
+    'ؤ': 'w', 'ئ': 'y', 'ء': '', '،': ' ', '؟': ' ', '؛': ' ',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+
+
+def normalize_arabic(text):
+    """يزيل التشكيل والتطويل ويوحّد أشكال الألف والياء والتاء المربوطة."""
+    if not text:
+        return ''
+    text = _DIACRITICS.sub('', text)
+    text = text.replace(_TATWEEL, '')
+    return text.translate(_CHAR_MAP).lower()
+
+
+def normalize_document(text):
+    """مثل normalize_arabic لكن يزيل وسوم HTML أولاً (محتوى المقال)."""
+    return normalize_arabic(strip_tags(text or ''))
+
+
+def tokenize(text):
+    """يقسم النص المطبّع إلى كلمات."""
+    return _TOKEN.findall(normalize_arabic(text))
+
+
+def arabic_slug(text, max_length=None):
+    """slug لاتيني من نص عربي (أو مختلط) لا يقطع الكلمات عند max_length."""
+    slug = slugify(normalize_arabic(text).translate(_TRANSLITERATION))
+    if max_length and len(slug) > max_length:
+        cut = slug[:max_length + 1]
+        slug = cut.rsplit('-', 1)[0] if '-' in cut else slug[:max_length]
+    return slug.strip('-')
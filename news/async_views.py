@@ -0,0 +1,160 @@
+"""
+نسخ async من صفحات القراءة (article_list و search و article_detail) للتشغيل
+عبر ASGI. تُستخدم بدلاً من نسخ news.views عند NEWS_ASYNC_VIEWS = True (يضبطه
+osamh_ahmed_al/asgi.py)، ونفس أسماء الروابط فلا تتغير القوالب.
+
+الاستعلامات المستقلة (عناصر الشريط الجانبي، صفحة المقالات، حالة المستخدم)
+تُنفذ معاً بـ asyncio.gather. ORM في Django 4.2 ينفذ كل استعلام async
+(afirst، aexists ...) على خيط المزامنة نفسه بالتتابع، لذا الدوال الأثقل
+(widgets والصفحات) تعمل عبر ``run_query`` في مجموعة خيوط ثابتة
+(NEWS_ASYNC_QUERY_THREADS) لكل منها اتصال بقاعدة البيانات يبقى مفتوحاً حسب
+CONN_MAX_AGE، فلا تزيد اتصالات العملية عن عدد الخيوط + 1 (خيط المزامنة).
+عند NEWS_ASYNC_PARALLEL_QUERIES = False تعمل كلها على خيط المزامنة، وهذا لازم
+داخل المعاملات (مثل TestCase) لأن الخيوط الأخرى لا ترى بياناتها.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.shortcuts import render
+
+from . import widgets
+from .cache import cache_anonymous_page
+from .counters import record_view
+from .interactions import interaction_state
+from .models import Article
+from .slugs import get_article_or_404
+from .views import article_list_page, related_articles_for, search_page
+
+
+def _parallel():
+    return getattr(settings, 'NEWS_ASYNC_PARALLEL_QUERIES', True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _query_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'NEWS_ASYNC_QUERY_THREADS', 4),
+                    thread_name_prefix='news-query',
+                )
+    return _executor
+
+
+def _with_connection(func):
+    def run():
+        # مثل request_started/request_finished لكن لخيط العمل
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def run_query(func):
+    """ينفذ دالة متزامنة (تستعلم من قاعدة البيانات) دون حجز حلقة الأحداث."""
+    if _parallel():
+        return await sync_to_async(
+            _with_connection(func), thread_sensitive=False, executor=_query_executor(),
+        )()
+    return await sync_to_async(func)()
+
+
+def _evaluated(page_func):
+    """تقييم عناصر الصفحة داخل الخيط نفسه وليس أثناء عرض القالب."""
+    def run():
+        result = page_func()
+        page = result[0] if isinstance(result, tuple) else result
+        page.object_list = list(page.object_list)
+        return result
+    return run
+
+
+def _is_authenticated(request):
+    return request.user.is_authenticated
+
+
+@cache_anonymous_page
+async def article_list(request, category_slug=None):
+    latest_articles, featured_articles, categories, article_views, page = await asyncio.gather(
+        run_query(widgets.latest_articles),
+        run_query(widgets.featured_articles),
+        run_query(widgets.active_categories),
+        run_query(widgets.trending_articles),
+        run_query(_evaluated(partial(article_list_page, request, category_slug))),
+    )
+    articles, current_category, search_query = page
+
+    context = {
+        'articles': articles,
+        'categories': categories,
+        'read_views': article_views,
+        'current_category': current_category,
+        'search_query': search_query,
+        'featured_articles': featured_articles,
+        'latest_articles': latest_articles,
+    }
+    return await sync_to_async(render)(request, 'news/articles/list.html', context)
+
+
+@cache_anonymous_page
+async def search(request):
+    query = request.GET.get('q', '').strip()
+    breaking_news, featured_articles, categories, page_obj = await asyncio.gather(
+        run_query(widgets.breaking_news),
+        run_query(widgets.featured_articles),
+        run_query(widgets.active_categories),
+        run_query(_evaluated(partial(search_page, request, query))),
+    )
+
+    context = {
+        'query': query,
+        'articles': page_obj,
+        'page_obj': page_obj,
+        'breaking_news': breaking_news,
+        'featured_articles': featured_articles,
+        'categories': categories,
+    }
+    return await sync_to_async(render)(request, 'news/articles/search.html', context)
+
+
+async def article_detail(request, slug):
+    # login_required في Django 4.2 لا يدعم views الـ async
+    if not await sync_to_async(_is_authenticated)(request):
+        return redirect_to_login(request.get_full_path())
+
+    article = await sync_to_async(get_article_or_404)(
+        slug, Article.objects.select_related('category', 'author').defer('search_vector'),
+    )
+    latest_articles, related_articles, state = await asyncio.gather(
+        run_query(widgets.latest_articles),
+        run_query(lambda: list(related_articles_for(article))),
+        sync_to_async(interaction_state)(request),
+    )
+    si_saved = state.is_saved(article.pk)
+    user_reaction = state.reaction(article.pk)
+    await sync_to_async(record_view)(article)
+
+    context = {
+        'article': article,
+        'related_articles': related_articles,
+        'latest_articles': latest_articles,
+        'user_reaction': user_reaction,
+        'like_count': article.like_count,
+        'dislike_count': article.dislike_count,
+        'si_saved': si_saved,
+        'save_count': si_saved,
+    }
+    return await sync_to_async(render)(request, 'news/articles/article_detail.html', context)
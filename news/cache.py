@@ -0,0 +1,195 @@
+"""
+أدوات التخزين المؤقت المشتركة.
+
+نستخدم "أرقام أجيال" (generations) بدلاً من حذف المفاتيح واحداً واحداً:
+كل مفتاح مخزن يتضمن رقم الجيل الحالي، وعند تغير البيانات نزيد الرقم
+فتصبح كل المفاتيح القديمة غير مستخدمة وتنتهي صلاحيتها لاحقاً.
+"""
+import asyncio
+import hashlib
+import re
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+
+def _generation_key(name):
+    return f'news:gen:{name}'
+
+
+def get_generation(name):
+    key = _generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, 1, timeout=None)
+        value = cache.get(key, 1)
+    return value
+
+
+def bump_generation(name):
+    key = _generation_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # المفتاح غير موجود (أول تشغيل أو أُفرغ التخزين المؤقت)
+        cache.add(key, 2, timeout=None)
+        return cache.get(key, 2)
+
+
+def shared_cache():
+    """
+    هل cache مشترك بين كل العمليات (Redis مثلاً)؟ الإبطال بأرقام الأجيال يصل
+    للعمليات الأخرى فقط مع cache مشترك. NEWS_SHARED_CACHE يحدد ذلك صراحة،
+    وإلا يُعتبر LocMemCache (ذاكرة العملية) غير مشترك.
+    """
+    value = getattr(settings, 'NEWS_SHARED_CACHE', None)
+    if value is None:
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        value = backend.rsplit('.', 1)[-1] != 'LocMemCache'
+    return value
+
+
+def generation_timeout(timeout):
+    """
+    مدة تخزين قيمة تُبطل بـ bump_generation. مع cache غير مشترك لا تعلم
+    العمليات الأخرى بالإبطال، فتُقصَّر المدة إلى NEWS_LOCAL_CACHE_TIMEOUT.
+    """
+    if shared_cache():
+        return timeout
+    local = getattr(settings, 'NEWS_LOCAL_CACHE_TIMEOUT', 5)
+    return local if timeout is None else min(timeout, local)
+
+
+def versioned_key(name, *parts):
+    """مفتاح مرتبط بجيل ``name``: يتغير تلقائياً عند استدعاء bump_generation."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'news:{name}:{get_generation(name)}:{suffix}'
+
+
+# ---------------------------------------------------------------------------
+# تخزين الصفحات الكاملة للزوار غير المسجلين
+# ---------------------------------------------------------------------------
+
+# جيل يُزاد كلما أصبح مقال منشوراً أو توقف عن النشر (news.signals)
+PUBLISH_GENERATION = 'publish'
+
+# معاملات لا تغير محتوى الصفحة (تتبع الحملات)
+IGNORED_PARAMS = ('utm_', 'fbclid', 'gclid')
+
+CSRF_PLACEHOLDER = '__news_csrf_token__'
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")([^"]+)(")')
+
+
+def normalized_query(request):
+    """معاملات الرابط مرتبة وبدون القيم الفارغة ومعاملات التتبع."""
+    items = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        if not key.startswith(IGNORED_PARAMS)
+        for value in values
+        if value.strip()
+    )
+    return urlencode(items)
+
+
+def page_cache_key(request):
+    digest = hashlib.md5(f'{request.path}?{normalized_query(request)}'.encode()).hexdigest()
+    return versioned_key(PUBLISH_GENERATION, 'page', digest)
+
+
+def _request_is_cacheable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # أي جلسة أو رسائل معلقة تعني أن الصفحة قد تختلف لهذا الزائر
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or 'messages' in request.COOKIES:
+        return False
+    return not request.user.is_authenticated
+
+
+def _response_is_cacheable(request, response):
+    if response.status_code != 200 or response.cookies or response.streaming:
+        return False
+    storage = getattr(request, '_messages', None)
+    if storage is not None and storage._queued_messages:
+        return False
+    session = getattr(request, 'session', None)
+    return session is None or not session.modified
+
+
+def _freeze(response):
+    """
+    يحول الاستجابة إلى بيانات قابلة للتخزين. رمز CSRF الموجود في نماذج
+    تسجيل الدخول يُستبدل بعلامة حتى لا يتشارك الزوار نفس الرمز.
+    """
+    content = response.content.decode(response.charset)
+    content = CSRF_INPUT.sub(lambda m: m.group(1) + CSRF_PLACEHOLDER + m.group(3), content)
+    headers = {k: v for k, v in response.headers.items() if k.lower() != 'content-length'}
+    return {'content': content, 'headers': headers, 'charset': response.charset}
+
+
+def _thaw(data, request):
+    content = data['content']
+    if CSRF_PLACEHOLDER in content:
+        # get_token يجهز كوكي CSRF خاصاً بهذا الزائر عبر CsrfViewMiddleware
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, charset=data['charset'])
+    for header, value in data['headers'].items():
+        response[header] = value
+    return response
+
+
+def _lookup_page(request):
+    """(المفتاح، الاستجابة المخزنة أو None)، والمفتاح None إن كان الطلب لا يُخزن."""
+    if not _request_is_cacheable(request):
+        return None, None
+    key = page_cache_key(request)
+    data = cache.get(key)
+    if data is None:
+        return key, None
+    response = _thaw(data, request)
+    response['X-Page-Cache'] = 'hit'
+    return key, response
+
+
+def _store_page(key, request, response):
+    if _response_is_cacheable(request, response):
+        cache.set(key, _freeze(response), generation_timeout(getattr(settings, 'NEWS_PAGE_CACHE_TIMEOUT', 60)))
+        response['X-Page-Cache'] = 'miss'
+
+
+def cache_anonymous_page(view):
+    """
+    يخزن الصفحة كاملة للزوار غير المسجلين. المفتاح من المسار ومعاملات الرابط
+    بعد ترتيبها، ومرتبط بجيل النشر فتتجدد كل الصفحات عند نشر مقال أو إلغاء نشره.
+    يعمل مع views العادية و async (news.async_views).
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            # request.user والجلسة والتخزين المؤقت عمليات متزامنة
+            key, response = await sync_to_async(_lookup_page)(request)
+            if response is not None:
+                return response
+            response = await view(request, *args, **kwargs)
+            if key is not None:
+                await sync_to_async(_store_page)(key, request, response)
+            return response
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key, response = _lookup_page(request)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if key is not None:
+            _store_page(key, request, response)
+        return response
+
+    return wrapper
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .interactions import interaction_state
+
+
+def interactions(request):
+    """
+    حالة تفاعل المستخدم للقوالب (news.interactions.InteractionState).
+    تُحمّل فقط إن استخدمها القالب.
+    """
+    return {'interactions': SimpleLazyObject(lambda: interaction_state(request))}
@@ -0,0 +1,303 @@
+"""
+عدّاد المشاهدات المؤجَّل (write-behind)
+
+بدلاً من حفظ المقال كاملاً مع كل زيارة، تُجمع الزيادات في ذاكرة العملية
+ثم تُكتب دفعة واحدة بتحديثات ذرّية من نوع ``F('views') + n``.
+التحديث عبر ``QuerySet.update`` لا يلمس ``updated_at`` لذلك يبقى
+``lastmod`` في خريطة الموقع ثابتاً.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import trending
+
+logger = logging.getLogger('news.counters')
+
+
+def _flush_interval():
+    # 0 تعني الكتابة المباشرة بدون تخزين مؤقت (مفيد في الاختبارات)
+    return getattr(settings, 'NEWS_VIEW_COUNT_FLUSH_INTERVAL', 10)
+
+
+def _max_pending():
+    return getattr(settings, 'NEWS_VIEW_COUNT_MAX_PENDING', 500)
+
+
+def _max_requeued():
+    # عند تعطل قاعدة البيانات: حد المقالات المحفوظة في الذاكرة حتى تعود
+    return _max_pending() * 10
+
+
+def _changed(field, delta):
+    """
+    F(field) + delta بحد أدنى 0 عند النقص: صفوف كُتبت من خارج دوال العدادات
+    (لوحة الإدارة مثلاً) تجعل العداد أقل من الحقيقي، والقيد CHECK يرفض السالب.
+    """
+    if delta >= 0:
+        return F(field) + delta
+    return Greatest(F(field) + delta, Value(0), output_field=IntegerField())
+
+
+class ViewCounterBuffer:
+    """مخزن زيادات المشاهدات لكل عملية، آمن للاستخدام بين الخيوط."""
+
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._last_flush = time.monotonic()
+        # بعد فشل الكتابة لا نعيد المحاولة من الطلبات قبل هذا الوقت
+        self._retry_at = 0
+
+    def record(self, article_id, n=1):
+        """لا يرفع استثناء: فشل الكتابة يُسجَّل ولا يُفشل الطلب."""
+        if _flush_interval() <= 0:
+            try:
+                self._write({article_id: n})
+            except Exception:
+                logger.exception('تعذر حفظ مشاهدة المقال %s', article_id)
+            return
+        with self._lock:
+            self._pending[article_id] += n
+            overflow = len(self._pending) >= _max_pending() and time.monotonic() >= self._retry_at
+        self._ensure_flusher()
+        if overflow:
+            self._flush_logged()
+
+    def pending(self, article_id):
+        with self._lock:
+            return self._pending.get(article_id, 0)
+
+    def flush(self):
+        """يكتب كل الزيادات المعلقة ويعيد عدد المقالات التي حُدّثت."""
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(int)
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+        try:
+            self._write(batch)
+        except Exception:
+            # نعيد الزيادات إلى المخزن حتى لا تضيع عند فشل قاعدة البيانات،
+            # دون تجاوز _max_requeued مقالاً
+            dropped = 0
+            with self._lock:
+                self._retry_at = time.monotonic() + max(_flush_interval(), 1)
+                for article_id, n in batch.items():
+                    if article_id in self._pending or len(self._pending) < _max_requeued():
+                        self._pending[article_id] += n
+                    else:
+                        dropped += n
+            if dropped:
+                logger.warning('أُهملت %d مشاهدة لتعذر الكتابة إلى قاعدة البيانات', dropped)
+            raise
+        return len(batch)
+
+    def _flush_logged(self):
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('تعذر كتابة عدادات المشاهدات')
+            return 0
+
+    def _write(self, batch):
+        from .models import Article
+
+        # تجميع المقالات حسب مقدار الزيادة: استعلام UPDATE واحد لكل مقدار
+        by_amount = defaultdict(list)
+        for article_id, n in batch.items():
+            by_amount[n].append(article_id)
+        with transaction.atomic():
+            for n, ids in by_amount.items():
+                Article.objects.filter(pk__in=ids).update(views=F('views') + n)
+            trending.add_events({article_id: n * trending.view_weight() for article_id, n in batch.items()})
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._run, name='news-view-counter', daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(max(_flush_interval(), 1))
+            close_old_connections()
+            try:
+                self._flush_logged()
+            finally:
+                close_old_connections()
+
+
+view_counter = ViewCounterBuffer()
+
+
+def record_view(article):
+    """يسجل مشاهدة ويحدّث القيمة المعروضة في الكائن الحالي فقط."""
+    view_counter.record(article.pk)
+    article.views += 1
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# عدادات التفاعل (إعجاب / عدم إعجاب)
+# ---------------------------------------------------------------------------
+
+REACTION_COUNT_FIELDS = {
+    'like': 'like_count',
+    'dislike': 'dislike_count',
+}
+
+
+def apply_reaction_change(article_id, old_type=None, new_type=None):
+    """
+    يعدّل العدادات المخزنة عند إضافة تفاعل أو تبديله أو حذفه.
+    يجب استدعاؤها داخل نفس المعاملة التي عدّلت جدول Reaction.
+    """
+    from .models import Article
+
+    if old_type == new_type:
+        return
+    changes = {}
+    if old_type in REACTION_COUNT_FIELDS:
+        field = REACTION_COUNT_FIELDS[old_type]
+        changes[field] = _changed(field, -1)
+    if new_type in REACTION_COUNT_FIELDS:
+        field = REACTION_COUNT_FIELDS[new_type]
+        changes[field] = F(field) + 1
+    if changes:
+        Article.objects.filter(pk=article_id).update(**changes)
+    if new_type is not None:
+        trending.add_events({article_id: trending.reaction_weight(new_type)})
+
+
+def rebuild_reaction_counts(queryset=None):
+    """يعيد حساب العدادات من جدول Reaction ويعيد عدد المقالات المحدثة."""
+    from .models import Article, Reaction
+
+    def count_of(reaction_type):
+        counts = Reaction.objects.filter(
+            article=OuterRef('pk'), reaction_type=reaction_type
+        ).order_by().values('article').annotate(c=Count('pk')).values('c')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    if queryset is None:
+        queryset = Article.objects.all()
+    return queryset.update(
+        like_count=count_of('like'),
+        dislike_count=count_of('dislike'),
+    )
+
+
+# ---------------------------------------------------------------------------
+# عدد المقالات المنشورة في كل تصنيف
+# ---------------------------------------------------------------------------
+
+def apply_category_change(old_category_id=None, new_category_id=None):
+    """
+    ينقل مقالاً منشوراً بين تصنيفين في العداد. None تعني "غير منشور أو بدون
+    تصنيف"، فالنشر هو (None -> تصنيف) وإلغاء النشر أو الحذف هو (تصنيف -> None).
+    """
+    from .models import Category
+
+    if old_category_id == new_category_id:
+        return
+    if old_category_id is not None:
+        Category.objects.filter(pk=old_category_id).update(published_count=_changed('published_count', -1))
+    if new_category_id is not None:
+        Category.objects.filter(pk=new_category_id).update(published_count=F('published_count') + 1)
+
+
+def rebuild_category_counts(queryset=None):
+    """يعيد حساب published_count من جدول المقالات ويعيد عدد التصنيفات المحدثة."""
+    from .models import Article, Category
+
+    counts = Article.published.filter(
+        category=OuterRef('pk')
+    ).order_by().values('category').annotate(c=Count('pk')).values('c')
+    if queryset is None:
+        queryset = Category.objects.all()
+    return queryset.update(
+        published_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+# ---------------------------------------------------------------------------
+# عدد المقالات المحفوظة لكل مستخدم
+# ---------------------------------------------------------------------------
+
+def apply_saved_change(user_id, delta):
+    """
+    يضيف delta (+1 حفظ، -1 إلغاء) إلى عداد المستخدم داخل نفس المعاملة التي
+    عدّلت SavedArticle. أول تغيير للمستخدم ينشئ الصف من العدد الفعلي.
+    """
+    from .models import ReaderStats, SavedArticle
+
+    stats = ReaderStats.objects.filter(user_id=user_id)
+    if stats.update(saved_count=_changed('saved_count', delta)):
+        return
+    _stats, created = ReaderStats.objects.get_or_create(
+        user_id=user_id,
+        defaults={'saved_count': SavedArticle.objects.filter(user_id=user_id).count()},
+    )
+    if not created:
+        stats.update(saved_count=_changed('saved_count', delta))
+
+
+def saved_count(user_id):
+    """عدد محفوظات المستخدم من العداد، أو COUNT(*) إن لم يُنشأ له صف بعد."""
+    from .models import ReaderStats, SavedArticle
+
+    value = ReaderStats.objects.filter(user_id=user_id).values_list('saved_count', flat=True).first()
+    if value is None:
+        value = SavedArticle.objects.filter(user_id=user_id).count()
+    return value
+
+
+def remove_article_saves(article_id):
+    """قبل حذف مقال: الحذف المتتالي لـ SavedArticle لا يمر على العدادات."""
+    from .models import ReaderStats
+
+    ReaderStats.objects.filter(user__saved_articles__article_id=article_id).update(
+        saved_count=_changed('saved_count', -1),
+    )
+
+
+def rebuild_saved_counts(user_ids=None):
+    """يعيد حساب saved_count من جدول المحفوظات ويعيد عدد المستخدمين الذين لديهم محفوظات."""
+    from .models import ReaderStats, SavedArticle
+
+    counts = SavedArticle.objects.order_by().values('user').annotate(c=Count('pk'))
+    if user_ids is not None:
+        counts = counts.filter(user__in=user_ids)
+    counts = {row['user']: row['c'] for row in counts}
+    with transaction.atomic():
+        stats = ReaderStats.objects.all()
+        if user_ids is not None:
+            stats = stats.filter(user__in=user_ids)
+        stats.exclude(user__in=list(counts)).update(saved_count=0)
+        ReaderStats.objects.bulk_create(
+            [ReaderStats(user_id=user_id, saved_count=c) for user_id, c in counts.items()],
+            update_conflicts=True, unique_fields=['user'], update_fields=['saved_count'],
+            batch_size=1000,
+        )
+    return len(counts)
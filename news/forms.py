@@ -1,4 +1,9 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
+from django.utils import timezone
+
+from .models import Article, Category
 
 
 
@@ -20,4 +25,39 @@ class SimpleSearchForm(forms.Form):
             'style': 'width: 300px;'
         }),
         help_text='اكتب كلمة أو جملة للبحث في عناوين ومحتوى المقالات'
-    )
\ No newline at end of file
+    )
+
+
+class ArticleExportForm(forms.Form):
+    """مرشحات تصدير المقالات (view و الأمر export_articles)."""
+
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], required=False)
+    status = forms.ChoiceField(choices=[('', 'الكل')] + Article.Status.choices, required=False)
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.all(), to_field_name='slug', required=False,
+    )
+    since = forms.DateField(required=False, label='من تاريخ')
+    until = forms.DateField(required=False, label='إلى تاريخ (شاملاً)')
+    gzip = forms.BooleanField(required=False)
+    without_content = forms.BooleanField(required=False, label='بدون نص المقال')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError('تاريخ البداية بعد تاريخ النهاية')
+        return cleaned_data
+
+    def filters(self):
+        """معاملات news.exporter.export_queryset (حدود الأيام بالمنطقة الزمنية الحالية)."""
+        data = self.cleaned_data
+
+        def day_start(value):
+            return timezone.make_aware(datetime.combine(value, time.min))
+
+        return {
+            'status': data['status'] or None,
+            'category': data['category'],
+            'since': day_start(data['since']) if data['since'] else None,
+            'until': day_start(data['until'] + timedelta(days=1)) if data['until'] else None,
+        }
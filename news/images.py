@@ -0,0 +1,196 @@
+"""
+نسخ متجاوبة من صور المقالات.
+
+عند رفع صورة المقال تُنشأ منها نسخ بعروض ثابتة (NEWS_IMAGE_WIDTHS) بصيغة
+WebP بجانب الأصل (``photo.jpg`` -> ``photo-320w.webp``)، ومساراتها تُحفظ في
+``Article.image_derivatives``::
+
+    {'source': 'articles/2024/01/01/photo.jpg',
+     'widths': {'320': 'articles/2024/01/01/photo-320w.webp', ...}}
+
+``source`` هو اسم الصورة التي أُنشئت منها النسخ، فإن تغيرت الصورة نعرف أن
+النسخ قديمة. ``hash`` (sha256 للأصل) و ``mtime`` يسمحان لأمر الإنشاء الجماعي
+بتخطي الصور التي لم تتغير. القوالب تستخدم الوسوم في
+``news.templatetags.news_images``.
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger('news.images')
+
+# أخطاء قراءة الصورة (ملف مفقود أو تالف أو ضخم جداً)
+IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+
+def image_widths():
+    return tuple(sorted(getattr(settings, 'NEWS_IMAGE_WIDTHS', (320, 640, 1024))))
+
+
+def derivative_name(name, width):
+    return f'{os.path.splitext(name)[0]}-{width}w.webp'
+
+
+def target_widths(original_width, widths=None):
+    """
+    العروض المطلوبة لصورة بعرض معين: لا نكبّر الصور، وإن كانت الصورة أضيق
+    من أكبر عرض نضيف نسخة بعرضها الأصلي.
+    """
+    widths = widths or image_widths()
+    targets = [width for width in widths if width < original_width]
+    if original_width <= widths[-1]:
+        targets.append(original_width)
+    return targets
+
+
+def image_quality():
+    return getattr(settings, 'NEWS_IMAGE_WEBP_QUALITY', 80)
+
+
+def render_derivatives(fp, widths=None, quality=None):
+    """
+    يقرأ الصورة من fp ويعيد قائمة (العرض، بايتات WebP). عند تمرير widths و
+    quality لا تُقرأ الإعدادات، فيمكن استدعاؤها من عمليات منفصلة.
+    """
+    widths = widths or image_widths()
+    quality = quality or image_quality()
+    with Image.open(fp) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    rendered = []
+    for width in target_widths(image.width, widths):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=quality, method=4)
+        rendered.append((width, buffer.getvalue()))
+    return rendered
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def modified_time(storage, name):
+    """وقت تعديل الأصل كرقم (أو None إن لم يدعمه التخزين)."""
+    try:
+        return storage.get_modified_time(name).timestamp()
+    except (NotImplementedError, OSError):
+        return None
+
+
+def render_task(task):
+    """
+    تُنفذ في عملية منفصلة (ProcessPoolExecutor في أمر generate_image_derivatives)
+    فلا تستخدم قاعدة البيانات ولا الإعدادات. task هي
+    ``(pk, مسار الأصل أو بايتاته, hash المعروف, widths, quality)`` والنتيجة
+    ``(pk, hash, حجم الأصل, النسخ, الخطأ)``. النسخ None إن لم يتغير المحتوى.
+    """
+    pk, source, known_hash, widths, quality = task
+    try:
+        if isinstance(source, bytes):
+            data = source
+        else:
+            with open(source, 'rb') as fp:
+                data = fp.read()
+        digest = content_hash(data)
+        if digest == known_hash:
+            return pk, digest, len(data), None, None
+        return pk, digest, len(data), render_derivatives(BytesIO(data), widths, quality), None
+    except IMAGE_ERRORS as exc:
+        return pk, None, 0, None, str(exc)
+
+
+def current_derivatives(article):
+    """النسخ المخزنة إن كانت مأخوذة من الصورة الحالية: قائمة (العرض، المسار) مرتبة."""
+    derivatives = article.image_derivatives or {}
+    if not article.image or derivatives.get('source') != article.image.name:
+        return []
+    return sorted((int(width), path) for width, path in derivatives.get('widths', {}).items())
+
+
+def is_outdated(article):
+    derivatives = article.image_derivatives or {}
+    if not article.image:
+        return bool(derivatives)
+    return derivatives.get('source') != article.image.name
+
+
+def _save(article, derivatives):
+    from .models import Article
+
+    Article.objects.filter(pk=article.pk).update(image_derivatives=derivatives)
+    article.image_derivatives = derivatives
+
+
+def _delete_unused(storage, old, keep):
+    for path in (old or {}).get('widths', {}).values():
+        if path not in keep:
+            storage.delete(path)
+
+
+def is_up_to_date(article, mtime):
+    """النسخ مأخوذة من الصورة الحالية ولم يتغير ملفها منذ إنشائها."""
+    derivatives = article.image_derivatives or {}
+    return (
+        not is_outdated(article)
+        and mtime is not None
+        and derivatives.get('mtime') == mtime
+    )
+
+
+def store_derivatives(article, rendered, **meta):
+    """
+    يحفظ النسخ (ناتج render_derivatives) في التخزين ويسجل مساراتها في المقال
+    مع meta (hash و mtime للأصل).
+    """
+    storage = article.image.storage
+    widths = {}
+    for width, data in rendered:
+        path = derivative_name(article.image.name, width)
+        if storage.exists(path):
+            storage.delete(path)
+        widths[str(width)] = storage.save(path, ContentFile(data))
+    _delete_unused(storage, article.image_derivatives, set(widths.values()))
+    derivatives = {'source': article.image.name, 'widths': widths, **meta}
+    _save(article, derivatives)
+    return derivatives
+
+
+def touch_derivatives(article, mtime):
+    """الأصل لم يتغير محتواه (نفس hash) وإنما وقت تعديله فقط."""
+    _save(article, {**article.image_derivatives, 'mtime': mtime})
+
+
+def generate_derivatives(article):
+    """ينشئ نسخ صورة المقال ويحفظها. يرفع أحد IMAGE_ERRORS إن تعذرت قراءة الصورة."""
+    storage = article.image.storage
+    with storage.open(article.image.name, 'rb') as fp:
+        data = fp.read()
+    rendered = render_derivatives(BytesIO(data))
+    return store_derivatives(
+        article, rendered, hash=content_hash(data), mtime=modified_time(storage, article.image.name),
+    )
+
+
+def sync_derivatives(article):
+    """
+    يُستدعى بعد حفظ المقال: ينشئ النسخ إن تغيرت الصورة ويحذفها إن أزيلت.
+    الأخطاء تُسجل فقط حتى لا يفشل حفظ المقال بسبب صورة تالفة.
+    """
+    if not is_outdated(article):
+        return
+    if not article.image:
+        _delete_unused(article.image.storage, article.image_derivatives, set())
+        _save(article, {})
+        return
+    try:
+        generate_derivatives(article)
+    except IMAGE_ERRORS as exc:
+        logger.warning('تعذر إنشاء نسخ الصورة %s: %s', article.image.name, exc)
@@ -0,0 +1,358 @@
+"""
+استيراد المقالات من ملفات كبيرة (الأمر import_articles).
+
+الملف إما NDJSON (كائن JSON في كل سطر) أو مصفوفة JSON، ويُقرأ تدريجياً
+(``iter_records``) فلا يُحمَّل كاملاً في الذاكرة. كل سجل إما مقال مباشر أو
+بصيغة dumpdata (``{"model": "news.article", "fields": {...}}``)::
+
+    {"title": "...", "content": "...", "category": "sports", "author": "admin",
+     "publish": "2024-01-01T10:00:00Z", "status": "PB", "slug": "..."}
+
+التصنيف يُطابق برقمه أو slug أو اسمه، والكاتب برقمه أو اسم المستخدم، عبر
+خرائط في الذاكرة. المقالات تُدرج بـ bulk_create على دفعات، كل دفعة في
+معاملة، فلا تُطلق إشارات الحفظ: الملخص يُحسب هنا، وفي النهاية (``finish``)
+تُعاد أعداد التصنيفات وتُبطل الأشرطة الجانبية والصفحات وخرائط الموقع. متجهات
+البحث والمقالات ذات الصلة ونسخ الصور لها أوامرها (update_search_vectors
+و build_related_articles و generate_image_derivatives).
+"""
+import json
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import widgets
+from .arabic import arabic_slug
+from .cache import PUBLISH_GENERATION, bump_generation
+from .counters import rebuild_category_counts
+from .models import Article, Category, make_excerpt
+from .search import SEARCH_GENERATION
+from .sitemaps import invalidate_months
+
+CHUNK_SIZE = 64 * 1024
+NUMBER_END = frozenset(' \t\r\n,]}')
+# مساحة في نهاية slug للاحقة التمييز (-2، -3 ...)
+SLUG_LENGTH = Article._meta.get_field('slug').max_length - 10
+# حد لعدد اللواحق المحفوظة حتى تبقى الذاكرة ثابتة
+MAX_SLUG_SUFFIXES = 10000
+
+
+class ImportRecordError(ValueError):
+    """سجل لا يمكن استيراده (يُتخطى ويُحسب في skipped)."""
+
+
+def iter_ndjson(fp):
+    for number, line in enumerate(fp, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f'السطر {number}: {exc}') from exc
+
+
+def iter_json_array(fp, chunk_size=CHUNK_SIZE):
+    """
+    يعيد عناصر مصفوفة JSON واحداً واحداً. المخزن يحتوي جزءاً من الملف
+    بحجم chunk_size تقريباً (أو أكبر عنصر) وليس الملف كله.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+
+    def read_more():
+        nonlocal buffer, pos
+        chunk = fp.read(chunk_size)
+        buffer, pos = buffer[pos:] + chunk, 0
+        return bool(chunk)
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not read_more():
+                return buffer[pos:pos + 1]
+
+    if next_char() != '[':
+        raise ValueError('الملف ليس مصفوفة JSON')
+    pos += 1
+    if next_char() == ']':
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            # الرقم قد يكون مقطوعاً عند نهاية المخزن (1 من 1.5) فلا يكتمل إلا بفاصل بعده
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and buffer[end:end + 1] not in NUMBER_END and read_more():
+                continue
+            break
+        pos = end
+        yield value
+        separator = next_char()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f'متوقع "," أو "]" وجاء {separator!r}')
+        pos += 1
+
+
+def iter_records(fp, fmt='auto'):
+    """سجلات الملف حسب صيغته (json أو ndjson أو auto حسب أول حرف)."""
+    if fmt == 'auto':
+        first = ''
+        if fp.seekable():
+            while not first:
+                char = fp.read(1)
+                if not char or not char.isspace():
+                    first = char or ' '
+            fp.seek(0)
+        fmt = 'json' if first == '[' else 'ndjson'
+    return iter_json_array(fp) if fmt == 'json' else iter_ndjson(fp)
+
+
+def article_fields(record):
+    """حقول المقال من السجل، أو None لسجلات dumpdata لنماذج أخرى."""
+    if not isinstance(record, dict):
+        raise ImportRecordError('السجل ليس كائن JSON')
+    if 'model' in record and 'fields' in record:
+        if record['model'] != 'news.article':
+            return None
+        return record['fields']
+    return record
+
+
+class ArticleImporter:
+    """
+    يحول السجلات إلى مقالات ويدرجها على دفعات. ``progress(stats, elapsed)``
+    يُستدعى بعد كل دفعة، و ``on_error(number, error)`` لكل سجل متخطى.
+    """
+
+    def __init__(self, batch_size=1000, default_author=None, create_categories=False,
+                 progress=None, on_error=None):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.progress = progress
+        self.on_error = on_error
+        self.stats = Counter()
+        self._finished = 0
+        self.months = set()
+        self._suffixes = {}
+        self.categories = {}
+        for category in Category.objects.only('pk', 'name', 'slug'):
+            self._remember_category(category)
+        self.authors = {}
+        self.default_author = self._author_id(default_author) if default_author else None
+        if default_author and self.default_author is None:
+            raise ValueError(f'الكاتب الافتراضي غير موجود: {default_author}')
+
+    def _remember_category(self, category):
+        self.categories[category.pk] = category.pk
+        self.categories[category.name] = category.pk
+        if category.slug:
+            self.categories[category.slug] = category.pk
+
+    def _category_id(self, value):
+        if value in (None, ''):
+            return None
+        if value in self.categories:
+            return self.categories[value]
+        if isinstance(value, int) or not self.create_categories:
+            raise ImportRecordError(f'تصنيف غير معروف: {value}')
+        category = Category.objects.create(name=value, slug=self._category_slug(value))
+        self._remember_category(category)
+        self.stats['categories'] += 1
+        return category.pk
+
+    def _category_slug(self, name):
+        base = arabic_slug(name, 240) or 'category'
+        slug, n = base, 1
+        while Category.objects.filter(slug=slug).exists():
+            n += 1
+            slug = f'{base}-{n}'
+        return slug
+
+    def _author_id(self, value):
+        if value not in self.authors:
+            queryset = User.objects.filter(pk=value) if isinstance(value, int) else User.objects.filter(username=value)
+            self.authors[value] = queryset.values_list('pk', flat=True).first()
+        return self.authors[value]
+
+    def _load_authors(self, records):
+        """يحمل الكتاب غير المعروفين في الدفعة باستعلام واحد."""
+        names = {
+            fields.get('author') for fields in records
+            if isinstance(fields.get('author'), str) and fields.get('author') not in self.authors
+        }
+        if not names:
+            return
+        found = dict(User.objects.filter(username__in=names).values_list('username', 'pk'))
+        for name in names:
+            self.authors[name] = found.get(name)
+
+    @staticmethod
+    def _text(fields, name):
+        value = fields.get(name)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ImportRecordError(f'الحقل {name} يجب أن يكون نصاً')
+        return value
+
+    @staticmethod
+    def _key(fields, name):
+        """قيمة بحث (رقم أو نص) للكاتب أو التصنيف."""
+        value = fields.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, str))):
+            raise ImportRecordError(f'الحقل {name} يجب أن يكون رقماً أو نصاً')
+        return value
+
+    def build(self, fields):
+        """مقال غير محفوظ من حقول السجل، أو ImportRecordError."""
+        title = self._text(fields, 'title').strip()
+        if not title:
+            raise ImportRecordError('العنوان مطلوب')
+        author = self._key(fields, 'author')
+        author_id = self._author_id(author) if author not in (None, '') else None
+        author_id = author_id or self.default_author
+        if author_id is None:
+            raise ImportRecordError(f'كاتب غير معروف: {author}')
+
+        publish = fields.get('publish') or timezone.now()
+        if isinstance(publish, str):
+            try:
+                parsed = parse_datetime(publish)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise ImportRecordError(f'تاريخ غير صالح: {publish}')
+            publish = parsed
+        if not isinstance(publish, datetime):
+            raise ImportRecordError(f'تاريخ غير صالح: {publish}')
+        if timezone.is_naive(publish):
+            publish = timezone.make_aware(publish)
+
+        status = self._text(fields, 'status') or Article.Status.PUBLISHED
+        if status not in Article.Status.values:
+            raise ImportRecordError(f'حالة غير معروفة: {status}')
+
+        views = fields.get('views') or 0
+        if isinstance(views, bool) or not isinstance(views, (int, str)) or not str(views).isdigit():
+            raise ImportRecordError(f'عدد مشاهدات غير صالح: {views}')
+
+        content = self._text(fields, 'content')
+        return Article(
+            title=title[:200],
+            slug=self._text(fields, 'slug')[:SLUG_LENGTH] or None,
+            content=content,
+            excerpt=make_excerpt(content),
+            author_id=author_id,
+            category_id=self._category_id(self._key(fields, 'category')),
+            publish=publish,
+            status=status,
+            image=self._text(fields, 'image'),
+            featured=bool(fields.get('featured')),
+            breaking_news=bool(fields.get('breaking_news')),
+            views=int(views),
+        )
+
+    def _free_slug(self, base, used):
+        """أول base-N غير مستخدم، مع حفظ آخر N لكل base حتى لا نبحث من البداية."""
+        if base not in self._suffixes:
+            if len(self._suffixes) >= MAX_SLUG_SUFFIXES:
+                self._suffixes.clear()
+            taken = Article.objects.filter(slug__startswith=f'{base}-').values_list('slug', flat=True)
+            suffixes = [int(slug[len(base) + 1:]) for slug in taken if slug[len(base) + 1:].isdigit()]
+            self._suffixes[base] = max(suffixes, default=1)
+        n = self._suffixes[base]
+        while True:
+            n += 1
+            slug = f'{base}-{n}'
+            if slug not in used:
+                self._suffixes[base] = n
+                return slug
+
+    def assign_slugs(self, articles):
+        """slug فريد لكل مقال (بالنسبة لقاعدة البيانات وللدفعة نفسها)."""
+        wanted = [article.slug or arabic_slug(article.title, SLUG_LENGTH) or 'article' for article in articles]
+        taken = set(Article.objects.filter(slug__in=set(wanted)).values_list('slug', flat=True))
+        used = set()
+        for article, slug in zip(articles, wanted):
+            if slug in taken or slug in used:
+                slug = self._free_slug(slug, used | taken)
+            used.add(slug)
+            article.slug = slug
+
+    def _flush(self, records):
+        articles = []
+        for number, fields in records:
+            try:
+                articles.append(self.build(fields))
+            except (ImportRecordError, TypeError, ValueError) as exc:
+                self.stats['skipped'] += 1
+                if self.on_error:
+                    self.on_error(number, exc)
+        with transaction.atomic():
+            self.assign_slugs(articles)
+            Article.objects.bulk_create(articles)
+        self.stats['imported'] += len(articles)
+        self.months.update(
+            article.publish.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            for article in articles if article.status == Article.Status.PUBLISHED
+        )
+
+    def run(self, records):
+        """يستورد السجلات ويعيد الإحصاءات (imported و skipped و categories)."""
+        started = time.monotonic()
+        batch = []
+        for number, record in enumerate(records, 1):
+            self.stats['read'] += 1
+            try:
+                fields = article_fields(record)
+            except ImportRecordError as exc:
+                self.stats['skipped'] += 1
+                if self.on_error:
+                    self.on_error(number, exc)
+                continue
+            if fields is None:
+                continue
+            batch.append((number, fields))
+            if len(batch) >= self.batch_size:
+                self._flush_batch(batch, started)
+                batch = []
+        if batch:
+            self._flush_batch(batch, started)
+        self.finish()
+        return self.stats
+
+    def _flush_batch(self, batch, started):
+        self._load_authors([fields for _number, fields in batch])
+        self._flush(batch)
+        if self.progress:
+            self.progress(self.stats, time.monotonic() - started)
+
+    def finish(self):
+        """
+        ما كانت إشارات الحفظ ستفعله لكل مقال، مرة واحدة للاستيراد كله.
+        استدعاؤها مرة ثانية لا يفعل شيئاً إن لم يُستورد جديد.
+        """
+        if self.stats['imported'] == self._finished:
+            return
+        self._finished = self.stats['imported']
+        rebuild_category_counts()
+        widgets.invalidate(widgets.CATEGORIES, *widgets.ARTICLE_WIDGETS)
+        bump_generation('articles')
+        bump_generation(PUBLISH_GENERATION)
+        # الفهارس في الذاكرة (InvertedIndexSearchBackend) لا تعرف المقالات الجديدة
+        bump_generation(SEARCH_GENERATION)
+        invalidate_months(*self.months)
@@ -0,0 +1,316 @@
+"""
+تبديل التفاعل (like / dislike) والحفظ لمقال واحد بعبارة SQL واحدة.
+
+الطريقة السابقة (get_or_create ثم save أو delete) تقرأ ثم تكتب، فالنقر
+المزدوج يرسل طلبين يريان نفس الحالة، والثاني يفشل بـ IntegrityError أو
+يحسب العدادات مرتين. في PostgreSQL كل تبديل عبارة واحدة على مفتاح
+unique_together الموجود:
+
+- DELETE للصف إن كان بنفس النوع (إلغاء التفاعل أو الحفظ)
+- وإلا INSERT ... ON CONFLICT DO UPDATE (أو DO NOTHING للحفظ)
+
+إن أدخل طلب آخر الصف نفسه بين الجزأين لا تغير العبارة شيئاً، فنعيدها مرة
+ثانية وتحذفه (نقرتان = رجوع للحالة الأولى). ``xmax = 0`` يميز الإدخال من
+التحديث، فيُعرف النوع السابق وتُعدَّل العدادات المخزنة في نفس المعاملة.
+
+قواعد البيانات الأخرى (SQLite للتطوير) تنفذ الكتابة بالتتابع، فتكفي عبارات
+ORM داخل transaction.atomic تبدأ بالكتابة.
+
+``InteractionState`` حالة المستخدم لكل المقالات: أرقام المقالات المحفوظة
+والمعجب بها وغير المعجب بها كمصفوفات مرتبة (array من int64). تُحمّل باستعلام
+واحد (UNION ALL) وتُخزن في cache كـ bytes. صفحة المقال والقوائم تسأل عن العضوية
+بالبحث الثنائي بدون أي استعلام. الكتابة من خارج هذه الدوال (لوحة الإدارة مثلاً)
+تظهر بعد انتهاء NEWS_INTERACTION_STATE_TTL. مع cache غير مشترك بين العمليات
+(LocMemCache، انظر news.cache.shared_cache) لا تُخزن الحالة وتُحمّل مرة لكل طلب.
+
+المفتاح مرتبط بجيل لكل مستخدم (news.cache) يُزاد بعد نجاح كل تبديل، فلا
+تُعدَّل قيمة مخزنة أبداً ولا تضيع تبديلات متزامنة: التبديل الذي أخذ الجيل N
+يقرأ نسخة N-1 ويضيف تغييره ويخزنها باسم N (cache.add). النسخة المحمّلة من
+قاعدة البيانات تحت جيل N أحدث من كل تبديل أخذ N أو أقل (المعاملة تنتهي قبل
+زيادة الجيل)، وإن حُمّلت قبل تبديل جديد فهي تحت جيل قديم لن يُقرأ.
+"""
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import CharField, Value
+from django.utils import timezone
+
+from .cache import bump_generation, get_generation, shared_cache
+from .counters import apply_reaction_change, apply_saved_change
+from .models import Article, Reaction, SavedArticle
+
+REACTION_TYPES = ('like', 'dislike')
+# مرة ثانية فقط عند التزامن مع طلب آخر لنفس المستخدم والمقال
+ATTEMPTS = 2
+
+
+def _other(reaction_type):
+    return 'dislike' if reaction_type == 'like' else 'like'
+
+
+def _toggle_reaction_sql(user_id, article_id, reaction_type):
+    table = Reaction._meta.db_table
+    sql = f"""
+        WITH deleted AS (
+            DELETE FROM {table}
+            WHERE article_id = %s AND user_id = %s AND reaction_type = %s
+            RETURNING reaction_type
+        ), upserted AS (
+            INSERT INTO {table} (article_id, user_id, reaction_type, created_at)
+            SELECT %s, %s, %s, %s WHERE NOT EXISTS (SELECT 1 FROM deleted)
+            ON CONFLICT (article_id, user_id) DO UPDATE
+                SET reaction_type = EXCLUDED.reaction_type
+                WHERE {table}.reaction_type <> EXCLUDED.reaction_type
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT EXISTS (SELECT 1 FROM deleted), (SELECT inserted FROM upserted)
+    """
+    params = [article_id, user_id, reaction_type, article_id, user_id, reaction_type, timezone.now()]
+    with connection.cursor() as cursor:
+        for _attempt in range(ATTEMPTS):
+            cursor.execute(sql, params)
+            deleted, inserted = cursor.fetchone()
+            if deleted:
+                return reaction_type, None
+            if inserted is not None:
+                return (None if inserted else _other(reaction_type)), reaction_type
+    # نفس النوع موجود ولم يُحذف: لا تغيير
+    return reaction_type, reaction_type
+
+
+def _toggle_reaction_orm(user_id, article_id, reaction_type):
+    reactions = Reaction.objects.filter(user_id=user_id, article_id=article_id)
+    if reactions.filter(reaction_type=reaction_type).delete()[0]:
+        return reaction_type, None
+    if reactions.update(reaction_type=reaction_type):
+        return _other(reaction_type), reaction_type
+    Reaction.objects.create(user_id=user_id, article_id=article_id, reaction_type=reaction_type)
+    return None, reaction_type
+
+
+def toggle_reaction(user_id, article_id, reaction_type):
+    """
+    يبدّل تفاعل المستخدم ويعدّل like_count و dislike_count.
+    يعيد التفاعل الجديد ('like' أو 'dislike' أو None عند الإلغاء).
+    """
+    if reaction_type not in REACTION_TYPES:
+        raise ValueError(f'نوع تفاعل غير معروف: {reaction_type}')
+    toggle = _toggle_reaction_sql if connection.vendor == 'postgresql' else _toggle_reaction_orm
+    with transaction.atomic():
+        old_type, new_type = toggle(user_id, article_id, reaction_type)
+        apply_reaction_change(article_id, old_type=old_type, new_type=new_type)
+        _on_commit_update(user_id, InteractionState.set_reaction, article_id, new_type)
+    return new_type
+
+
+def _toggle_saved_sql(user_id, article_id):
+    table = SavedArticle._meta.db_table
+    sql = f"""
+        WITH deleted AS (
+            DELETE FROM {table} WHERE user_id = %s AND article_id = %s
+            RETURNING 1
+        ), inserted AS (
+            INSERT INTO {table} (user_id, article_id, saved_at)
+            SELECT %s, %s, %s WHERE NOT EXISTS (SELECT 1 FROM deleted)
+            ON CONFLICT (user_id, article_id) DO NOTHING
+            RETURNING 1
+        )
+        SELECT EXISTS (SELECT 1 FROM deleted), EXISTS (SELECT 1 FROM inserted)
+    """
+    params = [user_id, article_id, user_id, article_id, timezone.now()]
+    with connection.cursor() as cursor:
+        for _attempt in range(ATTEMPTS):
+            cursor.execute(sql, params)
+            deleted, inserted = cursor.fetchone()
+            if deleted:
+                return False
+            if inserted:
+                return True
+    return True
+
+
+def _toggle_saved_orm(user_id, article_id):
+    if SavedArticle.objects.filter(user_id=user_id, article_id=article_id).delete()[0]:
+        return False
+    SavedArticle.objects.create(user_id=user_id, article_id=article_id)
+    return True
+
+
+def toggle_saved(user_id, article_id):
+    """يحفظ المقال أو يلغي حفظه، ويعيد True إن أصبح محفوظاً."""
+    toggle = _toggle_saved_sql if connection.vendor == 'postgresql' else _toggle_saved_orm
+    with transaction.atomic():
+        saved = toggle(user_id, article_id)
+        apply_saved_change(user_id, 1 if saved else -1)
+        _on_commit_update(user_id, InteractionState.set_saved, article_id, saved)
+    return saved
+
+
+def remove_saved(user_id, article_id):
+    """يلغي حفظ المقال ويعيد False إن لم يكن محفوظاً."""
+    with transaction.atomic():
+        removed = SavedArticle.objects.filter(user_id=user_id, article_id=article_id).delete()[0]
+        if removed:
+            apply_saved_change(user_id, -1)
+            _on_commit_update(user_id, InteractionState.set_saved, article_id, False)
+    return bool(removed)
+
+
+def reaction_counts(article_id):
+    """(like_count, dislike_count) بعد التبديل."""
+    return Article.objects.filter(pk=article_id).values_list('like_count', 'dislike_count').first() or (0, 0)
+
+
+# ---------------------------------------------------------------------------
+# حالة تفاعل المستخدم (المحفوظات والإعجابات) لكل المقالات
+# ---------------------------------------------------------------------------
+
+class SortedIds:
+    """مجموعة أرقام مقالات في مصفوفة مرتبة: 8 بايت للرقم والبحث ثنائي."""
+
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids=()):
+        self._ids = array('q', sorted(set(ids)))
+
+    @classmethod
+    def frombytes(cls, data):
+        instance = cls()
+        instance._ids.frombytes(data)
+        return instance
+
+    def tobytes(self):
+        return self._ids.tobytes()
+
+    def __contains__(self, article_id):
+        index = bisect_left(self._ids, article_id)
+        return index < len(self._ids) and self._ids[index] == article_id
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def add(self, article_id):
+        index = bisect_left(self._ids, article_id)
+        if index == len(self._ids) or self._ids[index] != article_id:
+            self._ids.insert(index, article_id)
+
+    def discard(self, article_id):
+        index = bisect_left(self._ids, article_id)
+        if index < len(self._ids) and self._ids[index] == article_id:
+            del self._ids[index]
+
+
+class InteractionState:
+    """
+    حالة مستخدم واحد. القوالب تستخدم ``article.pk in interactions.saved``
+    (و liked و disliked).
+    """
+
+    def __init__(self, saved=(), liked=(), disliked=()):
+        self.saved = saved if isinstance(saved, SortedIds) else SortedIds(saved)
+        self.liked = liked if isinstance(liked, SortedIds) else SortedIds(liked)
+        self.disliked = disliked if isinstance(disliked, SortedIds) else SortedIds(disliked)
+
+    def is_saved(self, article_id):
+        return article_id in self.saved
+
+    def reaction(self, article_id):
+        """'like' أو 'dislike' أو None."""
+        if article_id in self.liked:
+            return 'like'
+        if article_id in self.disliked:
+            return 'dislike'
+        return None
+
+    def set_saved(self, article_id, saved):
+        if saved:
+            self.saved.add(article_id)
+        else:
+            self.saved.discard(article_id)
+
+    def set_reaction(self, article_id, reaction_type):
+        self.liked.discard(article_id)
+        self.disliked.discard(article_id)
+        if reaction_type == 'like':
+            self.liked.add(article_id)
+        elif reaction_type == 'dislike':
+            self.disliked.add(article_id)
+
+    def dumps(self):
+        return (self.saved.tobytes(), self.liked.tobytes(), self.disliked.tobytes())
+
+    @classmethod
+    def loads(cls, data):
+        return cls(*[SortedIds.frombytes(part) for part in data])
+
+
+def _generation_name(user_id):
+    return f'interactions:{user_id}'
+
+
+def _state_key(user_id, generation):
+    return f'news:interactions:{user_id}:{generation}'
+
+
+def _state_timeout():
+    return getattr(settings, 'NEWS_INTERACTION_STATE_TTL', 600)
+
+
+def load_state(user_id):
+    """حالة المستخدم من قاعدة البيانات باستعلام واحد."""
+    saved = SavedArticle.objects.filter(user_id=user_id).values_list(
+        'article_id', Value('save', output_field=CharField()),
+    )
+    reactions = Reaction.objects.filter(user_id=user_id).values_list('article_id', 'reaction_type')
+    ids = {'save': [], 'like': [], 'dislike': []}
+    for article_id, kind in saved.order_by().union(reactions.order_by(), all=True):
+        ids.setdefault(kind, []).append(article_id)
+    return InteractionState(ids['save'], ids['like'], ids['dislike'])
+
+
+def get_state(user_id):
+    """الحالة من cache، أو من قاعدة البيانات وتُخزن."""
+    if not shared_cache():
+        # عملية أخرى قد تكون نفذت التبديل فلا تعلم نسختنا المحلية به
+        return load_state(user_id)
+    key = _state_key(user_id, get_generation(_generation_name(user_id)))
+    data = cache.get(key)
+    if data is not None:
+        return InteractionState.loads(data)
+    state = load_state(user_id)
+    cache.add(key, state.dumps(), _state_timeout())
+    return state
+
+
+def interaction_state(request):
+    """حالة مستخدم الطلب (فارغة للزوار)، مرة واحدة لكل طلب."""
+    state = getattr(request, '_interaction_state', None)
+    if state is None:
+        user = request.user
+        state = get_state(user.pk) if user.is_authenticated else InteractionState()
+        request._interaction_state = state
+    return state
+
+
+def _update_cached_state(user_id, method, *args):
+    """ينشئ نسخة الجيل الجديد من نسخة الجيل السابق إن وُجدت."""
+    if not shared_cache():
+        return
+    generation = bump_generation(_generation_name(user_id))
+    data = cache.get(_state_key(user_id, generation - 1))
+    if data is None:
+        return
+    state = InteractionState.loads(data)
+    method(state, *args)
+    cache.add(_state_key(user_id, generation), state.dumps(), _state_timeout())
+
+
+def _on_commit_update(user_id, method, *args):
+    transaction.on_commit(partial(_update_cached_state, user_id, method, *args))
@@ -0,0 +1,124 @@
+"""
+فهرس معكوس داخل الذاكرة مع ترتيب BM25.
+
+قوائم النشر (posting lists) مخزنة في مصفوفات ``array`` مرتبة حسب رقم المقال:
+مصفوفة لأرقام المقالات وأخرى موازية لتكرار الكلمة، وهذا أصغر بكثير من
+قوائم بايثون العادية. الإضافة في آخر القائمة (المقالات الجديدة) تكلفتها ثابتة.
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from .arabic import tokenize
+
+
+class PostingList:
+    __slots__ = ('doc_ids', 'freqs')
+
+    def __init__(self):
+        self.doc_ids = array('q')
+        self.freqs = array('I')
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add(self, doc_id, freq):
+        doc_ids = self.doc_ids
+        if not doc_ids or doc_ids[-1] < doc_id:
+            doc_ids.append(doc_id)
+            self.freqs.append(freq)
+            return
+        i = bisect_left(doc_ids, doc_id)
+        if i < len(doc_ids) and doc_ids[i] == doc_id:
+            self.freqs[i] = freq
+        else:
+            doc_ids.insert(i, doc_id)
+            self.freqs.insert(i, freq)
+
+    def remove(self, doc_id):
+        i = bisect_left(self.doc_ids, doc_id)
+        if i < len(self.doc_ids) and self.doc_ids[i] == doc_id:
+            del self.doc_ids[i]
+            del self.freqs[i]
+
+
+class InvertedIndex:
+    """فهرس معكوس آمن للاستخدام بين الخيوط."""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        # طول كل مستند وكلماته (لازمة للحذف والتحديث)
+        self._doc_lengths = {}
+        self._doc_terms = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id, tokens):
+        """يضيف مستنداً أو يستبدله إن كان موجوداً."""
+        counts = Counter(tokens)
+        with self._lock:
+            self._remove(doc_id)
+            for term, freq in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = PostingList()
+                posting.add(doc_id, freq)
+            length = sum(counts.values())
+            self._doc_lengths[doc_id] = length
+            self._doc_terms[doc_id] = tuple(counts)
+            self._total_length += length
+
+    def add_text(self, doc_id, *texts):
+        tokens = []
+        for text in texts:
+            tokens.extend(tokenize(text))
+        self.add(doc_id, tokens)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            posting.remove(doc_id)
+            if not len(posting):
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def search(self, query, limit=None):
+        """يعيد قائمة (رقم المستند، الدرجة) مرتبة تنازلياً حسب BM25."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs or 1
+            scores = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                lengths = self._doc_lengths
+                for doc_id, freq in zip(posting.doc_ids, posting.freqs):
+                    norm = self.k1 * (1 - self.b + self.b * lengths[doc_id] / avg_length)
+                    score = idf * freq * (self.k1 + 1) / (freq + norm)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        # عند تساوي الدرجة يظهر الأحدث (رقم أكبر) أولاً
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit else ranked
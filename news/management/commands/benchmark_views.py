@@ -0,0 +1,133 @@
+import asyncio
+import importlib
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches
+
+
+def use_async_views(enabled):
+    """يعيد تحميل الروابط لتستخدم news.async_views أو news.views."""
+    clear_url_caches()
+    with override_settings(NEWS_ASYNC_VIEWS=enabled):
+        importlib.reload(importlib.import_module('news.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        'مقارنة زمن استجابة صفحات القراءة بين WSGI (news.views) و ASGI '
+        '(news.async_views) داخل العملية نفسها على قاعدة البيانات الحالية'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='رابط للاختبار (يمكن تكراره)، الافتراضي الصفحة الرئيسية والبحث',
+        )
+        parser.add_argument('--requests', type=int, default=200, help='عدد الطلبات لكل وضع')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument(
+            '--username',
+            help='تسجيل الدخول بهذا المستخدم (لصفحة المقال، ولتجاوز تخزين صفحات الزوار)',
+        )
+        parser.add_argument('--mode', choices=['both', 'wsgi', 'asgi'], default='both')
+
+    def handle(self, *args, **options):
+        self.paths = options['paths'] or ['/', '/search/?q=خبر']
+        self.total = max(1, options['requests'])
+        self.concurrency = max(1, options['concurrency'])
+        self.user = None
+        if options['username']:
+            self.user = User.objects.filter(username=options['username']).first()
+            if self.user is None:
+                raise CommandError(f"المستخدم غير موجود: {options['username']}")
+        hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+        self.host = hosts[0] if hosts else 'localhost'
+
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+        try:
+            for mode in modes:
+                use_async_views(mode == 'asgi')
+                cache.clear()
+                run = self._wsgi if mode == 'wsgi' else self._asgi_run
+                run(len(self.paths))  # تسخين: ملء التخزين المؤقت وفهرس البحث
+                started = time.perf_counter()
+                latencies, errors = run(self.total)
+                results[mode] = (latencies, errors, time.perf_counter() - started)
+        finally:
+            use_async_views(getattr(settings, 'NEWS_ASYNC_VIEWS', False))
+
+        self.stdout.write(f'{self.total} طلب لكل وضع، {self.concurrency} متزامنة، الروابط: {" ".join(self.paths)}')
+        for mode, (latencies, errors, elapsed) in results.items():
+            ms = [value * 1000 for value in latencies]
+            self.stdout.write(
+                f'{mode}: p50 {percentile(ms, 50):.1f}ms  p99 {percentile(ms, 99):.1f}ms  '
+                f'متوسط {statistics.mean(ms):.1f}ms  {len(ms) / elapsed:.0f} طلب/ثانية  أخطاء {errors}'
+            )
+
+    def _path(self, i):
+        return self.paths[i % len(self.paths)]
+
+    def _wsgi(self, total):
+        local = threading.local()
+        errors = []
+
+        def one(i):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=self.host)
+                if self.user is not None:
+                    local.client.force_login(self.user)
+                    close_old_connections()
+            start = time.perf_counter()
+            response = local.client.get(self._path(i))
+            elapsed = time.perf_counter() - start
+            # عميل الاختبار يعطل إغلاق الاتصال في نهاية الطلب (request_finished)
+            close_old_connections()
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            latencies = list(pool.map(one, range(total)))
+        return latencies, len(errors)
+
+    def _asgi_run(self, total):
+        return asyncio.run(self._asgi(total))
+
+    async def _asgi(self, total):
+        client = AsyncClient(HTTP_HOST=self.host)
+        if self.user is not None:
+            await sync_to_async(client.force_login)(self.user)
+            await sync_to_async(close_old_connections)()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors = []
+
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(self._path(i))
+                elapsed = time.perf_counter() - start
+                await sync_to_async(close_old_connections)()
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            return elapsed
+
+        latencies = await asyncio.gather(*(one(i) for i in range(total)))
+        return latencies, len(errors)
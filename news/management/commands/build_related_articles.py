@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.related import rebuild, refresh, refresh_pending
+
+
+class Command(BaseCommand):
+    help = 'بناء جدول المقالات ذات الصلة من تشابه المحتوى (TF-IDF)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=256)
+        parser.add_argument(
+            '--article', type=int, action='append', dest='article_ids',
+            help='تحديث مقال محدد والمقالات المتأثرة به فقط (يمكن تكراره)',
+        )
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='تحديث المقالات التي تغيرت ولم تُحدَّث بعد (PendingRelatedRefresh)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['article_ids']:
+            refresh(options['article_ids'])
+            count = len(options['article_ids'])
+        elif options['pending']:
+            count = refresh_pending()
+        else:
+            count = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'تم تحديث المقالات ذات الصلة لـ {count} مقال في {time.monotonic() - started:.1f} ثانية'
+        ))
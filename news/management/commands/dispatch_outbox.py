@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.outbox import dispatch
+
+
+class Command(BaseCommand):
+    help = 'إرسال الرسائل المستحقة في صندوق البريد الصادر على دفعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='الاستمرار في العمل وفحص الصندوق كل --interval ثانية',
+        )
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            stats = dispatch(batch_size=options['batch_size'])
+            if stats or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"أُرسلت {stats['sent']} رسالة، وأُجلت {stats['retried']}، "
+                    f"وفشلت نهائياً {stats['dead']}"
+                ))
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,60 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.exporter import export_chunks, export_queryset
+from news.forms import ArticleExportForm
+
+
+class Command(BaseCommand):
+    help = 'تصدير المقالات إلى CSV أو NDJSON صفاً صفاً (مع ضغط gzip اختياري)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='مسار الملف الناتج (- للإخراج القياسي)',
+        )
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--status', help='DF أو PB أو AR')
+        parser.add_argument('--category', help='slug التصنيف')
+        parser.add_argument('--since', help='من تاريخ نشر (YYYY-MM-DD)')
+        parser.add_argument('--until', help='إلى تاريخ نشر شاملاً (YYYY-MM-DD)')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--without-content', action='store_true', help='بدون نص المقال')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # نفس التحقق المستخدم في view التصدير
+        form = ArticleExportForm({
+            name: options[name]
+            for name in ('format', 'status', 'category', 'since', 'until', 'gzip', 'without_content')
+            if options[name] not in (None, False)
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        chunks = export_chunks(
+            export_queryset(**form.filters()), form.cleaned_data['format'] or 'csv',
+            gzip=options['gzip'], content=not options['without_content'],
+            chunk_size=options['chunk_size'],
+        )
+        to_stdout = options['output'] == '-'
+        started = time.monotonic()
+        written = 0
+        fp = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                fp.write(chunk)
+                written += len(chunk)
+        finally:
+            if to_stdout:
+                fp.flush()
+            else:
+                fp.close()
+
+        if not to_stdout:
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"تم تصدير {written / (1024 * 1024):.1f} MB إلى {options['output']} في {elapsed:.1f} ثانية"
+            ))
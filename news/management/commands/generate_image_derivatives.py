@@ -0,0 +1,173 @@
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from news.images import (
+    IMAGE_ERRORS, image_quality, image_widths, is_outdated, is_up_to_date,
+    modified_time, render_task, store_derivatives, touch_derivatives,
+)
+from news.models import Article
+
+
+class Command(BaseCommand):
+    help = 'إنشاء نسخ WebP المصغرة لصور المقالات الموجودة بالتوازي على عدة عمليات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='عدد العمليات (1 للتنفيذ داخل العملية الحالية)',
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--checkpoint',
+            help='ملف لحفظ آخر مقال اكتمل، يُستأنف منه عند إعادة التشغيل ويُحذف عند الانتهاء',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='إعادة إنشاء النسخ حتى لو كانت محدثة',
+        )
+
+    def handle(self, *args, **options):
+        self.force = options['force']
+        self.checkpoint = options['checkpoint']
+        self.widths = image_widths()
+        self.quality = image_quality()
+        self.stats = Counter()
+        # المقالات المرسلة بالترتيب، ونقطة الاستئناف هي آخر مقال اكتمل كل ما قبله
+        self.order = deque()
+        self.finished = set()
+        self.pending = {}
+        self.last_pk = self._load_checkpoint()
+
+        queryset = Article.objects.exclude(image='').exclude(image__isnull=True).only(
+            'pk', 'image', 'image_derivatives',
+        ).order_by('pk')
+        if self.last_pk is not None:
+            queryset = queryset.filter(pk__gt=self.last_pk)
+
+        workers = max(1, options['workers'])
+        # عدد محدود من المهام المعلقة حتى تبقى الذاكرة ثابتة مهما كان عدد الصور
+        window = workers * 4
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        futures = set()
+        started = time.monotonic()
+        completed = False
+        try:
+            for article in queryset.iterator(chunk_size=options['batch_size']):
+                task = self._task(article)
+                if task is None:
+                    continue
+                if executor is None:
+                    self._finish(render_task(task))
+                    continue
+                futures.add(executor.submit(render_task, task))
+                if len(futures) >= window:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(future.result())
+            for future in futures:
+                self._finish(future.result())
+            completed = True
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=not completed)
+            self._save_checkpoint(completed)
+
+        self._report(time.monotonic() - started)
+
+    def _task(self, article):
+        storage = article.image.storage
+        name = article.image.name
+        mtime = modified_time(storage, name)
+        self.order.append(article.pk)
+        if not self.force and is_up_to_date(article, mtime):
+            self.stats['skipped'] += 1
+            self._mark_finished(article.pk)
+            return None
+        try:
+            source = storage.path(name)
+        except NotImplementedError:
+            # تخزين بعيد: نرسل محتوى الملف نفسه إلى العملية
+            try:
+                with storage.open(name, 'rb') as fp:
+                    source = fp.read()
+            except IMAGE_ERRORS as exc:
+                self._failed(article, exc)
+                return None
+        known_hash = None
+        if not self.force and not is_outdated(article):
+            known_hash = article.image_derivatives.get('hash')
+        self.pending[article.pk] = (article, mtime)
+        return article.pk, source, known_hash, self.widths, self.quality
+
+    def _finish(self, result):
+        pk, digest, size, rendered, error = result
+        article, mtime = self.pending.pop(pk)
+        if error is not None:
+            self._failed(article, error)
+            return
+        if rendered is None:
+            touch_derivatives(article, mtime)
+            self.stats['unchanged'] += 1
+        else:
+            store_derivatives(article, rendered, hash=digest, mtime=mtime)
+            output = sum(len(data) for _width, data in rendered)
+            self.stats['generated'] += 1
+            self.stats['bytes_in'] += size
+            self.stats['bytes_out'] += output
+            # أكبر نسخة هي التي تحل محل الأصل في الصفحات
+            self.stats['bytes_saved'] += max(0, size - len(rendered[-1][1]))
+        self._mark_finished(pk)
+
+    def _failed(self, article, error):
+        self.stats['failed'] += 1
+        self.stderr.write(f'{article.pk}: {article.image.name}: {error}')
+        self._mark_finished(article.pk)
+
+    def _mark_finished(self, pk):
+        self.finished.add(pk)
+        while self.order and self.order[0] in self.finished:
+            self.last_pk = self.order.popleft()
+            self.finished.discard(self.last_pk)
+        self.stats['processed'] += 1
+        if self.stats['processed'] % 100 == 0:
+            self._save_checkpoint(False)
+
+    def _load_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint) as fp:
+            last_pk = json.load(fp).get('last_pk')
+        self.stdout.write(f'استئناف بعد المقال رقم {last_pk}')
+        return last_pk
+
+    def _save_checkpoint(self, completed):
+        if not self.checkpoint:
+            return
+        if completed:
+            if os.path.exists(self.checkpoint):
+                os.remove(self.checkpoint)
+            return
+        if self.last_pk is not None:
+            with open(self.checkpoint, 'w') as fp:
+                json.dump({'last_pk': self.last_pk}, fp)
+
+    def _report(self, elapsed):
+        stats = self.stats
+        rate = stats['generated'] / elapsed if elapsed else 0
+
+        def mb(value):
+            return f'{value / (1024 * 1024):.1f} MB'
+
+        self.stdout.write(self.style.SUCCESS(
+            f"تم إنشاء نسخ {stats['generated']} صورة، وتحديث {stats['unchanged']} لم يتغير محتواها، "
+            f"وتخطي {stats['skipped']} محدثة، وفشل {stats['failed']}"
+        ))
+        self.stdout.write(
+            f'{rate:.1f} صورة/ثانية، حجم الأصول {mb(stats["bytes_in"])}، '
+            f'نسخ WebP {mb(stats["bytes_out"])}، التوفير {mb(stats["bytes_saved"])}'
+        )
@@ -0,0 +1,70 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.importer import ArticleImporter, iter_records
+
+
+class Command(BaseCommand):
+    help = 'استيراد المقالات من ملف NDJSON أو مصفوفة JSON على دفعات دون تحميل الملف كاملاً'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='مسار الملف (- للقراءة من الإدخال القياسي)')
+        parser.add_argument('--format', choices=['auto', 'json', 'ndjson'], default='auto')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--default-author',
+            help='اسم المستخدم للمقالات التي ليس لها كاتب معروف',
+        )
+        parser.add_argument(
+            '--create-categories', action='store_true',
+            help='إنشاء التصنيفات غير الموجودة بدلاً من تخطي مقالاتها',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            importer = ArticleImporter(
+                batch_size=max(1, options['batch_size']),
+                default_author=options['default_author'],
+                create_categories=options['create_categories'],
+                progress=self._progress,
+                on_error=self._error,
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        path = options['path']
+        try:
+            fp = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(exc)
+        self.errors = 0
+        try:
+            stats = importer.run(iter_records(fp, options['format']))
+        except ValueError as exc:
+            # خطأ في صيغة الملف: الدفعات السابقة محفوظة
+            raise CommandError(f'توقف الاستيراد بعد {importer.stats["imported"]} مقال: {exc}')
+        finally:
+            # أي توقف (خطأ أو Ctrl+C) بعد دفعات محفوظة: الأعداد والصفحات المخزنة تُحدَّث
+            importer.finish()
+            if fp is not sys.stdin:
+                fp.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"تم استيراد {stats['imported']} مقال، وتخطي {stats['skipped']}، "
+            f"وإنشاء {stats['categories']} تصنيف"
+        ))
+        self.stdout.write(
+            'لتحديث البحث والمقالات ذات الصلة: update_search_vectors --missing-only '
+            'و build_related_articles'
+        )
+
+    def _progress(self, stats, elapsed):
+        rate = stats['imported'] / elapsed if elapsed else 0
+        self.stdout.write(f"{stats['read']} سجل، {stats['imported']} مقال ({rate:.0f} مقال/ثانية)")
+
+    def _error(self, number, error):
+        # أول الأخطاء فقط حتى لا يغرق الإخراج في ملف كبير
+        self.errors += 1
+        if self.errors <= 20:
+            self.stderr.write(f'السجل {number}: {error}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from news.trending import prune
+
+
+class Command(BaseCommand):
+    help = 'حذف فترات المقالات الرائجة الأقدم من NEWS_TRENDING_WINDOW'
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(self.style.SUCCESS(f'تم حذف {deleted} فترة قديمة'))
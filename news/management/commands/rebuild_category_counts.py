@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from news.counters import rebuild_category_counts
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب عدد المقالات المنشورة في كل تصنيف'
+
+    def handle(self, *args, **options):
+        updated = rebuild_category_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تحديث عدادات {updated} تصنيف')
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from news.counters import rebuild_reaction_counts
+from news.models import Article
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب عدادات الإعجاب وعدم الإعجاب من جدول التفاعلات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--article', type=int, action='append', dest='article_ids',
+            help='رقم مقال محدد (يمكن تكراره)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.all()
+        if options['article_ids']:
+            queryset = queryset.filter(pk__in=options['article_ids'])
+
+        updated = rebuild_reaction_counts(queryset)
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تحديث عدادات {updated} مقال')
+        )
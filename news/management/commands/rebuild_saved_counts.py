@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.counters import rebuild_saved_counts
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب عدد المقالات المحفوظة لكل مستخدم من جدول المحفوظات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='رقم مستخدم محدد (يمكن تكراره)',
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_saved_counts(options['user_ids'])
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تحديث عدادات {updated} مستخدم')
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news import widgets
+from news.cache import PUBLISH_GENERATION, bump_generation
+from news.models import Article, make_excerpt
+
+
+class Command(BaseCommand):
+    help = 'حساب ملخص المقالات (excerpt) الموجودة من محتواها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='تحديث المقالات التي ليس لها ملخص فقط',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Article.objects.only('pk', 'content', 'excerpt').order_by('pk')
+        if options['missing_only']:
+            queryset = queryset.filter(excerpt='')
+
+        updated = 0
+        batch = []
+        for article in queryset.iterator(chunk_size=batch_size):
+            excerpt = make_excerpt(article.content)
+            if excerpt == article.excerpt:
+                continue
+            article.excerpt = excerpt
+            batch.append(article)
+            if len(batch) >= batch_size:
+                updated += self._write(batch)
+                batch = []
+        if batch:
+            updated += self._write(batch)
+
+        if updated:
+            # bulk_update لا يطلق الإشارات، والبطاقات المخزنة تعرض الملخص القديم
+            widgets.invalidate(*widgets.ARTICLE_WIDGETS)
+            bump_generation(PUBLISH_GENERATION)
+        self.stdout.write(self.style.SUCCESS(f'تم تحديث ملخص {updated} مقال'))
+
+    def _write(self, batch):
+        with transaction.atomic():
+            Article.objects.bulk_update(batch, ['excerpt'])
+        return len(batch)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.models import Article
+from news.search import build_search_vector, full_text_enabled
+
+
+class Command(BaseCommand):
+    help = 'تعبئة متجه البحث النصي لكل المقالات (PostgreSQL فقط)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='تحديث المقالات التي ليس لها متجه بحث فقط',
+        )
+
+    def handle(self, *args, **options):
+        if not full_text_enabled():
+            raise CommandError('البحث النصي يتطلب قاعدة بيانات PostgreSQL')
+
+        batch_size = options['batch_size']
+        queryset = Article.objects.select_related('author').only(
+            'pk', 'title', 'content',
+            'author__username', 'author__first_name', 'author__last_name',
+        ).order_by('pk')
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        done = 0
+        batch = []
+        for article in queryset.iterator(chunk_size=batch_size):
+            batch.append(article)
+            if len(batch) >= batch_size:
+                done += self._write(batch)
+                batch = []
+        if batch:
+            done += self._write(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'تم تحديث متجه البحث لـ {done} مقال'))
+
+    def _write(self, batch):
+        with transaction.atomic():
+            for article in batch:
+                Article.objects.filter(pk=article.pk).update(
+                    search_vector=build_search_vector(article)
+                )
+        return len(batch)
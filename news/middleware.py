@@ -0,0 +1,90 @@
+"""
+مراقبة عدد استعلامات قاعدة البيانات لكل طلب.
+
+``QueryBudgetMiddleware`` اختياري (يُضاف إلى MIDDLEWARE في بيئة staging):
+يعد الاستعلامات المنفذة أثناء الطلب ويقارنها بالحد المسموح لاسم المسار،
+ثم يسجل تحذيراً أو يرفع ``QueryBudgetExceeded`` حسب NEWS_QUERY_BUDGET_RAISE.
+
+الحدود تُطبق على مسار WSGI فقط. execute_wrapper يُركَّب على اتصالات خيط الطلب،
+والنسخ الـ async (news.async_views) تنفذ استعلاماتها في خيوط أخرى (run_query)
+فلا تُعد، ووجود middleware متزامن يجبرها على المرور عبر sync_to_async. لذلك
+لا يُستخدم عند NEWS_ASYNC_VIEWS (osamh_ahmed_al/asgi.py).
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('news.queries')
+
+# الحد الأقصى للاستعلامات لكل مسار مع تخزين مؤقت فارغ (النسخ المتزامنة، WSGI)
+# (يشمل استعلامَي الجلسة والمستخدم، وتقدير EXPLAIN على PostgreSQL)
+QUERY_BUDGETS = {
+    # حالة تفاعل المستخدم (news.interactions): استعلام واحد إن لم تكن في cache
+    'news:article_list': 10,
+    'news:home': 2,
+    'news:article_detail': 7,
+    'news:handle_reaction': 10,
+    'news:toggle_interaction': 8,
+    'news:contact': 2,
+    'news:article_search': 6,
+    'news:category_articles': 7,
+    # الحذف وتحديث عداد المحفوظات داخل معاملة واحدة
+    'news:unsave_artcile': 8,
+    'news:saved_articles': 5,
+    'news:about': 2,
+    # الصفوف تُقرأ أثناء إرسال الاستجابة بعد انتهاء الـ middleware
+    'news:export_articles': 3,
+}
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def get_query_budget(view_name):
+    budgets = {**QUERY_BUDGETS, **getattr(settings, 'NEWS_QUERY_BUDGETS', {})}
+    return budgets.get(view_name, getattr(settings, 'NEWS_QUERY_BUDGET_DEFAULT', 20))
+
+
+class QueryCounter:
+    """execute_wrapper يعد الاستعلامات بدون الحاجة إلى DEBUG=True."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        if getattr(settings, 'NEWS_ASYNC_VIEWS', False):
+            raise MiddlewareNotUsed('حدود الاستعلامات لا تُطبق على النسخ الـ async')
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        wrappers = [connections[alias].execute_wrapper(counter) for alias in connections]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+        budget = get_query_budget(view_name)
+        if counter.count > budget:
+            message = f'{view_name} نفذ {counter.count} استعلاماً والحد {budget}'
+            if getattr(settings, 'NEWS_QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:34
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_reaction_counts(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+    Reaction = apps.get_model('news', 'Reaction')
+
+    def count_of(reaction_type):
+        counts = Reaction.objects.filter(
+            article=OuterRef('pk'), reaction_type=reaction_type
+        ).order_by().values('article').annotate(c=Count('pk')).values('c')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Article.objects.update(
+        like_count=count_of('like'),
+        dislike_count=count_of('dislike'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0017_alter_article_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # فهرس GIN متاح في PostgreSQL فقط؛ نتجاوزه على SQLite (بيئة التطوير والاختبار)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS news_article_search_gin '
+        'ON news_article USING gin (search_vector)'
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS news_article_search_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0018_article_reaction_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:43
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_published_count(apps, schema_editor):
+    Category = apps.get_model('news', 'Category')
+    Article = apps.get_model('news', 'Article')
+    counts = Article.objects.filter(
+        category=OuterRef('pk'), status='PB'
+    ).order_by().values('category').annotate(c=Count('pk')).values('c')
+    Category.objects.update(
+        published_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0019_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد المقالات'),
+        ),
+        migrations.RunPython(populate_published_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0020_category_published_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0021_article_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='الموضوع')),
+                ('body', models.TextField(verbose_name='النص')),
+                ('from_email', models.CharField(max_length=254, verbose_name='المرسل')),
+                ('to', models.JSONField(default=list, verbose_name='المستلمون')),
+                ('status', models.CharField(choices=[('PD', 'في الانتظار'), ('ST', 'أُرسلت'), ('DL', 'فشلت نهائياً')], default='PD', max_length=2, verbose_name='الحالة')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='المحاولة التالية')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخر خطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'رسالة صادرة',
+                'verbose_name_plural': 'البريد الصادر',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='news_outbox_due_idx')],
+            },
+        ),
+    ]
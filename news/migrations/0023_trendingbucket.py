@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0022_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveIntegerField()),
+                ('weight', models.FloatField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_buckets', to='news.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='news_trending_bucket_idx')],
+                'unique_together': {('article', 'bucket')},
+            },
+        ),
+    ]
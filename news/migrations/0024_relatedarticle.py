@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0023_trendingbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='news.article')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='news.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['article', '-score'], name='news_related_article_idx')],
+                'unique_together': {('article', 'related')},
+            },
+        ),
+    ]
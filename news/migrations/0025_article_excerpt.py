@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+from news.models import make_excerpt
+
+
+def populate_excerpts(apps, schema_editor):
+    # نفس عمل الأمر update_excerpts، حتى لا تظهر البطاقات فارغة بعد النشر
+    Article = apps.get_model('news', 'Article')
+    batch = []
+    for article in Article.objects.only('pk', 'content').order_by('pk').iterator(chunk_size=500):
+        article.excerpt = make_excerpt(article.content)
+        batch.append(article)
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        Article.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0024_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(populate_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0025_article_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'PB')), fields=['-publish', '-id'], name='news_article_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'PB')), fields=['category', '-publish', '-id'], name='news_article_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('featured', True), ('status', 'PB')), fields=['-publish'], name='news_article_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('breaking_news', True), ('status', 'PB')), fields=['-publish'], name='news_article_breaking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('status', 'PB')), fields=['-views'], name='news_article_views_idx'),
+        ),
+    ]
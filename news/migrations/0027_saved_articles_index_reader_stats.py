@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_saved_count(apps, schema_editor):
+    ReaderStats = apps.get_model('news', 'ReaderStats')
+    SavedArticle = apps.get_model('news', 'SavedArticle')
+    counts = SavedArticle.objects.order_by().values('user').annotate(c=Count('pk'))
+    ReaderStats.objects.bulk_create(
+        [ReaderStats(user_id=row['user'], saved_count=row['c']) for row in counts.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('news', '0026_article_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReaderStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reader_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('saved_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='عدد المحفوظات')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='savedarticle',
+            index=models.Index(fields=['user', '-saved_at', '-id'], name='news_saved_user_idx'),
+        ),
+        migrations.RunPython(populate_saved_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0027_saved_articles_index_reader_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRelatedRefresh',
+            fields=[
+                ('article_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,8 +1,31 @@
+import html
+import re
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
-from django.utils.text import slugify
+from django.utils.html import strip_tags
+from django.utils.text import Truncator, slugify
+from django.contrib.postgres.search import SearchVectorField
+
+# طول الملخص المخزن في Article.excerpt (البطاقات تقصه أكثر عند العرض)
+EXCERPT_LENGTH = 300
+# أعمدة كبيرة لا تحتاجها بطاقات المقالات في القوائم
+CARD_DEFERRED_FIELDS = ('content', 'search_vector')
+# الأعمدة التي تعرضها بطاقة صفحة المحفوظات فقط (SavedArticle.objects.only)
+SAVED_CARD_FIELDS = (
+    'saved_at', 'user', 'article__title', 'article__slug', 'article__image',
+    'article__excerpt', 'article__publish', 'article__category__name', 'article__category__slug',
+)
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """نص عادي قصير من محتوى المقال (بدون وسوم HTML ولا مسافات متكررة)."""
+    # مسافة بعد كل وسم حتى لا تلتصق كلمات الفقرات المتتالية
+    text = strip_tags((content or '').replace('>', '> '))
+    text = re.sub(r'\s+', ' ', html.unescape(text)).strip()
+    return Truncator(text).chars(length)
 
 
 class Category(models.Model):
@@ -10,6 +33,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True, verbose_name="نشط")
     slug = models.SlugField(max_length=250, unique=True, null=True)
+    # عدد المقالات المنشورة في التصنيف، يُحدّث من news.signals
+    published_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="عدد المقالات")
 
     def __str__(self):
         return self.name
@@ -18,7 +43,13 @@ class Category(models.Model):
         verbose_name = "Category"
         verbose_name_plural = "Categories"
 
-class PublishedManager(models.Manager):
+class ArticleQuerySet(models.QuerySet):
+    def cards(self):
+        """مقالات للعرض في القوائم: بدون النص الكامل، والبطاقة تعرض excerpt."""
+        return self.select_related('category', 'author').defer(*CARD_DEFERRED_FIELDS)
+
+
+class PublishedManager(models.Manager.from_queryset(ArticleQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(status=Article.Status.PUBLISHED)
 
@@ -30,31 +61,74 @@ class Article(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250,unique_for_date='publish',null=True)
     content = models.TextField()
+    # ملخص نصي من المحتوى يُحسب عند الحفظ، تعرضه القوائم بدلاً من المحتوى كاملاً
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     author = models.ForeignKey(User,on_delete=models.CASCADE)
     publish = models.DateTimeField(default=timezone.now, verbose_name="تاريخ النشر")
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(upload_to='articles/%Y/%m/%d/', null=True,)
+    # مسارات نسخ WebP المصغرة من الصورة (news.images)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     breaking_news = models.BooleanField(default=False, verbose_name="خبر عاجل")
 
     featured = models.BooleanField(default=False,blank=True, verbose_name="مميز")
     views=models.PositiveIntegerField(default=0)
+    # عدادات مخزنة تُحدّث مع كل تفاعل بدلاً من COUNT(*) في كل زيارة
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    dislike_count = models.PositiveIntegerField(default=0, editable=False)
+    # متجه البحث النصي (PostgreSQL) يُحدّث من news.search عند الحفظ
+    search_vector = SearchVectorField(null=True, editable=False)
 
 
     status = models.CharField(max_length=2, choices=Status.choices, default=Status.DRAFT, verbose_name="الحالة")
 
-    objects = models.Manager()
+    objects = ArticleQuerySet.as_manager()
     published = PublishedManager()
 
     class Meta:
         verbose_name="مقال"
         verbose_name_plural="المقالات"
         ordering = ['-publish']
+        # فهارس جزئية للمقالات المنشورة فقط ('PB' هي Status.PUBLISHED) بنفس ترتيب
+        # استعلامات القوائم، فتُقرأ الصفحة الأولى من الفهرس مباشرة بدون فرز.
+        # id في النهاية للترقيم بالمؤشر (news.pagination.CursorPaginator)
+        indexes = [
+            models.Index(
+                fields=['-publish', '-id'], name='news_article_published_idx',
+                condition=models.Q(status='PB'),
+            ),
+            models.Index(
+                fields=['category', '-publish', '-id'], name='news_article_category_idx',
+                condition=models.Q(status='PB'),
+            ),
+            models.Index(
+                fields=['-publish'], name='news_article_featured_idx',
+                condition=models.Q(status='PB', featured=True),
+            ),
+            models.Index(
+                fields=['-publish'], name='news_article_breaking_idx',
+                condition=models.Q(status='PB', breaking_news=True),
+            ),
+            models.Index(
+                fields=['-views'], name='news_article_views_idx',
+                condition=models.Q(status='PB'),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # المحتوى المؤجل (defer) لم يتغير فلا داعي لإعادة حساب الملخص
+        if 'content' in self.__dict__ and (update_fields is None or 'content' in update_fields):
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
     def get_absolute_url(self):
         return reverse('news:article_detail', kwargs={'slug': self.slug})
@@ -91,6 +165,10 @@ class SavedArticle(models.Model):
         verbose_name_plural = "المقالات المحفوظة"
         unique_together = ('user', 'article')
         ordering = ['-saved_at']
+        # صفحة المحفوظات: محفوظات المستخدم بترتيب الترقيم بالمؤشر (saved_at, id)
+        indexes = [
+            models.Index(fields=['user', '-saved_at', '-id'], name='news_saved_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} حفظ {self.article.title}"
@@ -98,4 +176,95 @@ class SavedArticle(models.Model):
     def get_absolute_url(self):
         return reverse('news:article_detail', kwargs={'slug': Article.slug})
 
+
+
+class ReaderStats(models.Model):
+    """عدادات مخزنة لكل مستخدم بدلاً من COUNT(*) في كل زيارة (news.counters)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='reader_stats')
+    saved_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="عدد المحفوظات")
+
+    def __str__(self):
+        return f"{self.user.username}: {self.saved_count}"
+
 #=======================================
+
+
+class OutgoingEmail(models.Model):
+    """
+    صندوق البريد الصادر: الرسائل تُحفظ هنا وترسلها news.outbox.dispatch
+    (الأمر dispatch_outbox) على دفعات بدلاً من الإرسال داخل الطلب.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PD', 'في الانتظار'
+        SENT = 'ST', 'أُرسلت'
+        DEAD = 'DL', 'فشلت نهائياً'
+
+    subject = models.CharField(max_length=255, verbose_name="الموضوع")
+    body = models.TextField(verbose_name="النص")
+    from_email = models.CharField(max_length=254, verbose_name="المرسل")
+    to = models.JSONField(default=list, verbose_name="المستلمون")
+    status = models.CharField(max_length=2, choices=Status.choices, default=Status.PENDING, verbose_name="الحالة")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="عدد المحاولات")
+    # موعد المحاولة التالية (التأخير بعد الفشل أو مهلة الدفعة الجاري إرسالها)
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="المحاولة التالية")
+    last_error = models.TextField(blank=True, verbose_name="آخر خطأ")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "رسالة صادرة"
+        verbose_name_plural = "البريد الصادر"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='news_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+
+class TrendingBucket(models.Model):
+    """
+    وزن أحداث مقال (مشاهدات وتفاعلات) خلال فترة زمنية واحدة (news.trending).
+    bucket هو رقم الفترة منذ 1970 (بطول NEWS_TRENDING_BUCKET ثانية).
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='trending_buckets')
+    bucket = models.PositiveIntegerField()
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('article', 'bucket')
+        indexes = [
+            models.Index(fields=['bucket'], name='news_trending_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id}@{self.bucket}: {self.weight}"
+
+
+class RelatedArticle(models.Model):
+    """أقرب المقالات محتوىً لكل مقال منشور (news.related)."""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('article', 'related')
+        indexes = [
+            models.Index(fields=['article', '-score'], name='news_related_article_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class PendingRelatedRefresh(models.Model):
+    """
+    مقالات تغيرت ولم تُحدَّث قوائمها ذات الصلة بعد (لا يوجد فهرس حالي في
+    العملية التي حفظتها). يعالجها: build_related_articles --pending
+    """
+    article_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.article_id} ({self.queued_at:%Y-%m-%d %H:%M})"
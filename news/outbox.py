@@ -0,0 +1,127 @@
+"""
+إرسال البريد عبر صندوق صادر (OutgoingEmail).
+
+الطلب يحفظ الرسالة فقط (``enqueue``) ويعود فوراً، والأمر ``dispatch_outbox``
+يستدعي ``dispatch`` التي:
+
+1. تحجز دفعة من الرسائل المستحقة داخل معاملة (مع SKIP LOCKED على PostgreSQL
+   حتى يعمل أكثر من عامل معاً) وتؤجل موعدها بمهلة NEWS_OUTBOX_LEASE حتى
+   لا يأخذها عامل آخر أثناء الإرسال.
+2. ترسلها عبر اتصال واحد من ``get_connection()`` يُعاد استخدامه للدفعة كلها.
+3. عند الفشل تزيد عدد المحاولات وتؤجل الرسالة بتأخير يتضاعف
+   (NEWS_OUTBOX_RETRY_DELAY * 2^n بحد أقصى NEWS_OUTBOX_MAX_DELAY)، وبعد
+   NEWS_OUTBOX_MAX_ATTEMPTS محاولة تصبح الرسالة "فاشلة نهائياً" (DEAD) ولا
+   يعاد إرسالها إلا يدوياً من لوحة الإدارة.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(subject, body, from_email=None, to=None):
+    """يحفظ رسالة في الصندوق الصادر ويعيدها."""
+    return OutgoingEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to or [settings.DEFAULT_FROM_EMAIL]),
+    )
+
+
+def retry_delay(attempts):
+    """التأخير قبل المحاولة التالية بعد attempts محاولة فاشلة."""
+    base = _setting('NEWS_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), _setting('NEWS_OUTBOX_MAX_DELAY', 3600)))
+
+
+def claim(batch_size):
+    """يحجز دفعة من الرسائل المستحقة ويعيدها."""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.Status.PENDING, next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        batch = list(queryset[:batch_size])
+        if batch:
+            OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=_setting('NEWS_OUTBOX_LEASE', 300)),
+            )
+    return batch
+
+
+def _failed(email, error, stats):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= _setting('NEWS_OUTBOX_MAX_ATTEMPTS', 5):
+        email.status = OutgoingEmail.Status.DEAD
+        stats['dead'] += 1
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        stats['retried'] += 1
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_batch(batch, stats):
+    """يرسل الدفعة عبر اتصال واحد بخادم البريد."""
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        mail_connection.open()
+    except Exception as exc:
+        for email in batch:
+            _failed(email, exc, stats)
+        return
+
+    sent = []
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.to,
+                connection=mail_connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                _failed(email, exc, stats)
+                # الخادم ربما أغلق الاتصال، والرسالة التالية تفتح اتصالاً جديداً
+                mail_connection.close()
+            else:
+                sent.append(email.pk)
+    finally:
+        mail_connection.close()
+
+    if sent:
+        OutgoingEmail.objects.filter(pk__in=sent).update(
+            status=OutgoingEmail.Status.SENT, sent_at=timezone.now(),
+            attempts=F('attempts') + 1, last_error='',
+        )
+        stats['sent'] += len(sent)
+
+
+def dispatch(batch_size=None, max_batches=None):
+    """
+    يرسل الرسائل المستحقة دفعة بعد دفعة حتى يفرغ الصندوق (أو بعد max_batches)
+    ويعيد Counter بعدد الرسائل المرسلة (sent) والمؤجلة (retried) والفاشلة (dead).
+    """
+    batch_size = batch_size or _setting('NEWS_OUTBOX_BATCH_SIZE', 50)
+    stats = Counter()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = claim(batch_size)
+        if not batch:
+            break
+        send_batch(batch, stats)
+        batches += 1
+    return stats
@@ -0,0 +1,283 @@
+"""
+ترقيم الصفحات.
+
+``CursorPaginator`` ترقيم بالمؤشر (keyset): بدلاً من ``OFFSET n`` و ``COUNT(*)``
+نتذكر مفتاح ترتيب آخر عنصر في الصفحة (مثل ``(publish, id)``) ونطلب ما بعده،
+فتبقى تكلفة الصفحة ثابتة مهما كان عمقها. المؤشر يمرر في الرابط كـ ``?cursor=``
+بصيغة base64 غير مقروءة.
+
+``CachedCountPaginator`` ترقيم بأرقام الصفحات لكن بدون ``COUNT(*)`` في كل
+طلب: العدد يُخزن مؤقتاً مرتبطاً بجيل المقالات، وللمجموعات الكبيرة غير المفلترة
+يُستخدم تقدير مخطط الاستعلامات في PostgreSQL بدلاً من العد الفعلي.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import generation_timeout, versioned_key
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value and isinstance(value['dt'], str):
+            return parse_datetime(value['dt'])
+        if 'd' in value and isinstance(value['d'], str):
+            return parse_date(value['d'])
+        return None
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps([direction, [_encode_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    try:
+        return direction, [_decode_value(v) for v in values]
+    except ValueError:
+        # تاريخ بصيغة صحيحة لكن قيمة غير موجودة (مثل الشهر 13)
+        raise InvalidCursor(cursor)
+
+
+class CursorPage:
+    """صفحة واحدة من CursorPaginator بواجهة قريبة من Page في Django."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    ترقيم بالمؤشر على QuerySet مرتب. الترتيب يؤخذ من ``ordering`` أو من
+    ``order_by`` الخاص بالـ QuerySet، ويضاف ``pk`` في النهاية إن لم يكن موجوداً
+    حتى يكون المفتاح فريداً. كل الحقول يجب أن تكون أسماء بسيطة (حقول أو annotations).
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = list(ordering)
+        for field in ordering:
+            if not isinstance(field, str) or '__' in field:
+                raise ValueError(f'ترتيب غير مدعوم في CursorPaginator: {field!r}')
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and 'id' not in names:
+            ordering.append('-pk' if ordering and ordering[0].startswith('-') else 'pk')
+        self.ordering = ordering
+
+    def _fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name, _desc in self._fields()]
+
+    def _seek(self, values, forward):
+        """
+        شرط "بعد المفتاح" بالترتيب المعجمي:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _reverse(self, field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def _output_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _clean(self, values):
+        """
+        قيم المؤشر تأتي من الرابط: نحولها لنوع كل حقل قبل filter() حتى لا
+        يصل مؤشر معدّل إلى قاعدة البيانات (خطأ 500) بل يعود للصفحة الأولى.
+        """
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(values)
+        cleaned = []
+        for (name, _desc), value in zip(self._fields(), values):
+            if value is None or isinstance(value, (list, dict)):
+                raise InvalidCursor(values)
+            try:
+                value = self._output_field(name).to_python(value)
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(values)
+            if value is None:
+                raise InvalidCursor(values)
+            cleaned.append(value)
+        return cleaned
+
+    def page(self, cursor=None):
+        direction, values = 'n', None
+        if cursor:
+            try:
+                direction, values = decode_cursor(cursor)
+                values = self._clean(values)
+            except InvalidCursor:
+                direction, values = 'n', None
+
+        forward = direction == 'n'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[self._reverse(f) for f in self.ordering])
+
+        # نجلب عنصراً زائداً لنعرف هل توجد صفحة أخرى في نفس الاتجاه
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = encode_cursor(self._key(rows[-1]), 'n')
+            if values is not None and (forward or has_more):
+                previous_cursor = encode_cursor(self._key(rows[0]), 'p')
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def estimate_count(queryset):
+    """
+    تقدير عدد الصفوف من مخطط PostgreSQL (EXPLAIN) بدون تنفيذ الاستعلام.
+    يعيد None على قواعد البيانات الأخرى.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset, key, estimate=False):
+    """
+    عدد عناصر queryset مخزن مؤقتاً تحت ``key``. عند ``estimate=True`` وكون
+    التقدير أكبر من NEWS_EXACT_COUNT_LIMIT نستخدم التقدير بدلاً من COUNT(*).
+    """
+    cache_key = versioned_key('articles', 'count', key)
+    value = cache.get(cache_key)
+    if value is not None:
+        return value
+
+    value = estimate_count(queryset) if estimate else None
+    if value is None or value < getattr(settings, 'NEWS_EXACT_COUNT_LIMIT', 10000):
+        value = queryset.count()
+    cache.set(cache_key, value, generation_timeout(getattr(settings, 'NEWS_COUNT_CACHE_TIMEOUT', 300)))
+    return value
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator يأخذ العدد من cached_count بدلاً من COUNT(*) في كل طلب."""
+
+    def __init__(self, object_list, per_page, count_key=None, estimate=False, known_count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.estimate = estimate
+        self.known_count = known_count
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.count_key is None:
+            return super().count
+        return cached_count(self.object_list, self.count_key, estimate=self.estimate)
+
+
+def use_cursor_pagination(request):
+    """الترقيم بالمؤشر مفعّل من الإعدادات أو عند وجود ?cursor= في الرابط."""
+    return bool(getattr(settings, 'NEWS_CURSOR_PAGINATION', False) or request.GET.get('cursor'))
+
+
+def paginate(request, queryset, per_page, count_key=None, estimate=False, known_count=None, cursor=False):
+    """
+    يعيد صفحة من queryset حسب نوع الترقيم المطلوب. الخاصية ``base_query``
+    تحتوي باقي معاملات الرابط (مثل q) لتستخدمها القوالب في روابط الصفحات.
+    ``count_key`` و ``estimate`` و ``known_count`` (عدد معروف مسبقاً مثل
+    Category.published_count) تمرر إلى CachedCountPaginator.
+    ``cursor=True`` يفرض الترقيم بالمؤشر (للصفحات التي لا تعرض أرقام صفحات).
+    """
+    if cursor or use_cursor_pagination(request):
+        page_obj = CursorPaginator(queryset, per_page).page(request.GET.get('cursor'))
+    else:
+        paginator = CachedCountPaginator(
+            queryset, per_page, count_key=count_key, estimate=estimate, known_count=known_count,
+        )
+        page_obj = paginator.get_page(request.GET.get('page'))
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    page_obj.base_query = params.urlencode() + '&' if params else ''
+    return page_obj
@@ -0,0 +1,366 @@
+"""
+المقالات ذات الصلة حسب تشابه المحتوى.
+
+كل مقال منشور يُمثَّل بمتجه TF-IDF (تكرار لوغاريتمي × ندرة الكلمة، مطبَّع
+بالطول) لكلمات عنوانه (بوزن مضاعف) ونصه بعد تطبيعها بـ normalize_arabic.
+التشابه هو جيب التمام (حاصل ضرب المتجهين). أقرب NEWS_RELATED_COUNT مقالات
+لكل مقال تُخزن في جدول ``RelatedArticle``، فصفحة المقال تقرؤها باستعلام
+واحد على الفهرس (article, -score).
+
+``SimilarityIndex`` يحفظ المتجهات في الذاكرة ويجمعها في مصفوفات NumPy مرتبة
+حسب الكلمة (مثل قوائم النشر في الفهرس المعكوس)، ويحسب التشابه لدفعة من
+المقالات مع كل المقالات مرة واحدة.
+
+* ``rebuild``: بناء كامل (الأمر build_related_articles).
+* ``refresh``: يُعاد حساب متجهات مقالات محددة وجيرانها، وجيران المقالات
+  التي قد تدخل قوائمها أو كانت فيها. المفردات وقيم الندرة تبقى كما حُسبت في
+  آخر بناء كامل.
+* ``article_changed``: بعد حفظ مقال (news.signals، بعد نجاح المعاملة). لا
+  يبني فهرساً في عملية الويب: إن كان في العملية فهرس حالي يُحدَّث مباشرة،
+  وإلا يُسجَّل المقال في ``PendingRelatedRefresh`` ويعالجه الأمر
+  ``build_related_articles --pending``.
+
+كل فهرس يحمل رقم جيل RELATED_GENERATION (news.cache) وقت بنائه، وكل كتابة
+لجدول RelatedArticle تزيد الرقم. فهرس عملية أخرى كتبت بعده قديم (لا يعرف
+تعديلاتها)، فلا يُكتب منه شيء.
+"""
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .arabic import normalize_arabic, tokenize
+from .cache import bump_generation, get_generation, shared_cache
+
+# جيل يُزاد مع كل كتابة لجدول RelatedArticle
+RELATED_GENERATION = 'related'
+
+# الحقول التي يتغير المتجه بتغيرها
+RELATED_FIELDS = {'title', 'content', 'status'}
+
+STOPWORDS = frozenset(normalize_arabic(word) for word in (
+    'في', 'من', 'على', 'إلى', 'عن', 'مع', 'أن', 'إن', 'أو', 'ثم', 'قد', 'لا', 'ما',
+    'لم', 'لن', 'هذا', 'هذه', 'ذلك', 'تلك', 'التي', 'الذي', 'الذين', 'كان', 'كانت',
+    'هو', 'هي', 'هم', 'كما', 'بعد', 'قبل', 'عند', 'حتى', 'بين', 'كل', 'أي', 'غير',
+    'وقد', 'وفي', 'ومن', 'إلا', 'لكن', 'حيث', 'خلال', 'أيضا', 'منذ', 'عليه', 'فيه',
+))
+
+
+def related_count():
+    return getattr(settings, 'NEWS_RELATED_COUNT', 5)
+
+
+def document_terms(title, content):
+    """تكرار كلمات المقال بعد التطبيع وحذف الكلمات الشائعة."""
+    tokens = tokenize(title) * 2 + tokenize(strip_tags(content or ''))
+    return Counter(
+        token for token in tokens
+        if len(token) > 1 and not token.isdigit() and token not in STOPWORDS
+    )
+
+
+def _dot(a, b):
+    _common, ia, ib = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return float(a[1][ia] @ b[1][ib])
+
+
+class SimilarityIndex:
+    """متجهات TF-IDF في الذاكرة، آمنة للاستخدام بين الخيوط."""
+
+    def __init__(self, min_df=2, max_df=0.5, max_dirty=256):
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_dirty = max_dirty
+        # جيل RELATED_GENERATION الذي يطابقه الفهرس
+        self.generation = None
+        self.vocab = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        # رقم المقال -> (أرقام الكلمات مرتبة، الأوزان)
+        self.vectors = {}
+        self._lock = threading.RLock()
+        self._compile()
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __contains__(self, article_id):
+        return article_id in self.vectors
+
+    def fit(self, documents):
+        """يبني المفردات والمتجهات من (رقم المقال، Counter الكلمات)."""
+        counts = dict(documents)
+        n_docs = len(counts)
+        df = Counter()
+        for terms in counts.values():
+            df.update(terms.keys())
+        # الحد الأعلى لا معنى له في مجموعة صغيرة جداً
+        max_df = self.max_df * n_docs if n_docs >= 20 else n_docs
+        vocabulary = sorted(term for term, freq in df.items() if self.min_df <= freq <= max_df)
+        with self._lock:
+            self.vocab = {term: col for col, term in enumerate(vocabulary)}
+            self.idf = np.array(
+                [np.log((1 + n_docs) / (1 + df[term])) + 1 for term in vocabulary], dtype=np.float32,
+            )
+            self.vectors = {article_id: self.vector(terms) for article_id, terms in counts.items()}
+            self._compile()
+
+    def vector(self, terms):
+        pairs = sorted((self.vocab[term], tf) for term, tf in terms.items() if term in self.vocab)
+        cols = np.array([col for col, _tf in pairs], dtype=np.int32)
+        tfs = np.array([tf for _col, tf in pairs], dtype=np.float32)
+        vals = (1 + np.log(tfs)) * self.idf[cols] if len(cols) else tfs
+        norm = np.linalg.norm(vals)
+        return cols, (vals / norm if norm else vals).astype(np.float32)
+
+    def _compile(self):
+        """يجمع كل المتجهات في مصفوفات مرتبة حسب الكلمة (CSC)."""
+        ids = sorted(self.vectors)
+        self._ids = np.array(ids, dtype=np.int64)
+        self._row_of = {article_id: row for row, article_id in enumerate(ids)}
+        if ids:
+            lengths = [len(self.vectors[article_id][0]) for article_id in ids]
+            cols = np.concatenate([self.vectors[article_id][0] for article_id in ids])
+            vals = np.concatenate([self.vectors[article_id][1] for article_id in ids])
+            rows = np.repeat(np.arange(len(ids), dtype=np.int32), lengths)
+        else:
+            cols = np.zeros(0, dtype=np.int32)
+            vals = np.zeros(0, dtype=np.float32)
+            rows = np.zeros(0, dtype=np.int32)
+        order = np.argsort(cols, kind='stable')
+        self._rows = rows[order]
+        self._vals = vals[order]
+        self._col_ptr = np.searchsorted(cols[order], np.arange(len(self.vocab) + 1))
+        # مقالات تغيرت منذ آخر تجميع: صفوفها في المصفوفات قديمة
+        self._dirty = set()
+
+    def _scores(self, vectors):
+        """مصفوفة التشابه (عدد المتجهات × عدد المقالات المجمّعة)."""
+        scores = np.zeros((len(vectors), len(self._ids)), dtype=np.float32)
+        by_col = defaultdict(list)
+        for position, (cols, vals) in enumerate(vectors):
+            for col, val in zip(cols.tolist(), vals.tolist()):
+                by_col[col].append((position, val))
+        for col, entries in by_col.items():
+            start, end = self._col_ptr[col], self._col_ptr[col + 1]
+            if start == end:
+                continue
+            positions = np.fromiter((p for p, _v in entries), dtype=np.intp, count=len(entries))
+            weights = np.fromiter((v for _p, v in entries), dtype=np.float32, count=len(entries))
+            scores[np.ix_(positions, self._rows[start:end])] += np.outer(weights, self._vals[start:end])
+        return scores
+
+    def neighbours(self, article_ids, limit):
+        """{رقم المقال: [(رقم المقال القريب، التشابه)]} لأقرب limit مقالات."""
+        with self._lock:
+            article_ids = [article_id for article_id in article_ids if article_id in self.vectors]
+            if not article_ids:
+                return {}
+            vectors = [self.vectors[article_id] for article_id in article_ids]
+            scores = self._scores(vectors)
+
+            # المقالات المتغيرة: نهمل صفوفها القديمة ونحسب تشابهها مباشرة
+            stale = [self._row_of[article_id] for article_id in self._dirty if article_id in self._row_of]
+            scores[:, stale] = 0
+            extra = [article_id for article_id in self._dirty if article_id in self.vectors]
+            ids = self._ids
+            if extra:
+                ids = np.concatenate([ids, np.array(extra, dtype=np.int64)])
+                scores = np.hstack([scores, np.array(
+                    [[_dot(vector, self.vectors[other]) for other in extra] for vector in vectors],
+                    dtype=np.float32,
+                ).reshape(len(vectors), len(extra))])
+
+        result = {}
+        for position, article_id in enumerate(article_ids):
+            row = scores[position]
+            row[ids == article_id] = 0
+            if len(row) > limit:
+                candidates = np.argpartition(-row, limit)[:limit]
+            else:
+                candidates = np.arange(len(row))
+            candidates = candidates[np.argsort(-row[candidates], kind='stable')]
+            result[article_id] = [
+                (int(ids[col]), float(row[col])) for col in candidates if row[col] > 0
+            ]
+        return result
+
+    def update(self, article_id, terms):
+        with self._lock:
+            self.vectors[article_id] = self.vector(terms)
+            self._mark_dirty(article_id)
+
+    def remove(self, article_id):
+        with self._lock:
+            if self.vectors.pop(article_id, None) is not None or article_id in self._row_of:
+                self._mark_dirty(article_id)
+
+    def _mark_dirty(self, article_id):
+        self._dirty.add(article_id)
+        if len(self._dirty) > self.max_dirty:
+            self._compile()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _documents(queryset):
+    for article_id, title, content in queryset.values_list('pk', 'title', 'content').iterator(chunk_size=500):
+        yield article_id, document_terms(title, content)
+
+
+def build_index():
+    from .models import Article
+
+    index = SimilarityIndex()
+    # الجيل قبل القراءة: أي كتابة أثناء البناء تجعل الفهرس قديماً
+    index.generation = get_generation(RELATED_GENERATION)
+    index.fit(_documents(Article.published.order_by('pk')))
+    return index
+
+
+def _is_current(index):
+    return index is not None and index.generation == get_generation(RELATED_GENERATION)
+
+
+def get_index():
+    """فهرس حالي، يُبنى إن لم يوجد أو كان قديماً (للأوامر فقط وليس لطلبات الويب)."""
+    global _index
+    if not _is_current(_index):
+        with _index_lock:
+            if not _is_current(_index):
+                _index = build_index()
+    return _index
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+def _written(index):
+    """بعد الكتابة من ``index``: يزيد الجيل، ويبقى الفهرس حالياً إن لم يكتب غيره بينهما."""
+    global _index
+    generation = bump_generation(RELATED_GENERATION)
+    with _index_lock:
+        if index.generation is not None and generation == index.generation + 1:
+            index.generation = generation
+        elif _index is index:
+            _index = None
+
+
+def store_neighbours(neighbours):
+    """يستبدل صفوف RelatedArticle للمقالات المعطاة ({رقم: [(قريب، تشابه)]})."""
+    from .models import RelatedArticle
+
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=list(neighbours)).delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(article_id=article_id, related_id=related_id, score=score)
+            for article_id, items in neighbours.items()
+            for related_id, score in items
+        ], batch_size=1000)
+
+
+def rebuild(batch_size=256):
+    """بناء كامل للفهرس وجدول RelatedArticle، يعيد عدد المقالات."""
+    from .models import PendingRelatedRefresh, RelatedArticle
+
+    global _index
+    started = timezone.now()
+    index = build_index()
+    with _index_lock:
+        _index = index
+    ids = sorted(index.vectors)
+    limit = related_count()
+    with transaction.atomic():
+        RelatedArticle.objects.exclude(article_id__in=ids).delete()
+        for start in range(0, len(ids), batch_size):
+            store_neighbours(index.neighbours(ids[start:start + batch_size], limit))
+        # ما سُجل بعد بدء البناء قد لا يكون في الفهرس فيبقى
+        PendingRelatedRefresh.objects.filter(queued_at__lte=started).delete()
+    _written(index)
+    return len(ids)
+
+
+def refresh(article_ids, index=None):
+    """
+    يحدّث متجهات المقالات المعطاة (أو يحذفها إن لم تعد منشورة) ثم جيرانها،
+    وجيران المقالات التي كانت تشير إليها أو القريبة منها (قد تدخل قوائمها).
+    بدون ``index`` يُستخدم فهرس حالي (يُبنى إن لزم).
+    """
+    from .models import Article, RelatedArticle
+
+    if index is None:
+        index = get_index()
+    limit = related_count()
+    article_ids = set(article_ids)
+    found = set()
+    for article_id, terms in _documents(Article.published.filter(pk__in=article_ids)):
+        index.update(article_id, terms)
+        found.add(article_id)
+    for article_id in article_ids - found:
+        index.remove(article_id)
+
+    affected = set(article_ids)
+    affected.update(RelatedArticle.objects.filter(
+        related_id__in=article_ids,
+    ).values_list('article_id', flat=True))
+    for items in index.neighbours(found, limit * 4).values():
+        affected.update(related_id for related_id, _score in items)
+
+    neighbours = index.neighbours(affected, limit)
+    # مقالات في الفهرس حُذفت أو ألغي نشرها دون أن يصل إشعار لهذه العملية
+    mentioned = set(neighbours) | {related_id for items in neighbours.values() for related_id, _s in items}
+    valid = set(Article.published.filter(pk__in=mentioned).values_list('pk', flat=True))
+    for article_id in mentioned - valid:
+        index.remove(article_id)
+    store_neighbours({
+        article_id: [item for item in neighbours.get(article_id, []) if item[0] in valid]
+        for article_id in affected
+    })
+    _written(index)
+
+
+def queue_refresh(article_ids):
+    """يسجل المقالات لتحديثها لاحقاً بالأمر build_related_articles --pending."""
+    from .models import PendingRelatedRefresh
+
+    now = timezone.now()
+    PendingRelatedRefresh.objects.bulk_create(
+        [PendingRelatedRefresh(article_id=article_id, queued_at=now) for article_id in set(article_ids)],
+        update_conflicts=True, unique_fields=['article_id'], update_fields=['queued_at'],
+    )
+
+
+def article_changed(article_ids):
+    """بعد حفظ مقال: تحديث مباشر من فهرس حالي في هذه العملية، وإلا التسجيل."""
+    index = _index
+    # مع cache غير مشترك لا تعرف هذه العملية بكتابات العمليات الأخرى
+    if shared_cache() and _is_current(index):
+        refresh(article_ids, index)
+        return
+    if index is not None:
+        # فهرس قديم: لا فائدة من إبقائه في الذاكرة
+        with _index_lock:
+            if _index is index:
+                reset_index()
+    queue_refresh(article_ids)
+
+
+def refresh_pending():
+    """يحدّث المقالات المسجلة في PendingRelatedRefresh ويعيد عددها."""
+    from .models import PendingRelatedRefresh
+
+    pending = dict(PendingRelatedRefresh.objects.values_list('article_id', 'queued_at'))
+    if not pending:
+        return 0
+    refresh(pending)
+    # مقال سُجل مرة أخرى أثناء التحديث يبقى للمرة القادمة
+    for article_id, queued_at in pending.items():
+        PendingRelatedRefresh.objects.filter(article_id=article_id, queued_at=queued_at).delete()
+    return len(pending)
@@ -0,0 +1,215 @@
+"""
+البحث في المقالات.
+
+الواجهة العامة هي ``search_articles`` وهي تمرر الطلب إلى محرك البحث
+المحدد في الإعداد ``NEWS_SEARCH_BACKEND``:
+
+* ``DatabaseSearchBackend`` (الافتراضي): على PostgreSQL يستخدم متجه بحث
+  (tsvector) مخزن في ``Article.search_vector`` ومفهرس بـ GIN مع ترتيب
+  النتائج حسب الصلة، وعلى قواعد البيانات الأخرى يعود إلى icontains.
+* ``InvertedIndexSearchBackend``: فهرس معكوس داخل ذاكرة العملية مع ترتيب
+  BM25، مناسب لـ SQLite في التطوير والاختبار وقياس الأداء.
+
+النص يُطبَّع بـ normalize_arabic قبل الفهرسة وقبل البحث حتى تتطابق الكلمات
+رغم اختلاف التشكيل والهمزات.
+"""
+import hashlib
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, F, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Round
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from .arabic import normalize_arabic, normalize_document
+from .cache import bump_generation, generation_timeout, get_generation
+from .inverted_index import InvertedIndex
+
+# الحقول التي يتغير فهرس البحث بتغيرها
+SEARCH_FIELDS = {'title', 'content', 'author', 'status'}
+
+# جيل يُزاد بعد كل تغيير في المقالات المفهرسة (InvertedIndexSearchBackend)
+SEARCH_GENERATION = 'search'
+# ترتيب الصلة في PostgreSQL كعدد صحيح (ts_rank × RANK_SCALE)
+RANK_SCALE = 1000000
+
+
+def search_config():
+    return getattr(settings, 'NEWS_SEARCH_CONFIG', 'simple')
+
+
+def full_text_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def build_search_vector(article):
+    """يبني تعبير SearchVector من نص المقال بعد تطبيعه."""
+    from django.contrib.postgres.search import SearchVector
+
+    config = search_config()
+    author = article.author
+    author_text = ' '.join(filter(None, [author.username, author.get_full_name()]))
+    return (
+        SearchVector(Value(normalize_arabic(article.title), output_field=TextField()),
+                     config=config, weight='A')
+        + SearchVector(Value(normalize_arabic(author_text), output_field=TextField()),
+                       config=config, weight='B')
+        + SearchVector(Value(normalize_document(article.content), output_field=TextField()),
+                       config=config, weight='C')
+    )
+
+
+def update_search_vector(article):
+    if not full_text_enabled():
+        return
+    from .models import Article
+
+    Article.objects.filter(pk=article.pk).update(search_vector=build_search_vector(article))
+
+
+class BaseSearchBackend:
+    """الواجهة المشتركة لمحركات البحث."""
+
+    def search(self, query, queryset):
+        """يعيد QuerySet بالمقالات المطابقة مرتبة حسب الصلة."""
+        raise NotImplementedError
+
+    def index_article(self, article):
+        """يُستدعى بعد حفظ المقال."""
+
+    def remove_article(self, article_id):
+        """يُستدعى بعد حذف المقال."""
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+
+    def search(self, query, queryset):
+        if not full_text_enabled():
+            return queryset.filter(
+                Q(title__icontains=query) |
+                Q(content__icontains=query) |
+                Q(author__username__icontains=query)
+            ).order_by('-publish')
+
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(
+            normalize_arabic(query), config=search_config(), search_type='websearch'
+        )
+        # ts_rank من نوع float4 لا يبقى كما هو بعد مروره في مؤشر الترقيم (JSON)،
+        # فنقربه إلى عدد صحيح ليكون المفتاح دقيقاً في الترتيب وفي شرط المؤشر
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(Round(SearchRank(F('search_vector'), search_query) * RANK_SCALE), BigIntegerField())
+        ).order_by('-rank', '-publish')
+
+    def index_article(self, article):
+        update_search_vector(article)
+
+
+class InvertedIndexSearchBackend(BaseSearchBackend):
+    """
+    فهرس معكوس للمقالات المنشورة يُبنى عند أول بحث ثم يُحدّث تدريجياً من
+    إشارات post_save و post_delete. كل عملية (worker) تحتفظ بنسختها الخاصة.
+
+    كل تغيير (بعد نجاح المعاملة) يزيد جيل SEARCH_GENERATION، وكذلك
+    الاستيراد (news.importer) الذي لا يطلق الإشارات. الفهرس يحفظ الجيل الذي
+    يطابقه، وإن تغير الجيل بتعديل من عملية أخرى يُعاد بناؤه عند البحث التالي.
+    مع cache غير مشترك (news.cache.shared_cache) يُعاد البناء أيضاً بعد
+    NEWS_LOCAL_CACHE_TIMEOUT لأن الجيل لا يصل من العمليات الأخرى.
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.generation = None
+        self._expires = None
+        self._lock = threading.Lock()
+
+    def _is_current(self, generation):
+        return self.generation == generation and (self._expires is None or time.monotonic() < self._expires)
+
+    def _ensure_built(self):
+        generation = get_generation(SEARCH_GENERATION)
+        if self._is_current(generation):
+            return
+        with self._lock:
+            if self._is_current(generation):
+                return
+            from .models import Article
+
+            index = InvertedIndex()
+            articles = Article.published.select_related('author').only(
+                'pk', 'title', 'content', 'author__username',
+            ).order_by('pk')
+            for article in articles.iterator(chunk_size=500):
+                index.add_text(article.pk, *self._texts(article))
+            self.index, self.generation = index, generation
+            timeout = generation_timeout(None)
+            self._expires = None if timeout is None else time.monotonic() + timeout
+
+    @staticmethod
+    def _texts(article):
+        # العنوان مكرر مرتين ليكون وزنه أعلى من المحتوى
+        return article.title, article.title, article.author.username, strip_tags(article.content)
+
+    def search(self, query, queryset):
+        self._ensure_built()
+        limit = getattr(settings, 'NEWS_SEARCH_MAX_RESULTS', 1000)
+        ids = [doc_id for doc_id, _score in self.index.search(query, limit=limit)]
+        if not ids:
+            return queryset.none()
+        ranking = Case(
+            *[When(pk=doc_id, then=Value(position)) for position, doc_id in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).annotate(rank=ranking).order_by('rank')
+
+    def index_article(self, article):
+        transaction.on_commit(partial(self._changed, article.pk, article))
+
+    def remove_article(self, article_id):
+        transaction.on_commit(partial(self._changed, article_id, None))
+
+    def _changed(self, article_id, article):
+        """يزيد الجيل، ويعدّل الفهرس إن كان مطابقاً للجيل السابق مباشرة."""
+        from .models import Article
+
+        generation = bump_generation(SEARCH_GENERATION)
+        with self._lock:
+            if self.generation is None or generation != self.generation + 1:
+                # فاتنا تغيير من عملية أخرى: يُبنى من جديد عند البحث التالي
+                self.generation = None
+                return
+            if article is None or article.status != Article.Status.PUBLISHED:
+                self.index.remove(article_id)
+            else:
+                self.index.add_text(article_id, *self._texts(article))
+            self.generation = generation
+
+
+_backends = {}
+
+
+def get_search_backend():
+    path = getattr(settings, 'NEWS_SEARCH_BACKEND', 'news.search.DatabaseSearchBackend')
+    backend = _backends.get(path)
+    if backend is None:
+        backend = _backends.setdefault(path, import_string(path)())
+    return backend
+
+
+def search_cache_key(query):
+    """مفتاح قصير وآمن للتخزين المؤقت لنص بحث (بعد التطبيع)."""
+    return hashlib.md5(normalize_arabic(query).strip().encode()).hexdigest()
+
+
+def search_articles(query, queryset=None):
+    """يعيد المقالات المطابقة مرتبة حسب الصلة."""
+    from .models import Article
+
+    if queryset is None:
+        queryset = Article.published.all()
+    return get_search_backend().search(query, queryset)
@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import PUBLISH_GENERATION, bump_generation
+from .counters import apply_category_change, remove_article_saves
+from .images import sync_derivatives
+from . import related, widgets
+from .models import Article, Category
+from .search import SEARCH_FIELDS, get_search_backend
+from .sitemaps import invalidate_months
+from .slugs import slug_cache
+
+# الحقول التي نتتبع قيمتها الأصلية لمعرفة ما تغير عند الحفظ
+TRACKED_FIELDS = ('status', 'category_id', 'featured', 'breaking_news', 'slug', 'publish')
+# الحقول التي تغير عضوية المقال في القوائم وأعدادها
+LISTING_FIELDS = {'status', 'category_id'}
+
+
+def _tracked_state(instance):
+    # نقرأ من __dict__ حتى لا نطلق استعلاماً للحقول المؤجلة (only/defer)
+    return {name: instance.__dict__.get(name) for name in TRACKED_FIELDS}
+
+
+def _published_category(state):
+    if state is None or state['status'] != Article.Status.PUBLISHED:
+        return None
+    return state['category_id']
+
+
+def changed_fields(instance):
+    """الحقول المتتبعة التي تغيرت منذ تحميل المقال من قاعدة البيانات."""
+    original = getattr(instance, '_original_state', None)
+    if original is None:
+        return set(TRACKED_FIELDS)
+    current = _tracked_state(instance)
+    return {
+        name for name in TRACKED_FIELDS
+        if name in instance.__dict__ and original[name] != current[name]
+    }
+
+
+def invalidate_sitemaps(instance, original):
+    """يبطل خرائط الموقع للشهر الذي نُشر فيه المقال (والشهر السابق إن تغير التاريخ)."""
+    states = [_tracked_state(instance)]
+    if original is not None:
+        states.append(original)
+    published = [state for state in states if state['status'] == Article.Status.PUBLISHED]
+    if published:
+        invalidate_months(*[state['publish'] for state in published])
+
+
+def refresh_related(instance, original):
+    """يعيد حساب المقالات ذات الصلة بعد نجاح المعاملة (news.related)."""
+    if not getattr(settings, 'NEWS_RELATED_REFRESH_ON_SAVE', True):
+        return
+    states = [_tracked_state(instance)] + ([original] if original is not None else [])
+    if any(state['status'] == Article.Status.PUBLISHED for state in states):
+        article_id = instance.pk
+        transaction.on_commit(lambda: related.article_changed([article_id]))
+
+
+def invalidate_article_widgets(instance, original):
+    """يبطل عناصر الشريط الجانبي التي قد يظهر فيها المقال قبل الحفظ أو بعده."""
+    states = [_tracked_state(instance)]
+    if original is not None:
+        states.append(original)
+    published = [state for state in states if state['status'] == Article.Status.PUBLISHED]
+    if not published:
+        return
+    names = [widgets.LATEST, widgets.TRENDING]
+    if any(state['featured'] for state in published):
+        names.append(widgets.FEATURED)
+    if any(state['breaking_news'] for state in published):
+        names.append(widgets.BREAKING)
+    if instance.__dict__.get('views'):
+        names.append(widgets.MOST_READ)
+    widgets.invalidate(*names)
+
+
+@receiver(post_init, sender=Article)
+def article_loaded(sender, instance, **kwargs):
+    # المقال الجديد (بدون رقم) ليس له حالة أصلية
+    instance._original_state = _tracked_state(instance) if instance.pk is not None else None
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        get_search_backend().index_article(instance)
+    if getattr(settings, 'NEWS_IMAGE_DERIVATIVES_ON_SAVE', True) and (
+            update_fields is None or 'image' in update_fields):
+        sync_derivatives(instance)
+
+    original = None if created else instance._original_state
+    if created or changed_fields(instance) & {'slug', 'status'}:
+        # ذاكرة slug -> المقال (news.slugs) للرابط القديم والجديد (مقال جديد
+        # بنفس slug قد يصبح هو الأحدث)
+        slug_cache.invalidate(*{(original or {}).get('slug'), instance.__dict__.get('slug')})
+    if update_fields is None or related.RELATED_FIELDS & set(update_fields):
+        refresh_related(instance, original)
+    invalidate_article_widgets(instance, original)
+    invalidate_sitemaps(instance, original)
+    was_published = original is not None and original['status'] == Article.Status.PUBLISHED
+    if was_published != (instance.status == Article.Status.PUBLISHED):
+        bump_generation(PUBLISH_GENERATION)
+
+    changed = changed_fields(instance) & LISTING_FIELDS
+    if created:
+        changed = set(LISTING_FIELDS) if instance.status == Article.Status.PUBLISHED else set()
+    if changed:
+        widgets.invalidate(widgets.CATEGORIES)
+        if original is not None or created:
+            apply_category_change(
+                _published_category(original),
+                _published_category(_tracked_state(instance)),
+            )
+        # الأعداد المخزنة للقوائم (news.pagination.cached_count) لم تعد صحيحة
+        bump_generation('articles')
+    instance._original_state = _tracked_state(instance)
+
+
+@receiver(pre_delete, sender=Article)
+def article_deleting(sender, instance, **kwargs):
+    # قبل الحذف المتتالي لصفوف SavedArticle
+    remove_article_saves(instance.pk)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    get_search_backend().remove_article(instance.pk)
+    slug_cache.invalidate(instance.__dict__.get('slug'))
+    refresh_related(instance, None)
+    invalidate_article_widgets(instance, _tracked_state(instance))
+    invalidate_sitemaps(instance, None)
+    widgets.invalidate(widgets.CATEGORIES)
+    apply_category_change(_published_category(_tracked_state(instance)), None)
+    bump_generation('articles')
+    if instance.__dict__.get('status') == Article.Status.PUBLISHED:
+        bump_generation(PUBLISH_GENERATION)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # اسم التصنيف يظهر في بطاقات المقالات أيضاً
+    widgets.invalidate(widgets.CATEGORIES, *widgets.ARTICLE_WIDGETS)
@@ -1,12 +1,218 @@
-from django.contrib.sitemaps import Sitemap
+"""
+خرائط الموقع (sitemaps) للمقالات.
+
+بدلاً من خريطة واحدة تحمّل كل المقالات المنشورة في كل زيارة لزاحف، نقدم
+فهرس خرائط (``/sitemap.xml``) يشير إلى:
+
+* قسم لكل شهر (``/sitemap-2024-05.xml``) مقسم إلى صفحات ثابتة الحجم
+  (``?p=2`` ...) حسب ``ArticleSitemap.limit``.
+* قسم أخبار Google News (``/sitemap-news.xml``) لمقالات آخر 48 ساعة.
+
+كل قسم يقرأ الحقول slug و publish و updated_at فقط (والعنوان لقسم الأخبار).
+ملخص الشهر (العدد وآخر تعديل) وملف XML الناتج يُخزنان مؤقتاً مرتبطين بجيل
+خاص بالشهر تزيده news.signals عند تعديل مقال منشور فيه، فالأشهر المنتهية
+تُحسب مرة واحدة ولا تنتهي صلاحيتها. الشهر الحالي وقسم الأخبار وفهرس الخرائط
+لها مدة صلاحية NEWS_SITEMAP_CACHE_TIMEOUT لأن محتواها يتغير مع الوقت.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap, views as sitemap_views
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import bump_generation, generation_timeout, versioned_key
 from .models import Article
+from .pagination import CachedCountPaginator
+
+# جيل يُزاد مع كل تغيير في أي قسم (قائمة الأشهر وقسم الأخبار والفهرس)
+SITEMAP_GENERATION = 'sitemap'
+NEWS_SECTION = 'news'
+
+
+def month_section(value):
+    """اسم قسم الشهر الذي نُشر فيه المقال (بالمنطقة الزمنية الحالية)."""
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    return f'{value.year}-{value.month:02d}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'NEWS_SITEMAP_CACHE_TIMEOUT', 600)
+
+
 class ArticleSitemap(Sitemap):
-    changeferq="weekly"
-    priority=0.9
+    """المقالات المنشورة، كلها أو مقالات شهر واحد عند تمرير السنة والشهر."""
+
+    changefreq = 'weekly'
+    priority = 0.9
+    fields = ('slug', 'publish', 'updated_at')
+
+    def __init__(self, year=None, month=None):
+        self.year = year
+        self.month = month
+
+    @property
+    def section(self):
+        return f'{self.year}-{self.month:02d}' if self.year else None
+
+    @property
+    def generation(self):
+        return f'{SITEMAP_GENERATION}-{self.section}' if self.year else SITEMAP_GENERATION
+
+    def is_finished(self):
+        """الشهر انتهى فلن تضاف إليه مقالات جديدة."""
+        return self.year is not None and self.section < month_section(timezone.now())
+
+    @property
+    def cache_timeout(self):
+        return None if self.is_finished() else _cache_timeout()
+
+    def queryset(self):
+        queryset = Article.published.all()
+        if self.year:
+            tz = timezone.get_current_timezone()
+            start = datetime(self.year, self.month, 1)
+            end = datetime(self.year + self.month // 12, self.month % 12 + 1, 1)
+            queryset = queryset.filter(
+                publish__gte=timezone.make_aware(start, tz),
+                publish__lt=timezone.make_aware(end, tz),
+            )
+        return queryset
 
     def items(self):
-        return Article.published.all()
+        return self.queryset().order_by('publish', 'pk').values(*self.fields)
+
+    def location(self, item):
+        return reverse('news:article_detail', kwargs={'slug': item['slug']})
+
+    def lastmod(self, item):
+        return item['updated_at']
+
+    def summary(self):
+        """عدد المقالات وآخر تعديل باستعلام واحد مخزن مؤقتاً."""
+        key = versioned_key(self.generation, 'summary', self.section)
+        value = cache.get(key)
+        if value is None:
+            value = self.queryset().aggregate(count=Count('pk'), lastmod=Max('updated_at'))
+            cache.set(key, value, generation_timeout(self.cache_timeout))
+        return value
+
+    def get_latest_lastmod(self):
+        return self.summary()['lastmod']
+
+    @property
+    def paginator(self):
+        return CachedCountPaginator(self._items(), self.limit, known_count=self.summary()['count'])
+
+
+class NewsSitemap(ArticleSitemap):
+    """قسم بصيغة Google News لمقالات آخر 48 ساعة."""
+
+    changefreq = 'hourly'
+    fields = ('slug', 'publish', 'updated_at', 'title')
+    template_name = 'news/sitemaps/news.xml'
+
+    def queryset(self):
+        since = timezone.now() - timedelta(hours=getattr(settings, 'NEWS_SITEMAP_NEWS_HOURS', 48))
+        return Article.published.filter(publish__gte=since)
+
+    def items(self):
+        return self.queryset().order_by('-publish', '-pk').values(*self.fields)
+
+    def summary(self):
+        # النافذة الزمنية تتحرك، فلا فائدة من تخزين ملخصها بشكل منفصل
+        return self.queryset().aggregate(count=Count('pk'), lastmod=Max('updated_at'))
+
+    @property
+    def cache_timeout(self):
+        return _cache_timeout()
+
+
+class ArticleSitemapSections(Mapping):
+    """
+    أقسام فهرس الخرائط: قسم الأخبار ثم الأشهر من الأحدث إلى الأقدم.
+    قائمة الأشهر تُقرأ بـ ``dates()`` وتخزن مؤقتاً.
+    """
+
+    def _months(self):
+        key = versioned_key(SITEMAP_GENERATION, 'months')
+        months = cache.get(key)
+        if months is None:
+            months = [
+                (value.year, value.month)
+                for value in Article.published.dates('publish', 'month', order='DESC')
+            ]
+            cache.set(key, months, generation_timeout(_cache_timeout()))
+        return months
+
+    def _sections(self):
+        sections = {NEWS_SECTION: NewsSitemap}
+        for year, month in self._months():
+            sections[f'{year}-{month:02d}'] = (year, month)
+        return sections
+
+    def __getitem__(self, section):
+        value = self._sections()[section]
+        if section == NEWS_SECTION:
+            return NewsSitemap()
+        return ArticleSitemap(*value)
+
+    def __iter__(self):
+        return iter(self._sections())
+
+    def __len__(self):
+        return len(self._sections())
+
+
+sections = ArticleSitemapSections()
+
+
+def _cached_response(key, timeout, render):
+    data = cache.get(key)
+    if data is None:
+        response = render()
+        response.render()
+        data = {'content': response.content, 'headers': dict(response.headers)}
+        cache.set(key, data, generation_timeout(timeout))
+    response = HttpResponse(data['content'])
+    for header, value in data['headers'].items():
+        response[header] = value
+    return response
+
+
+def sitemap_index(request):
+    key = versioned_key(SITEMAP_GENERATION, 'index', request.scheme, request.get_host())
+    return _cached_response(key, _cache_timeout(), lambda: sitemap_views.index(
+        request, sections, sitemap_url_name='sitemap-section',
+    ))
+
+
+def sitemap_section(request, section):
+    if section not in sections:
+        raise Http404(f'No sitemap available for section: {section!r}')
+    site = sections[section]
+
+    def render():
+        response = sitemap_views.sitemap(
+            request, {section: site}, section=section,
+            template_name=getattr(site, 'template_name', 'sitemap.xml'),
+        )
+        response.context_data['publication_name'] = get_current_site(request).name
+        return response
+
+    page = request.GET.get('p', 1)
+    key = versioned_key(site.generation, 'xml', section, page, request.scheme, request.get_host())
+    return _cached_response(key, site.cache_timeout, render)
+
+
+def invalidate_months(*values):
+    """يبطل أقسام الأشهر التي تحتوي التواريخ المعطاة (وقائمة الأشهر والفهرس)."""
+    for section in {month_section(value) for value in values if value is not None}:
+        bump_generation(f'{SITEMAP_GENERATION}-{section}')
+    bump_generation(SITEMAP_GENERATION)
 
-    def lastmod(self,obj):
-        return obj.updated_at
-    
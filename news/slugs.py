@@ -0,0 +1,151 @@
+"""
+ذاكرة داخل العملية تربط slug المقال برقمه وحقوله الأساسية.
+
+article_detail و handle_reaction و unsave_artcile تبدأ كلها بالبحث عن المقال
+بالـ slug. ``resolve`` تعيد ``ArticleRef`` (بدون المحتوى) من ``SlugCache``:
+LRU محدود بعدد NEWS_SLUG_CACHE_SIZE عنصر، وكل عنصر صالح لمدة
+NEWS_SLUG_CACHE_TTL ثانية. التفاعل والحفظ يكفيهما رقم المقال، وصفحة المقال
+تجلب الصف كاملاً بالرقم (المفتاح الأساسي) عند العرض فقط.
+
+slug فريد لكل تاريخ نشر فقط (unique_for_date)، فعند التكرار نأخذ الأحدث.
+
+news.signals تحذف العنصر عند تغير slug أو الحالة أو حذف المقال، لكن في
+العملية التي حفظت المقال فقط، لذا مدة الصلاحية قصيرة. الإحصاءات (``stats``)
+تُسجل في news.slugs كل NEWS_SLUG_CACHE_LOG_EVERY عملية بحث لمعرفة الحجم
+المناسب.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.http import Http404
+
+logger = logging.getLogger('news.slugs')
+
+ArticleRef = namedtuple('ArticleRef', ['pk', 'slug', 'status', 'title', 'publish'])
+
+
+def _max_size():
+    return getattr(settings, 'NEWS_SLUG_CACHE_SIZE', 2048)
+
+
+def _ttl():
+    return getattr(settings, 'NEWS_SLUG_CACHE_TTL', 300)
+
+
+def _log_every():
+    return getattr(settings, 'NEWS_SLUG_CACHE_LOG_EVERY', 10000)
+
+
+class SlugCache:
+    """LRU مع مدة صلاحية، آمن للاستخدام بين الخيوط."""
+
+    def __init__(self):
+        # slug -> (وقت الانتهاء، ArticleRef)، الأقدم استخداماً أولاً
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, slug):
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[slug]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(slug)
+                self.hits += 1
+            lookups = self.hits + self.misses
+        every = _log_every()
+        # 0 تعطّل تسجيل الإحصاءات
+        if every and lookups % every == 0:
+            logger.info('slug cache: %s', self.stats())
+        return entry[1] if entry is not None else None
+
+    def set(self, slug, ref):
+        max_size = _max_size()
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._entries[slug] = (time.monotonic() + _ttl(), ref)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *slugs):
+        with self._lock:
+            for slug in slugs:
+                self._entries.pop(slug, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': _max_size(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+slug_cache = SlugCache()
+
+
+def resolve(slug):
+    """ArticleRef للمقال صاحب slug (أي حالة)، أو None."""
+    if not slug:
+        return None
+    ref = slug_cache.get(slug)
+    if ref is None:
+        from .models import Article
+
+        row = Article.objects.filter(slug=slug).order_by('-publish', '-pk').values_list(
+            *ArticleRef._fields,
+        ).first()
+        if row is None:
+            return None
+        ref = ArticleRef(*row)
+        slug_cache.set(slug, ref)
+    return ref
+
+
+def resolve_or_404(slug):
+    ref = resolve(slug)
+    if ref is None:
+        raise Http404('لا يوجد مقال بهذا الرابط')
+    return ref
+
+
+def get_article_or_404(slug, queryset=None):
+    """
+    المقال كاملاً لصفحة العرض: الرقم من الذاكرة ثم جلب الصف بالمفتاح الأساسي.
+    إن حُذف المقال أو تغير slug في عملية أخرى نحذف العنصر ونبحث من جديد.
+    """
+    from .models import Article
+
+    queryset = Article.objects.all() if queryset is None else queryset
+    ref = resolve_or_404(slug)
+    article = queryset.filter(pk=ref.pk).first()
+    if article is None or article.slug != slug:
+        slug_cache.invalidate(slug)
+        ref = resolve_or_404(slug)
+        article = queryset.filter(pk=ref.pk).first()
+        if article is None:
+            raise Http404('لا يوجد مقال بهذا الرابط')
+    return article
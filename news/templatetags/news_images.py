@@ -0,0 +1,40 @@
+"""
+وسوم الصور المتجاوبة::
+
+    {% load news_images %}
+    <img src="{% image_src article 640 %}" srcset="{% image_srcset article %}"
+         sizes="(max-width: 768px) 100vw, 33vw" alt="...">
+
+إن لم تكن للصورة نسخ بعد يعود ``image_src`` إلى الصورة الأصلية و ``image_srcset``
+إلى نص فارغ فيستخدم المتصفح src فقط.
+"""
+from django import template
+
+from news.images import current_derivatives
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_srcset(article):
+    storage = article.image.storage
+    return ', '.join(
+        f'{storage.url(path)} {width}w' for width, path in current_derivatives(article)
+    )
+
+
+@register.simple_tag
+def image_src(article, width=None):
+    """أصغر نسخة لا يقل عرضها عن width (أو أكبر نسخة متاحة)، وإلا الصورة الأصلية."""
+    if not article.image:
+        return ''
+    derivatives = current_derivatives(article)
+    if not derivatives:
+        return article.image.url
+    path = derivatives[-1][1]
+    if width is not None:
+        for candidate, candidate_path in derivatives:
+            if candidate >= int(width):
+                path = candidate_path
+                break
+    return article.image.storage.url(path)
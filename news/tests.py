@@ -1,15 +1,27 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.models import Q
 from datetime import datetime, timedelta
+import base64
+import json
+import os
 import tempfile
+from io import BytesIO, StringIO
 from PIL import Image
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test.utils import CaptureQueriesContext
+from unittest import skipUnless
 
-from .models import Category, Article, Reaction, SavedArticle
+from .models import Category, Article, OutgoingEmail, Reaction, ReaderStats, SavedArticle
+from .outbox import dispatch
 
 
 class CategoryModelTest(TestCase):
@@ -926,3 +938,2278 @@ class IntegrationTest(TestCase):
             user=self.user
         ).exists()
         self.assertFalse(saved_exists)
+
+
+class ViewCounterTest(TestCase):
+    """Test cases for the write-behind view counter"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.category = Category.objects.create(name="تقنية", is_active=True)
+        self.article = Article.objects.create(
+            title="مقال للمشاهدة",
+            slug="viewed-article",
+            content="محتوى",
+            author=self.user,
+            category=self.category,
+            image="articles/viewed.jpg",
+            status=Article.Status.PUBLISHED
+        )
+
+    @override_settings(NEWS_VIEW_COUNT_FLUSH_INTERVAL=3600)
+    def test_views_are_buffered_until_flush(self):
+        """Test increments stay in memory until the buffer is flushed"""
+        from .counters import ViewCounterBuffer
+
+        buffer = ViewCounterBuffer()
+        buffer._ensure_flusher = lambda: None
+        for _ in range(3):
+            buffer.record(self.article.pk)
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 0)
+        self.assertEqual(buffer.pending(self.article.pk), 3)
+
+        self.assertEqual(buffer.flush(), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 3)
+        self.assertEqual(buffer.pending(self.article.pk), 0)
+
+    @override_settings(NEWS_VIEW_COUNT_FLUSH_INTERVAL=3600, NEWS_VIEW_COUNT_MAX_PENDING=2)
+    def test_failed_flush_is_logged_and_capped(self):
+        """Test a database error during an overflow flush is logged, not raised, and bounded"""
+        from django.db import OperationalError
+        from .counters import ViewCounterBuffer
+
+        def fail(batch):
+            raise OperationalError("database is down")
+
+        buffer = ViewCounterBuffer()
+        buffer._ensure_flusher = lambda: None
+        buffer._write = fail
+        with self.assertLogs('news.counters', level='ERROR'):
+            buffer.record(1)
+            buffer.record(2)
+        self.assertEqual((buffer.pending(1), buffer.pending(2)), (1, 1))
+
+        # بعد الفشل لا تعيد الطلبات المحاولة، والمقالات المعادة للمخزن محدودة
+        for article_id in range(3, 40):
+            buffer.record(article_id)
+        buffer._retry_at = 0
+        with self.assertLogs('news.counters', level='WARNING') as logs:
+            buffer.record(40)
+        self.assertIn('أُهملت', logs.output[0])
+        self.assertEqual(len(buffer._pending), 20)
+
+    @override_settings(NEWS_VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_detail_view_does_not_touch_updated_at(self):
+        """Test counting a view leaves updated_at unchanged"""
+        updated_at = self.article.updated_at
+        self.client.login(username='testuser', password='testpassword')
+        response = self.client.get(
+            reverse('news:article_detail', kwargs={'slug': self.article.slug})
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 1)
+        self.assertEqual(self.article.updated_at, updated_at)
+
+
+class ReactionCounterTest(TestCase):
+    """Test cases for the stored like/dislike counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="مقال للتفاعل",
+            slug="counted-article",
+            content="محتوى",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+        self.url = reverse('news:handle_reaction', kwargs={'slug': self.article.slug})
+        self.client.login(username='testuser', password='testpassword')
+
+    def assertCounts(self, likes, dislikes):
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, likes)
+        self.assertEqual(self.article.dislike_count, dislikes)
+
+    def test_counters_follow_create_flip_and_delete(self):
+        """Test counters are kept in sync by handle_reaction"""
+        self.client.post(self.url, {'reaction_type': 'like'})
+        self.assertCounts(1, 0)
+
+        self.client.post(self.url, {'reaction_type': 'dislike'})
+        self.assertCounts(0, 1)
+
+        self.client.post(self.url, {'reaction_type': 'dislike'})
+        self.assertCounts(0, 0)
+        self.assertFalse(Reaction.objects.filter(article=self.article).exists())
+
+    def test_counters_do_not_go_negative(self):
+        """Test removing a reaction that was never counted keeps the counters at zero"""
+        Reaction.objects.create(article=self.article, user=self.user, reaction_type='like')
+        self.client.post(self.url, {'reaction_type': 'dislike'})
+        self.assertCounts(0, 1)
+        self.client.post(self.url, {'reaction_type': 'dislike'})
+        self.assertCounts(0, 0)
+
+    def test_rebuild_command_recomputes_counts(self):
+        """Test rebuild_reaction_counts restores counters from Reaction rows"""
+        from django.core.management import call_command
+
+        other = User.objects.create_user(username="other", password="testpassword")
+        Reaction.objects.create(article=self.article, user=self.user, reaction_type='like')
+        Reaction.objects.create(article=self.article, user=other, reaction_type='dislike')
+        self.assertCounts(0, 0)
+
+        call_command('rebuild_reaction_counts', stdout=StringIO())
+        self.assertCounts(1, 1)
+
+
+class ArabicSearchTest(TestCase):
+    """Test cases for Arabic normalization and article search"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="أخبار الْمَكْتَبَة العربية",
+            slug="library-news",
+            content="<p>افتتاح مكتبـــة جديدة في المدينة</p>",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+        Article.objects.create(
+            title="رياضة",
+            slug="sports",
+            content="مباراة كرة القدم",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_normalize_arabic(self):
+        """Test diacritics, tatweel, alef, ya and ta marbuta are normalized"""
+        from .arabic import normalize_arabic
+
+        self.assertEqual(normalize_arabic("الْمَكْتَبَة"), "المكتبه")
+        self.assertEqual(normalize_arabic("مكتبـــة"), "مكتبه")
+        self.assertEqual(normalize_arabic("أإآٱ"), "اااا")
+        self.assertEqual(normalize_arabic("مصطفى"), "مصطفي")
+
+    def test_search_view_finds_article(self):
+        """Test the search view returns matching published articles"""
+        response = self.client.get(reverse('news:article_search'), {'q': 'رياضة'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    @skipUnless(connection.vendor == 'postgresql', "requires PostgreSQL full-text search")
+    def test_full_text_search_ignores_diacritics(self):
+        """Test the stored search vector matches normalized queries"""
+        from .search import search_articles
+
+        results = list(search_articles("المكتبة"))
+        self.assertEqual(results, [self.article])
+
+
+class InvertedIndexSearchTest(TestCase):
+    """Test cases for the in-process inverted index search backend"""
+
+    def setUp(self):
+        """Set up test data"""
+        from .search import _backends
+
+        _backends.clear()
+        self.addCleanup(_backends.clear)
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.economy = Article.objects.create(
+            title="الاقتصاد اليوم",
+            slug="economy",
+            content="<p>أسعار النفط والاقتصاد العالمي</p>",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+        self.mention = Article.objects.create(
+            title="رياضة",
+            slug="sports",
+            content="الاقتصاد الرياضي",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_posting_list_stays_sorted(self):
+        """Test posting lists keep doc ids sorted on out-of-order inserts"""
+        from .inverted_index import PostingList
+
+        posting = PostingList()
+        for doc_id in (5, 9, 2, 7):
+            posting.add(doc_id, 1)
+        posting.remove(9)
+        self.assertEqual(list(posting.doc_ids), [2, 5, 7])
+
+    @override_settings(NEWS_SEARCH_BACKEND='news.search.InvertedIndexSearchBackend')
+    def test_bm25_ranks_title_match_first(self):
+        """Test normalized query ranks the title match above a content match"""
+        from .search import search_articles
+
+        results = list(search_articles("الإقتصاد"))
+        self.assertEqual(results, [self.economy, self.mention])
+
+    @override_settings(NEWS_SEARCH_BACKEND='news.search.InvertedIndexSearchBackend')
+    def test_index_follows_signals(self):
+        """Test unpublishing and deleting articles update the index"""
+        from .search import search_articles
+
+        self.assertEqual(len(search_articles("الاقتصاد")), 2)
+
+        self.mention.status = Article.Status.DRAFT
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mention.save()
+        self.assertEqual(list(search_articles("الاقتصاد")), [self.economy])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(
+                title="الاقتصاد الرقمي",
+                slug="digital",
+                content="محتوى",
+                author=self.user,
+                status=Article.Status.PUBLISHED
+            )
+        self.assertIn(article, search_articles("الرقمي"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.delete()
+        self.assertEqual(len(search_articles("الرقمي")), 0)
+
+    @override_settings(NEWS_SEARCH_BACKEND='news.search.InvertedIndexSearchBackend')
+    def test_index_rebuilds_after_changes_elsewhere(self):
+        """Test a change made by another process or by bulk import is picked up"""
+        from .cache import bump_generation
+        from .importer import ArticleImporter
+        from .search import SEARCH_GENERATION, get_search_backend, search_articles
+
+        self.assertEqual(len(search_articles("الاقتصاد")), 2)
+        backend = get_search_backend()
+
+        # عملية أخرى عدّلت مقالاً: هذه العملية لم تتلق الإشارة
+        Article.objects.filter(pk=self.mention.pk).update(content="الاقتصاد الأخضر")
+        bump_generation(SEARCH_GENERATION)
+        self.assertEqual(list(search_articles("الأخضر")), [self.mention])
+
+        # مقال محلي بعد تغيير فاتنا: لا يُضاف لفهرس قديم
+        generation = backend.generation
+        bump_generation(SEARCH_GENERATION)
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.filter(pk=self.economy.pk).get().save()
+        self.assertIsNone(backend.generation)
+        self.assertEqual(len(search_articles("الاقتصاد")), 2)
+        self.assertGreater(backend.generation, generation)
+
+        ArticleImporter().run([{"title": "الاقتصاد المستورد", "content": "نص", "author": self.user.pk}])
+        self.assertEqual(len(search_articles("المستورد")), 1)
+
+
+class CursorPaginationTest(TestCase):
+    """Test cases for keyset (cursor) pagination"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.category = Category.objects.create(name="تقنية", slug="tech", is_active=True)
+        publish = timezone.now()
+        # مقالان بنفس تاريخ النشر لاختبار فك التعادل بالرقم
+        self.articles = [
+            Article.objects.create(
+                title=f"مقال {i}",
+                slug=f"article-{i}",
+                content="محتوى",
+                author=self.user,
+                category=self.category,
+                image="articles/test.jpg",
+                publish=publish - timedelta(hours=i // 2),
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(7)
+        ]
+
+    def test_walk_forward_and_back(self):
+        """Test pages follow (publish, id) order in both directions"""
+        from .pagination import CursorPaginator
+
+        expected = list(Article.published.order_by('-publish', '-pk'))
+        paginator = CursorPaginator(Article.published.all(), 3)
+
+        first = paginator.page()
+        self.assertFalse(first.has_previous())
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third), expected)
+        self.assertFalse(third.has_next())
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(list(paginator.page(back.previous_cursor)), list(first))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Test a tampered cursor falls back to the first page"""
+        from .pagination import CursorPaginator
+
+        page = CursorPaginator(Article.published.all(), 3).page("not-a-cursor")
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_previous())
+
+    def test_malformed_cursor_values_return_first_page(self):
+        """Test cursors with values of the wrong type fall back to the first page"""
+        from .pagination import encode_cursor
+
+        payloads = [
+            ['n', ['not-a-date', 5]],
+            ['n', [{'dt': 'bad'}, 5]],
+            ['n', [[1], 5]],
+            ['n', [None, 5]],
+            ['n', [{'dt': '2024-13-45T00:00:00'}, 5]],
+            ['n', [{'dt': timezone.now().isoformat()}, 'x']],
+        ]
+        self.client.login(username='testuser', password='testpassword')
+        url = reverse('news:category_articles', kwargs={'slug': self.category.slug})
+        for direction, values in payloads:
+            with self.subTest(values=values):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps([direction, values]).encode()
+                ).decode().rstrip('=')
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.context['page_obj'].has_previous())
+                self.assertEqual(len(response.context['page_obj']), 7)
+        response = self.client.get('/', {'cursor': encode_cursor(['not-a-date', 5], 'n')})
+        self.assertEqual(response.status_code, 200)
+
+    @skipUnless(connection.vendor == 'postgresql', "requires PostgreSQL full-text search")
+    def test_search_pages_do_not_repeat_rows(self):
+        """Test the ranked search cursor keeps every row on exactly one page"""
+        from .pagination import CursorPaginator
+        from .search import search_articles
+
+        for i, article in enumerate(self.articles):
+            article.content = "خبر " * (i + 1) + "نص آخر " * (7 - i)
+            article.save()
+        paginator = CursorPaginator(search_articles("خبر"), 2)
+        page = paginator.page()
+        seen = [article.pk for article in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen += [article.pk for article in page]
+        self.assertEqual(sorted(seen), sorted(article.pk for article in self.articles))
+
+    @override_settings(NEWS_CURSOR_PAGINATION=True)
+    def test_category_view_uses_cursor_without_count(self):
+        """Test the category page paginates by cursor without COUNT(*)"""
+        self.client.login(username='testuser', password='testpassword')
+        url = reverse('news:category_articles', kwargs={'slug': self.category.slug})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page_obj'].is_cursor)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(len(response.context['page_obj']), 7)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+
+class CachedCountTest(TestCase):
+    """Test cases for cached paginator counts"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.articles = [
+            Article.objects.create(
+                title=f"مقال {i}",
+                slug=f"article-{i}",
+                content="محتوى",
+                author=self.user,
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(3)
+        ]
+
+    def count(self):
+        from .pagination import CachedCountPaginator
+
+        return CachedCountPaginator(Article.published.all(), 10, count_key='list:all').count
+
+    def test_count_is_cached(self):
+        """Test the second paginator reuses the cached count"""
+        self.assertEqual(self.count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), 3)
+
+    def test_status_change_invalidates_count(self):
+        """Test publishing or unpublishing bumps the cached count"""
+        self.assertEqual(self.count(), 3)
+
+        article = self.articles[0]
+        article.status = Article.Status.DRAFT
+        article.save()
+        self.assertEqual(self.count(), 2)
+
+        article.title = "عنوان جديد"
+        article.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), 2)
+
+        Article.objects.create(
+            title="جديد",
+            slug="new",
+            content="محتوى",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+        self.assertEqual(self.count(), 3)
+
+
+class CategoryPublishedCountTest(TestCase):
+    """Test cases for the maintained Category.published_count"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.tech = Category.objects.create(name="تقنية", slug="tech", is_active=True)
+        self.sport = Category.objects.create(name="رياضة", slug="sport", is_active=True)
+        self.article = Article.objects.create(
+            title="مقال",
+            slug="article",
+            content="محتوى",
+            author=self.user,
+            category=self.tech,
+            status=Article.Status.PUBLISHED
+        )
+
+    def assertPublished(self, tech, sport):
+        self.tech.refresh_from_db()
+        self.sport.refresh_from_db()
+        self.assertEqual((self.tech.published_count, self.sport.published_count), (tech, sport))
+
+    def test_count_follows_article_lifecycle(self):
+        """Test publish, recategorize, unpublish and delete update the count"""
+        self.assertPublished(1, 0)
+
+        article = Article.objects.get(pk=self.article.pk)
+        article.category = self.sport
+        article.save()
+        self.assertPublished(0, 1)
+
+        article.status = Article.Status.DRAFT
+        article.save()
+        self.assertPublished(0, 0)
+
+        article.status = Article.Status.PUBLISHED
+        article.save()
+        self.assertPublished(0, 1)
+
+        Article.objects.get(pk=article.pk).delete()
+        self.assertPublished(0, 0)
+
+    def test_draft_does_not_count(self):
+        """Test creating a draft leaves the count unchanged"""
+        Article.objects.create(
+            title="مسودة",
+            slug="draft",
+            content="محتوى",
+            author=self.user,
+            category=self.tech
+        )
+        self.assertPublished(1, 0)
+
+    def test_count_does_not_go_negative(self):
+        """Test unpublishing an article the counter missed keeps the count at zero"""
+        Category.objects.update(published_count=0)
+        Article.objects.get(pk=self.article.pk).delete()
+        self.assertPublished(0, 0)
+
+    def test_rebuild_command(self):
+        """Test rebuild_category_counts restores drifted counters"""
+        from django.core.management import call_command
+
+        Category.objects.update(published_count=42)
+        call_command('rebuild_category_counts', stdout=StringIO())
+        self.assertPublished(1, 0)
+
+
+class QueryBudgetTest(TestCase):
+    """Per-view query-count regression suite on a seeded dataset"""
+
+    ARTICLE_COUNT = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed a few hundred published articles across several categories"""
+        from .counters import rebuild_category_counts
+
+        cls.user = User.objects.create_user(username="reader", password="testpassword")
+        authors = [User.objects.create_user(username=f"author{i}") for i in range(5)]
+        cls.categories = [
+            Category.objects.create(name=f"تصنيف {i}", slug=f"category-{i}", is_active=True)
+            for i in range(6)
+        ]
+        Article.objects.bulk_create([
+            Article(
+                title=f"مقال رقم {i}",
+                slug=f"article-{i}",
+                content="محتوى المقال " * 20,
+                author=authors[i % len(authors)],
+                category=cls.categories[i % len(cls.categories)],
+                image="articles/seed.jpg",
+                featured=i % 7 == 0,
+                breaking_news=i % 11 == 0,
+                views=i,
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(cls.ARTICLE_COUNT)
+        ])
+        rebuild_category_counts()
+        cls.article = Article.objects.order_by('pk').first()
+        SavedArticle.objects.create(user=cls.user, article=cls.article)
+        ReaderStats.objects.create(user=cls.user, saved_count=1)
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client.login(username='reader', password='testpassword')
+
+    def requests(self):
+        slug = {'slug': self.article.slug}
+        return {
+            'news:article_list': ('get', {}, {}),
+            'news:home': ('get', {}, {}),
+            'news:article_detail': ('get', slug, {}),
+            'news:handle_reaction': ('post', slug, {'reaction_type': 'like'}),
+            'news:toggle_interaction': ('post', slug, {'reaction_type': 'like'}),
+            'news:contact': ('get', {}, {}),
+            'news:article_search': ('get', {}, {'q': 'مقال'}),
+            'news:category_articles': ('get', {'slug': self.categories[1].slug}, {}),
+            'news:unsave_artcile': ('post', slug, {}),
+            'news:saved_articles': ('get', {}, {}),
+            'news:about': ('get', {}, {}),
+            'news:export_articles': ('get', {}, {}),
+        }
+
+    def test_every_url_has_a_budget(self):
+        """Test each named URL in news.urls is covered by a budget"""
+        from .middleware import QUERY_BUDGETS
+        from .urls import urlpatterns
+
+        names = {f"news:{pattern.name}" for pattern in urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+        self.assertEqual(names, set(self.requests()))
+
+    def test_views_stay_within_budget(self):
+        """Test no view exceeds its query budget"""
+        import asyncio
+        from django.urls import resolve
+        from .middleware import QUERY_BUDGETS
+
+        for name, (method, kwargs, data) in self.requests().items():
+            with self.subTest(view=name):
+                url = reverse(name, kwargs=kwargs)
+                # الحدود للنسخ المتزامنة (WSGI) فقط، انظر news.middleware
+                self.assertFalse(asyncio.iscoroutinefunction(resolve(url).func))
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.client, method)(url, data)
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[name],
+                    "\n".join(q['sql'] for q in queries.captured_queries)
+                )
+
+    @override_settings(NEWS_QUERY_BUDGETS={'news:home': 1}, NEWS_QUERY_BUDGET_RAISE=True)
+    def test_middleware_raises_over_budget(self):
+        """Test the middleware raises when a request goes over budget"""
+        from django.conf import settings
+        from .middleware import QueryBudgetExceeded
+
+        middleware = settings.MIDDLEWARE + ['news.middleware.QueryBudgetMiddleware']
+        with self.settings(MIDDLEWARE=middleware):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('news:home'))
+
+    @override_settings(NEWS_ASYNC_VIEWS=True)
+    def test_middleware_is_not_used_with_async_views(self):
+        """Test the sync-only middleware steps aside when the async views are enabled"""
+        from django.core.exceptions import MiddlewareNotUsed
+        from .middleware import QueryBudgetMiddleware
+
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(lambda request: None)
+
+
+class WidgetCacheTest(TestCase):
+    """Test cases for cached sidebar widgets"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.category = Category.objects.create(name="تقنية", slug="tech", is_active=True)
+        self.article = Article.objects.create(
+            title="مقال مميز",
+            slug="featured",
+            content="محتوى",
+            author=self.user,
+            category=self.category,
+            featured=True,
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_widgets_are_cached(self):
+        """Test a warm widget costs no queries"""
+        from . import widgets
+
+        self.assertEqual(widgets.featured_articles(), [self.article])
+        self.assertEqual(widgets.active_categories(), [self.category])
+        with self.assertNumQueries(0):
+            self.assertEqual(widgets.featured_articles(), [self.article])
+            self.assertEqual(widgets.active_categories(), [self.category])
+
+    def test_unfeaturing_invalidates_only_affected_widgets(self):
+        """Test saving an article bumps the widgets it appears in"""
+        from . import widgets
+
+        widgets.featured_articles()
+        widgets.breaking_news()
+
+        article = Article.objects.get(pk=self.article.pk)
+        article.featured = False
+        article.save()
+
+        self.assertEqual(widgets.featured_articles(), [])
+        with self.assertNumQueries(0):
+            widgets.breaking_news()
+
+    def test_category_rename_invalidates_widgets(self):
+        """Test renaming a category refreshes the cached category list"""
+        from . import widgets
+
+        widgets.active_categories()
+        self.category.name = "علوم"
+        self.category.save()
+        self.assertEqual(widgets.active_categories()[0].name, "علوم")
+
+
+class AnonymousPageCacheTest(TestCase):
+    """Test cases for the anonymous full-page cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="مقال منشور",
+            slug="published",
+            content="محتوى",
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.PUBLISHED
+        )
+        self.url = reverse('news:article_search')
+
+    def test_anonymous_hit_skips_the_view(self):
+        """Test a repeated anonymous request is served from the cache"""
+        first = self.client.get(self.url, {'q': 'منشور', 'utm_source': 'x'})
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'q': 'منشور'})
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+
+        from news.cache import CSRF_INPUT, CSRF_PLACEHOLDER
+
+        def without_token(response):
+            return CSRF_INPUT.sub(r'\1\3', response.content.decode())
+
+        self.assertEqual(without_token(second), without_token(first))
+        self.assertNotIn(CSRF_PLACEHOLDER, second.content.decode())
+
+    def test_publishing_invalidates_pages(self):
+        """Test publishing an article bumps the page generation"""
+        self.client.get(self.url, {'q': 'جديد'})
+        draft = Article.objects.create(
+            title="مقال جديد",
+            slug="new",
+            content="محتوى",
+            author=self.user,
+            image="articles/test.jpg",
+        )
+        self.assertEqual(self.client.get(self.url, {'q': 'جديد'})['X-Page-Cache'], 'hit')
+
+        draft.status = Article.Status.PUBLISHED
+        draft.save()
+        response = self.client.get(self.url, {'q': 'جديد'})
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, "مقال جديد")
+
+    def test_category_page_is_public_and_cached(self):
+        """Test anonymous visitors get the category page, the second time from the cache"""
+        category = Category.objects.create(name="تقنية", slug="tech", is_active=True)
+        self.article.category = category
+        self.article.save()
+        url = reverse('news:category_articles', kwargs={'slug': 'tech'})
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertContains(first, "مقال منشور")
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+
+    def test_logged_in_users_bypass_cache(self):
+        """Test requests with a session are never cached"""
+        self.client.login(username='testuser', password='testpassword')
+        response = self.client.get(self.url, {'q': 'منشور'})
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+
+class SitemapTest(TestCase):
+    """Test cases for the monthly sitemap index"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.old = Article.objects.create(
+            title="مقال قديم",
+            slug="old-article",
+            content="محتوى",
+            author=self.user,
+            publish=timezone.make_aware(datetime(2024, 1, 15)),
+            status=Article.Status.PUBLISHED
+        )
+        self.recent = Article.objects.create(
+            title="خبر عاجل",
+            slug="recent-article",
+            content="محتوى",
+            author=self.user,
+            status=Article.Status.PUBLISHED
+        )
+        self.section_url = reverse('sitemap-section', kwargs={'section': '2024-01'})
+
+    def test_index_lists_news_and_month_sections(self):
+        """Test the index links the news section and one section per month"""
+        response = self.client.get(reverse('sitemap'))
+        self.assertContains(response, '/sitemap-news.xml')
+        self.assertContains(response, '/sitemap-2024-01.xml')
+        from news.sitemaps import month_section
+        self.assertContains(response, f'/sitemap-{month_section(timezone.now())}.xml')
+
+    def test_month_section_reads_only_sitemap_fields(self):
+        """Test a month section lists its articles without loading content"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.section_url)
+        self.assertContains(response, self.old.get_absolute_url())
+        self.assertNotContains(response, self.recent.get_absolute_url())
+        for query in queries.captured_queries:
+            self.assertNotIn('"content"', query['sql'])
+
+    def test_finished_month_is_cached_until_edited(self):
+        """Test a past month is served from the cache until one of its articles changes"""
+        first = self.client.get(self.section_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.section_url).content, first.content)
+
+        self.old.slug = "old-article-renamed"
+        self.old.save()
+        self.assertContains(self.client.get(self.section_url), "old-article-renamed")
+
+    def test_news_section_covers_recent_articles(self):
+        """Test the Google News section only lists the last 48 hours"""
+        response = self.client.get(reverse('sitemap-section', kwargs={'section': 'news'}))
+        self.assertContains(response, self.recent.get_absolute_url())
+        self.assertContains(response, "<news:title>خبر عاجل</news:title>")
+        self.assertNotContains(response, self.old.get_absolute_url())
+
+    def test_unknown_section_returns_404(self):
+        """Test an unknown month section is a 404"""
+        response = self.client.get(reverse('sitemap-section', kwargs={'section': '1999-01'}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ImageDerivativeTest(TestCase):
+    """Test cases for the WebP image derivatives"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media.name, NEWS_IMAGE_WIDTHS=(320, 640, 1024)
+        )
+        self.settings_override.enable()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def upload(self, width, height, name="photo.jpg"):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def create_article(self, image):
+        return Article.objects.create(
+            title="مقال مع صورة",
+            slug="with-image",
+            content="محتوى",
+            author=self.user,
+            image=image,
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_upload_creates_webp_derivatives(self):
+        """Test saving an article with an image creates the smaller WebP versions"""
+        article = self.create_article(self.upload(800, 400))
+        article.refresh_from_db()
+
+        derivatives = article.image_derivatives
+        self.assertEqual(derivatives['source'], article.image.name)
+        self.assertEqual(sorted(derivatives['widths'], key=int), ['320', '640', '800'])
+        with article.image.storage.open(derivatives['widths']['320']) as fp:
+            image = Image.open(fp)
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (320, 160))
+
+    def test_template_tags(self):
+        """Test image_src picks the closest derivative and image_srcset lists them all"""
+        from news.templatetags.news_images import image_src, image_srcset
+
+        article = self.create_article(self.upload(800, 400))
+        self.assertTrue(image_src(article, 300).endswith('-320w.webp'))
+        self.assertTrue(image_src(article, 700).endswith('-800w.webp'))
+        srcset = image_srcset(article)
+        self.assertIn('-320w.webp 320w', srcset)
+        self.assertIn('-800w.webp 800w', srcset)
+
+    def test_changed_image_replaces_derivatives(self):
+        """Test replacing the image regenerates derivatives and removes the old files"""
+        article = self.create_article(self.upload(800, 400))
+        old_paths = list(article.image_derivatives['widths'].values())
+
+        article = Article.objects.get(pk=article.pk)
+        article.image = self.upload(500, 500, name="other.jpg")
+        article.save()
+        article.refresh_from_db()
+
+        self.assertEqual(article.image_derivatives['source'], article.image.name)
+        self.assertEqual(sorted(article.image_derivatives['widths'], key=int), ['320', '500'])
+        for path in old_paths:
+            self.assertFalse(article.image.storage.exists(path))
+
+    def test_missing_image_falls_back_to_original(self):
+        """Test an image that cannot be read keeps serving the original file"""
+        from news.templatetags.news_images import image_src, image_srcset
+
+        with self.assertLogs('news.images', level='WARNING'):
+            article = self.create_article("articles/missing.jpg")
+        self.assertEqual(image_src(article, 320), article.image.url)
+        self.assertEqual(image_srcset(article), '')
+
+    def test_backfill_command(self):
+        """Test the backfill command creates derivatives for existing images"""
+        with self.settings(NEWS_IMAGE_DERIVATIVES_ON_SAVE=False):
+            article = self.create_article(self.upload(700, 350))
+        self.assertEqual(Article.objects.get(pk=article.pk).image_derivatives, {})
+
+        from django.core.management import call_command
+
+        call_command('generate_image_derivatives', stdout=StringIO())
+        article.refresh_from_db()
+        self.assertEqual(sorted(article.image_derivatives['widths'], key=int), ['320', '640', '700'])
+
+    def test_backfill_skips_unchanged_images(self):
+        """Test the backfill skips current derivatives and only touches files whose mtime changed"""
+        import os
+        from django.core.management import call_command
+
+        first = self.create_article(self.upload(700, 350))
+        second = Article.objects.create(
+            title="مقال آخر",
+            slug="other",
+            content="محتوى",
+            author=self.user,
+            image=self.upload(600, 300, name="other.jpg"),
+        )
+        widths = dict(first.image_derivatives['widths'])
+        os.utime(second.image.path, (1, 1))
+
+        out = StringIO()
+        call_command('generate_image_derivatives', workers=1, stdout=out)
+        self.assertIn('تحديث 1 لم يتغير', out.getvalue())
+        self.assertIn('وتخطي 1', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_derivatives['widths'], widths)
+        self.assertEqual(second.image_derivatives['mtime'], 1)
+
+    def test_backfill_resumes_from_checkpoint_in_parallel(self):
+        """Test the process-pool backfill resumes after the checkpointed article"""
+        import json
+        import os
+        from django.core.management import call_command
+
+        with self.settings(NEWS_IMAGE_DERIVATIVES_ON_SAVE=False):
+            articles = [
+                Article.objects.create(
+                    title=f"مقال {i}",
+                    slug=f"article-{i}",
+                    content="محتوى",
+                    author=self.user,
+                    image=self.upload(400, 200, name=f"photo{i}.jpg"),
+                )
+                for i in range(3)
+            ]
+        checkpoint = os.path.join(self.media.name, 'checkpoint.json')
+        with open(checkpoint, 'w') as fp:
+            json.dump({'last_pk': articles[0].pk}, fp)
+
+        out = StringIO()
+        call_command('generate_image_derivatives', workers=2, checkpoint=checkpoint, stdout=out)
+        self.assertIn('تم إنشاء نسخ 2 صورة', out.getvalue())
+        self.assertIn('صورة/ثانية', out.getvalue())
+        self.assertFalse(os.path.exists(checkpoint))
+        self.assertEqual(Article.objects.get(pk=articles[0].pk).image_derivatives, {})
+        for article in articles[1:]:
+            article.refresh_from_db()
+            self.assertEqual(sorted(article.image_derivatives['widths'], key=int), ['320', '400'])
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Email backend that rejects every message"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """locmem backend that counts opened connections"""
+
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ContactOutboxTest(TestCase):
+    """Test cases for the contact message outbox"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.client.login(username='testuser', password='testpassword')
+
+    def post_message(self, subject="سؤال"):
+        return self.client.post(reverse('news:contact'), {
+            'name': 'زائر',
+            'email': 'visitor@example.com',
+            'subject': subject,
+            'message': 'نص الرسالة',
+        })
+
+    def test_contact_view_queues_without_sending(self):
+        """Test the contact view stores the message instead of sending it"""
+        response = self.post_message()
+        self.assertRedirects(response, reverse('news:contact'))
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(queued.from_email, 'visitor@example.com')
+        self.assertIn('سؤال', queued.subject)
+
+    @override_settings(EMAIL_BACKEND='news.tests.CountingEmailBackend')
+    def test_dispatch_sends_batches_over_one_connection(self):
+        """Test the dispatcher drains the outbox reusing one connection per batch"""
+        for i in range(3):
+            self.post_message(f"سؤال {i}")
+        CountingEmailBackend.opened = 0
+
+        stats = dispatch(batch_size=10)
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.SENT).exists())
+        self.assertEqual(dispatch()['sent'], 0)
+
+    @override_settings(
+        EMAIL_BACKEND='news.tests.FailingEmailBackend',
+        NEWS_OUTBOX_MAX_ATTEMPTS=2, NEWS_OUTBOX_RETRY_DELAY=60,
+    )
+    def test_failures_back_off_then_dead_letter(self):
+        """Test failed messages are retried later and dead-lettered after the last attempt"""
+        self.post_message()
+        email = OutgoingEmail.objects.get()
+
+        self.assertEqual(dispatch()['retried'], 1)
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('SMTP server unavailable', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # لم يحن موعد المحاولة التالية بعد
+        self.assertEqual(dispatch(), {})
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch()['dead'], 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.Status.DEAD)
+        self.assertEqual(dispatch(), {})
+
+    def test_dispatch_command(self):
+        """Test the dispatch_outbox command sends pending messages"""
+        from django.core.management import call_command
+
+        self.post_message()
+        out = StringIO()
+        call_command('dispatch_outbox', stdout=out)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('أُرسلت 1', out.getvalue())
+
+
+class TrendingTest(TestCase):
+    """Test cases for the time-decayed trending ranking"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.old_hit = self.create_article("old-hit", views=1000)
+        self.fresh = self.create_article("fresh")
+
+    def create_article(self, slug, **kwargs):
+        return Article.objects.create(
+            title=slug,
+            slug=slug,
+            content="محتوى",
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.PUBLISHED,
+            **kwargs
+        )
+
+    def test_scores_decay_with_half_life(self):
+        """Test older events weigh less: a weight halves every half-life"""
+        from .trending import add_events, current_bucket, scores
+
+        now = current_bucket()
+        add_events({self.old_hit.pk: 10}, bucket=now - 12)
+        add_events({self.fresh.pk: 2}, bucket=now)
+        add_events({self.fresh.pk: 2}, bucket=now)
+
+        ranking = dict(scores())
+        self.assertAlmostEqual(ranking[self.old_hit.pk], 2.5)
+        self.assertAlmostEqual(ranking[self.fresh.pk], 4.0)
+        self.assertEqual([article_id for article_id, _ in scores()], [self.fresh.pk, self.old_hit.pk])
+
+    @override_settings(NEWS_VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_views_and_reactions_feed_trending(self):
+        """Test view and like events are added to the current bucket"""
+        from .models import TrendingBucket
+
+        self.client.login(username='testuser', password='testpassword')
+        self.client.get(reverse('news:article_detail', kwargs={'slug': self.fresh.slug}))
+        self.client.post(
+            reverse('news:handle_reaction', kwargs={'slug': self.fresh.slug}),
+            {'reaction_type': 'like'}
+        )
+        bucket = TrendingBucket.objects.get(article=self.fresh)
+        self.assertEqual(bucket.weight, 1 + 3)
+
+    def test_widget_is_cached_and_skips_unpublished(self):
+        """Test the trending widget is read from the cache and drops unpublished articles"""
+        from .trending import add_events
+        from . import widgets
+
+        add_events({self.old_hit.pk: 1, self.fresh.pk: 5})
+        self.assertEqual(widgets.trending_articles(), [self.fresh, self.old_hit])
+        with self.assertNumQueries(0):
+            widgets.trending_articles()
+
+        self.fresh.status = Article.Status.DRAFT
+        self.fresh.save()
+        self.assertEqual(widgets.trending_articles(), [self.old_hit])
+
+    def test_falls_back_to_most_read(self):
+        """Test the widget shows the most-read articles before any event is recorded"""
+        from . import widgets
+
+        self.assertEqual(widgets.trending_articles()[0], self.old_hit)
+
+    def test_prune_drops_expired_buckets(self):
+        """Test buckets outside the window are deleted"""
+        from .models import TrendingBucket
+        from .trending import add_events, current_bucket, prune
+
+        now = current_bucket()
+        add_events({self.fresh.pk: 1}, bucket=now - 100)
+        add_events({self.fresh.pk: 1}, bucket=now)
+        self.assertEqual(prune(), 1)
+        self.assertEqual(TrendingBucket.objects.get().bucket, now)
+
+
+@override_settings(NEWS_SHARED_CACHE=True)
+class RelatedArticlesTest(TestCase):
+    """Test cases for the content-similarity related articles"""
+
+    OIL = [
+        ("ارتفاع أسعار النفط", "ارتفعت أسعار النفط في الأسواق العالمية بعد قرار أوبك خفض الإنتاج"),
+        ("النفط يواصل الصعود", "واصلت أسعار النفط الصعود مع توقعات خفض الإنتاج في أوبك"),
+        ("أوبك تناقش الإنتاج", "تجتمع دول أوبك لمناقشة الإنتاج وأسعار النفط في الأسواق"),
+    ]
+    FOOTBALL = [
+        ("المنتخب يفوز", "فاز المنتخب في مباراة كرة القدم وتأهل إلى نهائي البطولة"),
+        ("نهائي البطولة", "يلعب المنتخب مباراة نهائي البطولة في كرة القدم الأسبوع المقبل"),
+    ]
+
+    def setUp(self):
+        """Set up test data"""
+        from . import related
+
+        related.reset_index()
+        self.addCleanup(related.reset_index)
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.oil = [self.create_article(f"oil-{i}", *text) for i, text in enumerate(self.OIL)]
+        self.football = [self.create_article(f"football-{i}", *text) for i, text in enumerate(self.FOOTBALL)]
+
+    def create_article(self, slug, title, content):
+        return Article.objects.create(
+            title=title,
+            slug=slug,
+            content=content,
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.PUBLISHED
+        )
+
+    def related_ids(self, article):
+        from .models import RelatedArticle
+
+        return list(RelatedArticle.objects.filter(article=article).order_by('-score').values_list('related_id', flat=True))
+
+    def test_rebuild_ranks_similar_articles_first(self):
+        """Test the full rebuild links articles about the same topic"""
+        from .related import rebuild
+
+        self.assertEqual(rebuild(batch_size=2), 5)
+        self.assertEqual(set(self.related_ids(self.oil[0])), {self.oil[1].pk, self.oil[2].pk})
+        self.assertEqual(self.related_ids(self.football[0]), [self.football[1].pk])
+
+    def test_detail_reads_related_with_one_query(self):
+        """Test article_detail lists the stored neighbours using one query"""
+        from .related import rebuild
+        from .views import related_articles_for
+
+        rebuild()
+        with self.assertNumQueries(1):
+            titles = [article.title for article in related_articles_for(self.oil[0])]
+        self.assertEqual(set(titles), {self.OIL[1][0], self.OIL[2][0]})
+        self.client.login(username='testuser', password='testpassword')
+        response = self.client.get(reverse('news:article_detail', kwargs={'slug': self.oil[0].slug}))
+        self.assertEqual({article.title for article in response.context['related_articles']}, set(titles))
+
+    def test_detail_falls_back_to_same_category(self):
+        """Test articles without stored neighbours show other articles from their category"""
+        category = Category.objects.create(name="اقتصاد", slug="economy", is_active=True)
+        Article.objects.filter(pk__in=[article.pk for article in self.oil[:2]]).update(category=category)
+        self.client.login(username='testuser', password='testpassword')
+        response = self.client.get(reverse('news:article_detail', kwargs={'slug': self.oil[0].slug}))
+        self.assertEqual([article.pk for article in response.context['related_articles']], [self.oil[1].pk])
+        self.assertContains(response, self.OIL[1][0])
+
+    def test_save_refreshes_only_affected_articles(self):
+        """Test editing an article updates its neighbours and the lists it joins"""
+        from .related import rebuild
+
+        rebuild()
+        article = self.football[1]
+        article.title = "أسعار النفط والمنتخب"
+        article.content = "أسعار النفط في الأسواق بعد قرار أوبك خفض الإنتاج"
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+
+        self.assertIn(self.oil[0].pk, self.related_ids(article))
+        self.assertIn(article.pk, self.related_ids(self.oil[0]))
+        self.assertNotIn(article.pk, self.related_ids(self.football[0]))
+
+    def test_unpublishing_removes_article_from_related(self):
+        """Test an unpublished article disappears from its neighbours' lists"""
+        from .related import rebuild
+
+        rebuild()
+        article = self.oil[2]
+        article.status = Article.Status.DRAFT
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+
+        self.assertEqual(self.related_ids(article), [])
+        self.assertEqual(self.related_ids(self.oil[0]), [self.oil[1].pk])
+
+    def test_save_without_index_queues_article(self):
+        """Test a save in a process with no index queues the article instead of building one"""
+        from django.core.management import call_command
+        from . import related
+        from .models import PendingRelatedRefresh
+
+        related.rebuild()
+        related.reset_index()
+        article = self.football[1]
+        article.title = "أسعار النفط والمنتخب"
+        article.content = "أسعار النفط في الأسواق بعد قرار أوبك خفض الإنتاج"
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+
+        self.assertIsNone(related._index)
+        self.assertNotIn(self.oil[0].pk, self.related_ids(article))
+        self.assertEqual(list(PendingRelatedRefresh.objects.values_list('article_id', flat=True)), [article.pk])
+
+        call_command('build_related_articles', '--pending', stdout=StringIO())
+        self.assertIn(self.oil[0].pk, self.related_ids(article))
+        self.assertFalse(PendingRelatedRefresh.objects.exists())
+
+    def test_stale_index_is_not_used(self):
+        """Test a save does not write neighbours from an index older than the last write"""
+        from . import related
+        from .cache import bump_generation
+        from .models import PendingRelatedRefresh
+
+        related.rebuild()
+        # عملية أخرى كتبت بعد بناء هذا الفهرس
+        bump_generation(related.RELATED_GENERATION)
+        article = self.oil[2]
+        article.status = Article.Status.DRAFT
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+
+        self.assertIsNone(related._index)
+        self.assertIn(article.pk, self.related_ids(self.oil[0]))
+        self.assertTrue(PendingRelatedRefresh.objects.filter(article_id=article.pk).exists())
+
+    def test_similarity_is_cosine(self):
+        """Test identical documents score 1 and unrelated ones are excluded"""
+        from collections import Counter
+        from .related import SimilarityIndex
+
+        index = SimilarityIndex(min_df=1)
+        index.fit([
+            (1, Counter({'نفط': 2, 'اسعار': 1})),
+            (2, Counter({'نفط': 2, 'اسعار': 1})),
+            (3, Counter({'مباراه': 1})),
+        ])
+        neighbours = index.neighbours([1], 5)[1]
+        self.assertEqual([article_id for article_id, _ in neighbours], [2])
+        self.assertAlmostEqual(neighbours[0][1], 1.0, places=5)
+
+
+class ArticleExcerptTest(TestCase):
+    """Test cases for the stored excerpt and deferred content in listings"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="مقال طويل",
+            slug="long-article",
+            content="<p>بداية   المقال &amp; تفاصيله</p>" + "<p>فقرة طويلة</p>" * 200,
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_excerpt_is_computed_on_save(self):
+        """Test the excerpt is plain text and follows content changes"""
+        from .models import EXCERPT_LENGTH
+
+        self.assertTrue(self.article.excerpt.startswith("بداية المقال & تفاصيله فقرة"))
+        self.assertLessEqual(len(self.article.excerpt), EXCERPT_LENGTH)
+        self.assertNotIn("<p>", self.article.excerpt)
+
+        self.article.content = "نص جديد"
+        self.article.save(update_fields=['content'])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.excerpt, "نص جديد")
+
+    def test_listing_does_not_load_content(self):
+        """Test listing pages never select the content column"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('news:article_list'))
+        self.assertContains(response, "بداية المقال")
+        article_queries = [q['sql'] for q in queries.captured_queries if 'news_article' in q['sql']]
+        self.assertTrue(article_queries)
+        for sql in article_queries:
+            self.assertNotIn('"news_article"."content"', sql)
+
+    def test_update_excerpts_command(self):
+        """Test the backfill command fills missing excerpts"""
+        from django.core.management import call_command
+
+        Article.objects.filter(pk=self.article.pk).update(excerpt='')
+        out = StringIO()
+        call_command('update_excerpts', '--missing-only', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.article.refresh_from_db()
+        self.assertTrue(self.article.excerpt.startswith("بداية المقال"))
+
+    def test_migration_backfills_excerpts(self):
+        """Test the excerpt migration fills the column for existing articles"""
+        from importlib import import_module
+        from django.apps import apps
+
+        Article.objects.filter(pk=self.article.pk).update(excerpt='')
+        import_module('news.migrations.0025_article_excerpt').populate_excerpts(apps, None)
+        self.article.refresh_from_db()
+        self.assertTrue(self.article.excerpt.startswith("بداية المقال"))
+
+
+class ListingIndexTest(TestCase):
+    """EXPLAIN-based checks that listing queries read a matching index"""
+
+    ARTICLE_COUNT = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed enough rows for the planner to prefer an index over a full scan"""
+        author = User.objects.create_user(username="author")
+        cls.categories = [
+            Category.objects.create(name=f"تصنيف {i}", slug=f"category-{i}", is_active=True)
+            for i in range(40)
+        ]
+        now = timezone.now()
+        Article.objects.bulk_create([
+            Article(
+                title=f"مقال رقم {i}",
+                slug=f"article-{i}",
+                content="محتوى المقال " * 20,
+                author=author,
+                category=cls.categories[i % len(cls.categories)],
+                publish=now - timedelta(minutes=i),
+                featured=i % 13 == 0,
+                breaking_news=i % 17 == 0,
+                views=i % 50,
+                status=Article.Status.PUBLISHED if i % 5 else Article.Status.DRAFT
+            )
+            for i in range(cls.ARTICLE_COUNT)
+        ], batch_size=500)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE news_article')
+
+    def assertUsesIndex(self, queryset, index):
+        """The article table is read through ``index`` and nothing is sorted"""
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan on news_article', plan)
+            self.assertNotIn('Sort', plan)
+        else:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_published_listing(self):
+        """Test article_list and its cursor pages read the published index"""
+        articles = Article.published.cards().order_by('-publish', '-pk')
+        self.assertUsesIndex(articles[:10], 'news_article_published_idx')
+        self.assertUsesIndex(
+            articles.filter(publish__lt=timezone.now() - timedelta(hours=10))[:10],
+            'news_article_published_idx',
+        )
+
+    def test_category_listing(self):
+        """Test category_articles reads the category index"""
+        articles = Article.published.cards().filter(category=self.categories[3])
+        self.assertUsesIndex(articles[:12], 'news_article_category_idx')
+
+    def test_widget_queries(self):
+        """Test the featured, breaking and most-read widgets use their partial indexes"""
+        from .widgets import _cards
+
+        self.assertUsesIndex(
+            _cards().filter(featured=True).order_by('-publish')[:6], 'news_article_featured_idx',
+        )
+        self.assertUsesIndex(
+            _cards().filter(breaking_news=True).order_by('-publish')[:6], 'news_article_breaking_idx',
+        )
+        self.assertUsesIndex(
+            _cards().filter(views__gte=1).order_by('-views')[:5], 'news_article_views_idx',
+        )
+
+    def test_saved_articles_page(self):
+        """Test the saved articles page reads the (user, saved_at, id) index"""
+        from .models import SAVED_CARD_FIELDS
+
+        readers = [User.objects.create_user(username=f"reader{i}") for i in range(30)]
+        articles = list(Article.objects.order_by('pk').values_list('pk', flat=True)[:300])
+        now = timezone.now()
+        SavedArticle.objects.bulk_create([
+            SavedArticle(user=reader, article_id=article_id)
+            for reader in readers for article_id in articles
+        ], batch_size=1000)
+        SavedArticle.objects.update(saved_at=now)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE news_savedarticle')
+        saved = SavedArticle.objects.filter(user=readers[4]).select_related(
+            'article', 'article__category',
+        ).only(*SAVED_CARD_FIELDS).order_by('-saved_at', '-pk')
+        self.assertUsesIndex(saved[:13], 'news_saved_user_idx')
+        self.assertUsesIndex(
+            saved.filter(Q(saved_at__lt=now) | Q(saved_at=now, pk__lt=5000))[:13], 'news_saved_user_idx',
+        )
+
+
+class ArticleImportTest(TestCase):
+    """Test cases for the streaming import_articles command"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username="editor", password="testpassword")
+        self.category = Category.objects.create(name="اقتصاد", slug="economy", is_active=True)
+        Article.objects.create(
+            title="موجود",
+            slug="artfaa-asaar-alnft",
+            content="محتوى",
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.DRAFT
+        )
+
+    def import_file(self, text, *args):
+        from django.core.management import call_command
+
+        path = tempfile.mktemp(suffix='.json')
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.write(text)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        out, err = StringIO(), StringIO()
+        call_command('import_articles', path, '--batch-size', '2', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        """Test NDJSON records are imported with lookups, slugs and excerpts"""
+        import json
+
+        records = [
+            {"title": "ارتفاع أسعار النفط", "content": "<p>نص</p>", "category": "economy", "author": "editor"},
+            {"title": "ارتفاع أسعار النفط", "content": "نص آخر", "category": "اقتصاد", "author": "editor"},
+            {"title": "خبر بدون كاتب", "content": "نص", "author": "missing"},
+            {"title": "مسودة", "content": "نص", "author": self.user.pk, "status": "DF",
+             "publish": "2024-01-05T10:00:00"},
+        ]
+        out, err = self.import_file("\n".join(json.dumps(r, ensure_ascii=False) for r in records))
+
+        self.assertIn("3", out)
+        self.assertIn("missing", err)
+        slugs = set(Article.objects.filter(title="ارتفاع أسعار النفط").values_list('slug', flat=True))
+        self.assertEqual(slugs, {"artfaa-asaar-alnft-2", "artfaa-asaar-alnft-3"})
+        article = Article.objects.get(slug="artfaa-asaar-alnft-2")
+        self.assertEqual(article.excerpt, "نص")
+        self.assertEqual(article.category, self.category)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_count, 2)
+        self.assertEqual(Article.objects.get(title="مسودة").status, Article.Status.DRAFT)
+
+    def test_import_dumpdata_array(self):
+        """Test a dumpdata-style JSON array is streamed and other models are ignored"""
+        import json
+
+        records = [
+            {"model": "auth.user", "pk": 99, "fields": {"username": "x"}},
+            {"model": "news.article", "pk": 1, "fields": {
+                "title": "Breaking", "content": "text", "author": self.user.pk,
+                "category": self.category.pk, "featured": True}},
+        ]
+        self.import_file(json.dumps(records, indent=2))
+        article = Article.objects.get(title="Breaking")
+        self.assertEqual(article.slug, "breaking")
+        self.assertTrue(article.featured)
+
+    def test_json_array_parser_reads_in_chunks(self):
+        """Test the streaming parser matches json.loads for any chunk size"""
+        import json
+        from .importer import iter_json_array
+
+        data = [{"title": "عنوان", "views": 12345, "tags": [1, 2, {"a": "]"}]}, 7, "x, y", None, 1.5e3]
+        text = json.dumps(data, ensure_ascii=False)
+        for chunk_size in (1, 3, 7, 1024):
+            self.assertEqual(list(iter_json_array(StringIO(text), chunk_size=chunk_size)), data)
+        self.assertEqual(list(iter_json_array(StringIO(" [ ] "))), [])
+
+    def test_records_with_wrong_types_are_skipped(self):
+        """Test records with non-string titles, numeric dates or list lookups are skipped"""
+        import json
+
+        records = [
+            {"title": 5, "author": "editor"},
+            {"title": "تاريخ رقمي", "author": "editor", "publish": 1700000000},
+            {"title": "تاريخ خاطئ", "author": "editor", "publish": "2024-13-45T10:00:00"},
+            {"title": "كاتب قائمة", "author": ["editor"]},
+            {"title": "تصنيف كائن", "author": "editor", "category": {"slug": "economy"}},
+            {"title": "مشاهدات نصية", "author": "editor", "views": "كثير"},
+            {"title": "سليم", "content": "نص", "author": "editor", "category": "economy"},
+        ]
+        out, err = self.import_file("\n".join(json.dumps(r, ensure_ascii=False) for r in records))
+
+        self.assertEqual(err.count("السجل"), 6)
+        self.assertEqual(list(Article.published.values_list('title', flat=True)), ["سليم"])
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_count, 1)
+
+    def test_finish_runs_when_import_stops(self):
+        """Test category counts are rebuilt for the batches saved before a parse error"""
+        from django.core.management.base import CommandError
+
+        lines = [
+            '{"title": "أول", "author": "editor", "category": "economy"}',
+            '{"title": "ثان", "author": "editor", "category": "economy"}',
+            '{"title": ',
+        ]
+        with self.assertRaises(CommandError):
+            self.import_file("\n".join(lines))
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_count, 2)
+
+
+class ArticleExportTest(TestCase):
+    """Test cases for the streaming article export"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.staff = User.objects.create_user(username="staff", password="testpassword", is_staff=True)
+        self.user = User.objects.create_user(username="reader", password="testpassword")
+        self.category = Category.objects.create(name="رياضة", slug="sports", is_active=True)
+        now = timezone.now()
+        for i, (status, category, age) in enumerate([
+            (Article.Status.PUBLISHED, self.category, 1),
+            (Article.Status.PUBLISHED, None, 2),
+            (Article.Status.DRAFT, self.category, 3),
+            (Article.Status.PUBLISHED, self.category, 40),
+        ]):
+            Article.objects.create(
+                title=f"مقال، رقم {i}",
+                slug=f"article-{i}",
+                content=f"<p>محتوى \"{i}\"</p>",
+                author=self.staff,
+                category=category,
+                image="articles/test.jpg",
+                publish=now - timedelta(days=age),
+                status=status
+            )
+
+    def export(self, **params):
+        self.client.login(username='staff', password='testpassword')
+        response = self.client.get(reverse('news:export_articles'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_is_staff_only(self):
+        """Test non-staff users cannot export"""
+        self.client.login(username='reader', password='testpassword')
+        response = self.client.get(reverse('news:export_articles'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_export_with_filters(self):
+        """Test CSV rows respect the status, category and date filters"""
+        import csv
+
+        since = (timezone.localdate() - timedelta(days=10)).isoformat()
+        response, body = self.export(status='PB', category='sports', since=since)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.decode('utf-8').splitlines()))
+        self.assertEqual([row['slug'] for row in rows], ['article-0'])
+        self.assertEqual(rows[0]['title'], "مقال، رقم 0")
+        self.assertEqual(rows[0]['category'], 'sports')
+        self.assertEqual(rows[0]['author'], 'staff')
+        self.assertEqual(rows[0]['content'], '<p>محتوى "0"</p>')
+
+    def test_gzip_ndjson_export(self):
+        """Test gzip NDJSON export can be read back line by line"""
+        import gzip
+        import json
+
+        response, body = self.export(format='ndjson', gzip='on', without_content='on')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        records = [json.loads(line) for line in gzip.decompress(body).decode('utf-8').splitlines()]
+        self.assertEqual(len(records), 4)
+        self.assertNotIn('content', records[0])
+        self.assertEqual(records[0]['excerpt'], 'محتوى "0"')
+
+    def test_invalid_filters(self):
+        """Test invalid filters are rejected by both the view and the command"""
+        from django.core.management import CommandError, call_command
+
+        self.client.login(username='staff', password='testpassword')
+        response = self.client.get(reverse('news:export_articles'), {'category': 'missing'})
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(CommandError):
+            call_command('export_articles', '--since', '2024-02-01', '--until', '2024-01-01')
+
+    def test_export_command_writes_file(self):
+        """Test the command streams NDJSON to a file"""
+        import json
+        from django.core.management import call_command
+
+        path = tempfile.mktemp(suffix='.ndjson')
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        call_command('export_articles', '--format', 'ndjson', '--status', 'DF', '-o', path, stdout=StringIO())
+        with open(path, encoding='utf-8') as fp:
+            records = [json.loads(line) for line in fp]
+        self.assertEqual([record['slug'] for record in records], ['article-2'])
+
+
+class SlugCacheTest(TestCase):
+    """Test cases for the in-process slug to article cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        from .slugs import slug_cache
+
+        slug_cache.clear()
+        self.addCleanup(slug_cache.clear)
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.articles = [
+            Article.objects.create(
+                title=f"مقال {i}",
+                slug=f"article-{i}",
+                content="محتوى",
+                author=self.user,
+                image="articles/test.jpg",
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(3)
+        ]
+
+    @override_settings(NEWS_SLUG_CACHE_SIZE=2)
+    def test_lru_eviction_and_stats(self):
+        """Test the least recently used slug is evicted and counted"""
+        from .slugs import resolve, slug_cache
+
+        resolve("article-0")
+        resolve("article-1")
+        resolve("article-0")
+        with self.assertNumQueries(1):
+            resolve("article-2")
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve("article-0").pk, self.articles[0].pk)
+        stats = slug_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 3, 1))
+        self.assertEqual(stats['size'], 2)
+
+    @override_settings(NEWS_SLUG_CACHE_TTL=0)
+    def test_entries_expire(self):
+        """Test entries older than the TTL are looked up again"""
+        from .slugs import resolve, slug_cache
+
+        resolve("article-0")
+        with self.assertNumQueries(1):
+            resolve("article-0")
+        self.assertEqual(slug_cache.stats()['expirations'], 1)
+
+    @override_settings(NEWS_SLUG_CACHE_LOG_EVERY=0)
+    def test_stats_logging_can_be_disabled(self):
+        """Test a zero log interval disables the stats log instead of failing"""
+        from .slugs import resolve
+
+        self.assertEqual(resolve("article-0").pk, self.articles[0].pk)
+        self.assertEqual(resolve("article-0").pk, self.articles[0].pk)
+
+    def test_slug_and_status_changes_invalidate(self):
+        """Test saving a new slug or status drops the cached entries"""
+        from .slugs import resolve
+
+        article = self.articles[0]
+        self.assertEqual(resolve("article-0").status, Article.Status.PUBLISHED)
+        article.status = Article.Status.DRAFT
+        article.save()
+        self.assertEqual(resolve("article-0").status, Article.Status.DRAFT)
+        article.slug = "renamed"
+        article.save()
+        self.assertIsNone(resolve("article-0"))
+        self.assertEqual(resolve("renamed").pk, article.pk)
+
+    def test_detail_recovers_from_stale_entry(self):
+        """Test a slug changed without signals (another process) is re-resolved"""
+        from .slugs import resolve
+
+        resolve("article-1")
+        Article.objects.filter(pk=self.articles[1].pk).update(slug="moved")
+        self.client.login(username='testuser', password='testpassword')
+        response = self.client.get(reverse('news:article_detail', kwargs={'slug': "article-1"}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('news:article_detail', kwargs={'slug': "moved"}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_reaction_does_not_load_article_row(self):
+        """Test handle_reaction only needs the cached article id"""
+        from .slugs import resolve
+
+        resolve("article-2")
+        self.client.login(username='testuser', password='testpassword')
+        url = reverse('news:handle_reaction', kwargs={'slug': "article-2"})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {'reaction_type': 'like'})
+        self.assertFalse(any('"news_article"."content"' in q['sql'] for q in queries.captured_queries))
+        self.articles[2].refresh_from_db()
+        self.assertEqual(self.articles[2].like_count, 1)
+
+
+@override_settings(NEWS_ASYNC_PARALLEL_QUERIES=False)
+class AsyncViewsTest(TestCase):
+    """Test cases for the ASGI versions of the read views"""
+
+    def setUp(self):
+        """Route the read views to news.async_views"""
+        from django.core.cache import cache
+        from .management.commands.benchmark_views import use_async_views
+
+        cache.clear()
+        use_async_views(True)
+        self.addCleanup(use_async_views, False)
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.category = Category.objects.create(name="اقتصاد", slug="economy", is_active=True)
+        self.article = Article.objects.create(
+            title="ارتفاع أسعار النفط",
+            slug="oil-prices",
+            content="ارتفعت أسعار النفط اليوم",
+            author=self.user,
+            category=self.category,
+            image="articles/test.jpg",
+            featured=True,
+            status=Article.Status.PUBLISHED
+        )
+
+    def test_urls_use_async_views(self):
+        """Test the read URLs resolve to coroutine views"""
+        import asyncio
+        from django.urls import resolve
+
+        for url in ('/', '/search/', f'/article/{self.article.slug}/'):
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func), url)
+
+    async def test_article_list_and_search(self):
+        """Test the async list and search pages render the same articles"""
+        response = await self.async_client.get(reverse('news:article_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "ارتفعت أسعار النفط")
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+        response = await self.async_client.get(reverse('news:article_search'), {'q': 'النفط'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page_obj']), [self.article])
+
+    async def test_article_detail(self):
+        """Test the async detail page requires login and shows the user state"""
+        from asgiref.sync import sync_to_async
+
+        url = reverse('news:article_detail', kwargs={'slug': self.article.slug})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        await SavedArticle.objects.acreate(user=self.user, article=self.article)
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['si_saved'])
+        self.assertIsNone(response.context['user_reaction'])
+        self.assertContains(response, "ارتفعت أسعار النفط اليوم")
+
+        response = await self.async_client.get(reverse('news:article_detail', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(NEWS_ASYNC_PARALLEL_QUERIES=True, NEWS_ASYNC_QUERY_THREADS=2)
+    async def test_parallel_queries_use_bounded_threads(self):
+        """Test parallel queries share a fixed pool of threads (one connection each)"""
+        import asyncio
+        import threading
+        import time
+        from . import async_views
+
+        async_views._executor = None
+        self.addCleanup(setattr, async_views, '_executor', None)
+
+        def thread_name():
+            time.sleep(0.01)
+            return threading.current_thread().name
+
+        names = await asyncio.gather(*[async_views.run_query(thread_name) for _ in range(10)])
+        async_views._executor.shutdown()
+        self.assertEqual(len(set(names)), 2)
+        self.assertTrue(all(name.startswith('news-query') for name in names))
+
+
+@skipUnless(connection.vendor == 'postgresql', "requires concurrent connections")
+class AsyncParallelQueriesTest(TransactionTestCase):
+    """Test the async views with queries running in separate threads"""
+
+    def setUp(self):
+        """Set up committed test data visible to every thread"""
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        for i in range(3):
+            Article.objects.create(
+                title=f"خبر رقم {i}",
+                slug=f"article-{i}",
+                content="محتوى الخبر",
+                author=self.user,
+                image="articles/test.jpg",
+                featured=True,
+                status=Article.Status.PUBLISHED
+            )
+
+    def test_benchmark_compares_wsgi_and_asgi(self):
+        """Test the benchmark runs both paths without errors"""
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command(
+            'benchmark_views', '--requests', '6', '--concurrency', '3',
+            '--path', '/', '--path', '/search/?q=خبر', '--path', '/article/article-1/',
+            '--username', 'testuser', stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn('wsgi: p50', output)
+        self.assertIn('asgi: p50', output)
+        self.assertEqual(output.count('أخطاء 0'), 2, output)
+
+
+class ToggleInteractionTest(TestCase):
+    """Test cases for the JSON like/dislike/save toggle endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        from .slugs import slug_cache
+
+        slug_cache.clear()
+        self.addCleanup(slug_cache.clear)
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.article = Article.objects.create(
+            title="مقال للتبديل",
+            slug="toggled-article",
+            content="محتوى",
+            author=self.user,
+            image="articles/test.jpg",
+            status=Article.Status.PUBLISHED
+        )
+        self.url = reverse('news:toggle_interaction', kwargs={'slug': self.article.slug})
+        self.client.login(username='testuser', password='testpassword')
+
+    def toggle(self, action):
+        response = self.client.post(self.url, {'reaction_type': action})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_reaction_toggle_returns_state_and_counts(self):
+        """Test like, switch to dislike and remove, with counts in the response"""
+        data = self.toggle('like')
+        self.assertEqual(
+            (data['reaction'], data['active'], data['like_count'], data['dislike_count']),
+            ('like', True, 1, 0),
+        )
+        data = self.toggle('dislike')
+        self.assertEqual((data['reaction'], data['like_count'], data['dislike_count']), ('dislike', 0, 1))
+        data = self.toggle('dislike')
+        self.assertEqual((data['reaction'], data['active'], data['dislike_count']), (None, False, 0))
+        self.assertFalse(Reaction.objects.filter(article=self.article).exists())
+
+    def test_save_toggle(self):
+        """Test saving and unsaving through the endpoint"""
+        self.assertTrue(self.toggle('save')['saved'])
+        self.assertTrue(SavedArticle.objects.filter(user=self.user, article=self.article).exists())
+        self.assertFalse(self.toggle('save')['saved'])
+        self.assertFalse(SavedArticle.objects.filter(user=self.user, article=self.article).exists())
+
+    def test_does_not_render_or_count_a_view(self):
+        """Test the toggle skips the detail page and its view counter"""
+        from .counters import view_counter
+
+        pending = view_counter.pending(self.article.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.toggle('like')
+        self.assertFalse(any('"news_article"."content"' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(view_counter.pending(self.article.pk), pending)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 0)
+
+    def test_handle_reaction_uses_the_same_toggle(self):
+        """Test the form fallback and the endpoint share one state"""
+        self.client.post(reverse('news:handle_reaction', kwargs={'slug': self.article.slug}), {'reaction_type': 'like'})
+        data = self.toggle('like')
+        self.assertEqual((data['reaction'], data['like_count']), (None, 0))
+
+    def test_rejects_anonymous_get_and_unknown_action(self):
+        """Test login, method and action validation"""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        response = self.client.post(self.url, {'reaction_type': 'share'})
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.post(self.url, {'reaction_type': 'like'})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Reaction.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "requires concurrent writers")
+class ToggleConcurrencyTest(TransactionTestCase):
+    """Test simultaneous toggles from the same user keep rows and counters consistent"""
+
+    def test_double_click(self):
+        """Test two concurrent toggles cancel out without errors"""
+        import threading
+        from django.db import close_old_connections
+        from .interactions import toggle_reaction, toggle_saved
+
+        user = User.objects.create_user(username="testuser")
+        article = Article.objects.create(
+            title="مقال", slug="double-click", content="محتوى", author=user,
+            status=Article.Status.PUBLISHED
+        )
+        for toggle in (lambda: toggle_reaction(user.pk, article.pk, 'like'),
+                       lambda: toggle_saved(user.pk, article.pk)):
+            barrier = threading.Barrier(2)
+            errors = []
+
+            def click():
+                try:
+                    barrier.wait()
+                    toggle()
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    close_old_connections()
+
+            threads = [threading.Thread(target=click) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+
+        article.refresh_from_db()
+        self.assertEqual(article.like_count, Reaction.objects.filter(article=article).count())
+        self.assertEqual(article.like_count, 0)
+        self.assertFalse(SavedArticle.objects.exists())
+
+
+class SavedArticlesPageTest(TestCase):
+    """Test cases for the keyset-paginated saved articles page"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+        from .slugs import slug_cache
+
+        cache.clear()
+        slug_cache.clear()
+        self.addCleanup(slug_cache.clear)
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.categories = [
+            Category.objects.create(name=f"تصنيف {i}", slug=f"category-{i}", is_active=True)
+            for i in range(2)
+        ]
+        self.articles = [
+            Article.objects.create(
+                title=f"مقال محفوظ {i}",
+                slug=f"saved-{i}",
+                content="<p>محتوى المقال المحفوظ</p>",
+                author=self.user,
+                category=self.categories[i % 2],
+                image="articles/test.jpg",
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(15)
+        ]
+        self.client.login(username='testuser', password='testpassword')
+        for article in self.articles:
+            self.client.post(reverse('news:toggle_interaction', kwargs={'slug': article.slug}), {'reaction_type': 'save'})
+        self.url = reverse('news:saved_articles')
+
+    def test_pages_follow_saved_order(self):
+        """Test cursor pages cover every saved article newest first"""
+        response = self.client.get(self.url)
+        page = response.context['saved_articles']
+        self.assertTrue(page.is_cursor)
+        titles = [saved.article.title for saved in page]
+        self.assertEqual(len(titles), 12)
+        self.assertEqual(titles[0], "مقال محفوظ 14")
+        response = self.client.get(self.url, {'cursor': page.next_cursor})
+        titles += [saved.article.title for saved in response.context['saved_articles']]
+        self.assertEqual(titles, [f"مقال محفوظ {i}" for i in reversed(range(15))])
+        self.assertEqual(response.context['saved_count'], 15)
+
+    def test_only_card_columns_are_loaded(self):
+        """Test the article content is not selected"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        sql = ' '.join(q['sql'] for q in queries.captured_queries)
+        self.assertIn('"news_article"."excerpt"', sql)
+        self.assertNotIn('"news_article"."content"', sql)
+        self.assertNotIn('COUNT(', sql.upper())
+
+    def test_category_filter(self):
+        """Test filtering by category keeps the total count"""
+        response = self.client.get(self.url, {'category': 'category-1'})
+        page = response.context['saved_articles']
+        self.assertEqual({saved.article.category.slug for saved in page}, {'category-1'})
+        self.assertEqual(len(page), 7)
+        self.assertEqual(response.context['saved_count'], 15)
+        self.assertEqual(self.client.get(self.url, {'category': 'missing'}).status_code, 404)
+
+    def test_counter_follows_unsave_and_article_delete(self):
+        """Test the stored counter through unsave, toggles and cascaded deletes"""
+        self.client.post(reverse('news:unsave_artcile', kwargs={'slug': 'saved-0'}))
+        self.assertEqual(ReaderStats.objects.get(user=self.user).saved_count, 14)
+        self.articles[1].delete()
+        self.assertEqual(ReaderStats.objects.get(user=self.user).saved_count, 13)
+        self.assertEqual(SavedArticle.objects.filter(user=self.user).count(), 13)
+        response = self.client.post(reverse('news:unsave_artcile', kwargs={'slug': 'saved-0'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_counter_does_not_go_negative(self):
+        """Test unsaving rows written outside the counters (e.g. admin) keeps the counter at zero"""
+        ReaderStats.objects.filter(user=self.user).update(saved_count=0)
+        self.client.post(reverse('news:unsave_artcile', kwargs={'slug': 'saved-0'}))
+        self.assertEqual(ReaderStats.objects.get(user=self.user).saved_count, 0)
+        self.articles[1].delete()
+        self.assertEqual(ReaderStats.objects.get(user=self.user).saved_count, 0)
+
+    def test_rebuild_command(self):
+        """Test rebuild_saved_counts restores drifted counters"""
+        from django.core.management import call_command
+
+        ReaderStats.objects.filter(user=self.user).update(saved_count=99)
+        other = User.objects.create_user(username="other")
+        ReaderStats.objects.create(user=other, saved_count=5)
+        call_command('rebuild_saved_counts', stdout=StringIO())
+        self.assertEqual(ReaderStats.objects.get(user=self.user).saved_count, 15)
+        self.assertEqual(ReaderStats.objects.get(user=other).saved_count, 0)
+
+
+@override_settings(NEWS_SHARED_CACHE=True)
+class InteractionStateTest(TestCase):
+    """Test cases for the cached per-user saved/reacted article id sets"""
+
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+        from .counters import rebuild_reaction_counts
+        from .slugs import slug_cache
+
+        cache.clear()
+        slug_cache.clear()
+        self.addCleanup(slug_cache.clear)
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.category = Category.objects.create(name="تقنية", slug="tech", is_active=True)
+        self.articles = [
+            Article.objects.create(
+                title=f"مقال {i}",
+                slug=f"article-{i}",
+                content="محتوى",
+                author=self.user,
+                category=self.category,
+                image="articles/test.jpg",
+                status=Article.Status.PUBLISHED
+            )
+            for i in range(4)
+        ]
+        SavedArticle.objects.create(user=self.user, article=self.articles[0])
+        Reaction.objects.create(user=self.user, article=self.articles[0], reaction_type='like')
+        Reaction.objects.create(user=self.user, article=self.articles[1], reaction_type='dislike')
+        rebuild_reaction_counts()
+        self.client.login(username='testuser', password='testpassword')
+
+    def test_sorted_ids(self):
+        """Test membership, in-place updates and the bytes round trip"""
+        from .interactions import SortedIds
+
+        ids = SortedIds([30, 10, 20, 10])
+        self.assertEqual(list(ids), [10, 20, 30])
+        ids.add(15)
+        ids.add(15)
+        ids.discard(30)
+        ids.discard(99)
+        self.assertEqual(list(ids), [10, 15, 20])
+        self.assertIn(15, ids)
+        self.assertNotIn(30, ids)
+        self.assertEqual(list(SortedIds.frombytes(ids.tobytes())), [10, 15, 20])
+
+    def test_loaded_in_one_query_then_cached(self):
+        """Test the state comes from one query and then from the cache"""
+        from .interactions import get_state
+
+        with self.assertNumQueries(1):
+            state = get_state(self.user.pk)
+        with self.assertNumQueries(0):
+            state = get_state(self.user.pk)
+        self.assertTrue(state.is_saved(self.articles[0].pk))
+        self.assertFalse(state.is_saved(self.articles[1].pk))
+        self.assertEqual(state.reaction(self.articles[0].pk), 'like')
+        self.assertEqual(state.reaction(self.articles[1].pk), 'dislike')
+        self.assertIsNone(state.reaction(self.articles[2].pk))
+
+    def test_toggles_update_cached_state(self):
+        """Test the cached state follows toggles without reloading"""
+        from .interactions import get_state
+
+        get_state(self.user.pk)
+        url = reverse('news:toggle_interaction', kwargs={'slug': self.articles[2].slug})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'reaction_type': 'save'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'reaction_type': 'like'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('news:toggle_interaction', kwargs={'slug': self.articles[1].slug}),
+                {'reaction_type': 'like'},
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('news:unsave_artcile', kwargs={'slug': self.articles[0].slug}))
+
+        with self.assertNumQueries(0):
+            state = get_state(self.user.pk)
+        self.assertEqual(list(state.saved), [self.articles[2].pk])
+        self.assertEqual(state.reaction(self.articles[2].pk), 'like')
+        self.assertEqual(state.reaction(self.articles[1].pk), 'like')
+        self.assertEqual(list(state.disliked), [])
+
+    @override_settings(NEWS_SHARED_CACHE=False)
+    def test_state_is_not_cached_in_process_local_cache(self):
+        """Test a per-process cache never serves a state another worker may have changed"""
+        from django.core.cache import cache
+        from .cache import generation_timeout, get_generation
+        from .interactions import _generation_name, _state_key, get_state
+
+        get_state(self.user.pk)
+        # عملية أخرى حفظت المقال
+        SavedArticle.objects.create(user=self.user, article=self.articles[3])
+        with self.assertNumQueries(1):
+            self.assertTrue(get_state(self.user.pk).is_saved(self.articles[3].pk))
+        generation = get_generation(_generation_name(self.user.pk))
+        self.assertIsNone(cache.get(_state_key(self.user.pk, generation)))
+        self.assertEqual(generation_timeout(600), 5)
+        self.assertEqual(generation_timeout(None), 5)
+        with self.settings(NEWS_SHARED_CACHE=True):
+            self.assertEqual(generation_timeout(600), 600)
+
+    def test_state_loaded_before_toggle_is_not_served(self):
+        """Test a state read from the database before a toggle commits is never served after it"""
+        from django.core.cache import cache
+        from .cache import get_generation
+        from .interactions import _generation_name, _state_key, get_state, load_state
+
+        # طلب بطيء: قرأ الجيل والحالة قبل التبديل وخزنها بعده
+        generation = get_generation(_generation_name(self.user.pk))
+        stale = load_state(self.user.pk)
+        url = reverse('news:toggle_interaction', kwargs={'slug': self.articles[2].slug})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'reaction_type': 'save'})
+        cache.add(_state_key(self.user.pk, generation), stale.dumps())
+
+        self.assertTrue(get_state(self.user.pk).is_saved(self.articles[2].pk))
+
+    def test_detail_reads_state_without_queries(self):
+        """Test article_detail answers the buttons from the cached state"""
+        from .interactions import get_state
+
+        get_state(self.user.pk)
+        url = reverse('news:article_detail', kwargs={'slug': self.articles[0].slug})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any(
+            'news_savedarticle' in q['sql'] or 'news_reaction' in q['sql'] for q in queries.captured_queries
+        ))
+        self.assertEqual(response.context['user_reaction'], 'like')
+        self.assertTrue(response.context['si_saved'])
+
+    def test_listing_shows_badges(self):
+        """Test category cards mark saved and liked articles"""
+        response = self.client.get(reverse('news:category_articles', kwargs={'slug': 'tech'}))
+        self.assertContains(response, 'interaction-badge saved', count=1)
+        self.assertContains(response, 'interaction-badge liked', count=1)
+        self.assertContains(response, 'interaction-badge disliked', count=1)
+
+        self.client.logout()
+        response = self.client.get(reverse('news:article_search'), {'q': 'مقال'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'interaction-badge')
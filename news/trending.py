@@ -0,0 +1,121 @@
+"""
+المقالات الرائجة: درجة تتناقص مع الزمن بدلاً من ترتيب كل المشاهدات منذ البداية.
+
+كل حدث (مشاهدة أو تفاعل) يضيف وزناً إلى سجل المقال في الفترة الحالية
+(``TrendingBucket``، فترة كل NEWS_TRENDING_BUCKET ثانية). درجة المقال هي::
+
+    sum(weight * 0.5 ** (عمر الفترة / NEWS_TRENDING_HALF_LIFE))
+
+أي أن وزن الحدث ينخفض للنصف كل نصف عمر. الفترات الأقدم من
+NEWS_TRENDING_WINDOW لا تؤثر تقريباً فتُهمل عند الحساب وتحذفها ``prune``.
+
+المشاهدات تصل من ViewCounterBuffer عند كتابة الدفعة (news.counters)،
+والتفاعلات من apply_reaction_change. قائمة الأكثر رواجاً تُحسب باستعلام
+واحد وتُخزن كعنصر شريط جانبي (widgets.TRENDING) لمدة
+NEWS_TRENDING_CACHE_TIMEOUT، فقراءتها في الصفحات لا تكلف استعلاماً.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import F, FloatField, Sum, Value
+from django.db.models.functions import Power
+
+
+def bucket_seconds():
+    return getattr(settings, 'NEWS_TRENDING_BUCKET', 3600)
+
+
+def half_life():
+    return getattr(settings, 'NEWS_TRENDING_HALF_LIFE', 6 * 3600)
+
+
+def window_buckets():
+    window = getattr(settings, 'NEWS_TRENDING_WINDOW', 48 * 3600)
+    return max(1, window // bucket_seconds())
+
+
+def current_bucket(now=None):
+    return int((now if now is not None else time.time()) // bucket_seconds())
+
+
+def view_weight():
+    return getattr(settings, 'NEWS_TRENDING_VIEW_WEIGHT', 1)
+
+
+def reaction_weight(reaction_type):
+    weights = getattr(settings, 'NEWS_TRENDING_REACTION_WEIGHTS', {'like': 3, 'dislike': 1})
+    return weights.get(reaction_type, 0)
+
+
+def add_events(weights, bucket=None):
+    """
+    يضيف أوزاناً ({رقم المقال: الوزن}) إلى الفترة الحالية: UPDATE واحد لكل
+    وزن مختلف للسجلات الموجودة ثم bulk_create للباقي.
+    """
+    from .models import TrendingBucket
+
+    weights = {article_id: weight for article_id, weight in weights.items() if weight}
+    if not weights:
+        return
+    bucket = current_bucket() if bucket is None else bucket
+    existing = set(TrendingBucket.objects.filter(
+        bucket=bucket, article_id__in=list(weights),
+    ).values_list('article_id', flat=True))
+
+    by_weight = {}
+    for article_id in existing:
+        by_weight.setdefault(weights[article_id], []).append(article_id)
+    for weight, ids in by_weight.items():
+        TrendingBucket.objects.filter(bucket=bucket, article_id__in=ids).update(
+            weight=F('weight') + weight,
+        )
+    missing = [
+        TrendingBucket(article_id=article_id, bucket=bucket, weight=weight)
+        for article_id, weight in weights.items() if article_id not in existing
+    ]
+    if missing:
+        # إن أنشأت عملية أخرى نفس السجل في اللحظة نفسها تضيع هذه الزيادة فقط،
+        # وهذا مقبول لترتيب تقريبي
+        TrendingBucket.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def scores(limit=None, now=None):
+    """قائمة (رقم المقال، الدرجة) للمقالات المنشورة مرتبة تنازلياً."""
+    from .models import Article, TrendingBucket
+
+    now_bucket = current_bucket(now)
+    decay = Power(
+        Value(0.5),
+        (Value(now_bucket) - F('bucket')) * Value(bucket_seconds() / half_life()),
+        output_field=FloatField(),
+    )
+    rows = TrendingBucket.objects.filter(
+        bucket__gt=now_bucket - window_buckets(),
+        article__status=Article.Status.PUBLISHED,
+    ).values('article').annotate(
+        score=Sum(F('weight') * decay, output_field=FloatField()),
+    ).order_by('-score', '-article_id')
+    if limit:
+        rows = rows[:limit]
+    return [(row['article'], row['score']) for row in rows]
+
+
+def top_articles(limit=5):
+    """المقالات الأكثر رواجاً (بدون تخزين مؤقت، انظر widgets.trending_articles)."""
+    from .models import Article
+
+    ids = [article_id for article_id, _score in scores(limit)]
+    if not ids:
+        return []
+    articles = Article.published.cards().in_bulk(ids)
+    return [articles[article_id] for article_id in ids if article_id in articles]
+
+
+def prune(now=None):
+    """يحذف الفترات الأقدم من النافذة ويعيد عدد السجلات المحذوفة."""
+    from .models import TrendingBucket
+
+    deleted, _ = TrendingBucket.objects.filter(
+        bucket__lte=current_bucket(now) - window_buckets(),
+    ).delete()
+    return deleted
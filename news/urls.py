@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -7,22 +7,27 @@ from django.conf.urls.static import static
 
 app_name = "news"
 
+# تحت ASGI تُستخدم نسخ async من صفحات القراءة (news.async_views)
+read_views = async_views if getattr(settings, 'NEWS_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
     #path('', views.home, name="home"),
-    path('',views.article_list,name='article_list'),
+    path('',read_views.article_list,name='article_list'),
     path('home',views.home,name='home'),
 
-    path("article/<slug:slug>/", views.article_detail, name="article_detail"),
+    path("article/<slug:slug>/", read_views.article_detail, name="article_detail"),
 
     path('article/<slug:slug>/react', views.handle_reaction, name='handle_reaction'),
+    path('article/<slug:slug>/toggle', views.toggle_interaction, name='toggle_interaction'),
     path('contact/', views.contact, name='contact'),
 
-    path('search/', views.search, name='article_search'),
+    path('search/', read_views.search, name='article_search'),
     path('category/<slug:slug>/', views.category_articles, name='category_articles'),
     path('saved-articl/<slug:slug>/delete',views.unsave_artcile,name="unsave_artcile"),
 
     path('saved-articles/',views.my_saved_articles,name='saved_articles'),
     path('content/',views.about,name='about'),
+    path('export/articles/', views.export_articles, name='export_articles'),
 
 
 ]
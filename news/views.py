@@ -1,53 +1,71 @@
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from .models import *
-from django.core.mail import send_mail
 from django.conf import settings
-from .forms import SimpleSearchForm
+from .forms import ArticleExportForm, SimpleSearchForm
+from . import outbox, widgets
+from .cache import cache_anonymous_page
+from .counters import record_view, saved_count
+from .exporter import FORMATS, export_chunks, export_filename, export_queryset
+from .interactions import (
+    REACTION_TYPES, interaction_state, reaction_counts, remove_saved, toggle_reaction, toggle_saved,
+)
+from .pagination import paginate
+from .related import related_count
+from .search import search_articles, search_cache_key
+from .slugs import get_article_or_404, resolve_or_404
+
+# عدد المقالات في كل صفحة من المحفوظات
+SAVED_PER_PAGE = 12
+
 
 def home(request):
     return render(request,'news/home.html')
 
-def article_list(request, category_slug=None):
-    latest_articles = Article.objects.all().order_by('-publish')[:5]
-    featured_articles = Article.objects.filter(featured=True).order_by('-publish')
-
-    articles = Article.published.all()
-    categories =Category.objects.filter(is_active=True)
-
-    article_views=Article.objects.filter(views__gte=1).order_by('-views')[:5]
-
+def article_list_page(request, category_slug=None):
+    """صفحة المقالات (مع التصنيف والبحث) لـ article_list ونسختها في news.async_views."""
+    articles = Article.published.cards()
     current_category = None
     if category_slug:
         current_category = get_object_or_404(Category, slug=category_slug)
         articles = articles.filter(category=current_category)
 
     search_query = request.GET.get('q')
+    known_count = None
     if search_query:
-        articles = articles.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
-    articles = articles.order_by('-publish')
-
-    paginator = Paginator(articles, 10)  # 10 مقالات per page
-    page = request.GET.get('page')
-
-    try:
-        articles = paginator.page(page)
-    except PageNotAnInteger:
-        articles = paginator.page(1)
-    except EmptyPage:
-        articles = paginator.page(paginator.num_pages)
-
+        articles = search_articles(search_query, articles)
+        count_key = f'search:{search_cache_key(search_query)}:{current_category.pk if current_category else ""}'
+    else:
+        articles = articles.order_by('-publish')
+        count_key = f'list:{current_category.pk if current_category else "all"}'
+        if current_category:
+            known_count = current_category.published_count
+
+    articles = paginate(
+        request, articles, 10,  # 10 مقالات per page
+        count_key=count_key, estimate=not search_query, known_count=known_count,
+    )
+    return articles, current_category, search_query
+
+
+@cache_anonymous_page
+def article_list(request, category_slug=None):
+    # عناصر الشريط الجانبي من التخزين المؤقت (news.widgets)
+    latest_articles = widgets.latest_articles()
+    featured_articles = widgets.featured_articles()
+    categories = widgets.active_categories()
+    article_views = widgets.trending_articles()
 
+    articles, current_category, search_query = article_list_page(request, category_slug)
 
     context = {
         'articles': articles,
-        'categories ': categories,
+        'categories': categories,
         'read_views':article_views,
         'current_category': current_category,
         'search_query': search_query,
@@ -65,35 +83,46 @@ def article_list(request, category_slug=None):
 #start article_detial
 #====================================
 
+def related_articles_for(article):
+    """
+    أقرب المقالات محتوىً محسوبة مسبقاً (news.related)، أو مقالات نفس التصنيف
+    إن لم تُحسب بعد (مقال جديد أو قبل أول build_related_articles).
+    """
+    related = list(Article.published.cards().filter(
+        related_from__article=article,
+    ).order_by('-related_from__score')[:related_count()])
+    if not related:
+        related = list(Article.published.cards().filter(
+            category_id=article.category_id,
+        ).exclude(pk=article.pk)[:related_count()])
+    return related
+
+
 @login_required
 
 def article_detail(request, slug):
     """
     عرض صفحة تفاصيل المقال مع أزرار الحفظ والإعجاب فقط
     """
-    article = get_object_or_404(Article,slug=slug)
-    latest_articles = Article.objects.filter().order_by('-publish')[:5]
-    related_articles = Article.published.filter(category=article.category).exclude(id=article.id)[:5]
-    like_count=article.reactions.filter(reaction_type='like').count()
-    dislike_count=article.reactions.filter(reaction_type='dislike').count()
-    si_saved=SavedArticle.objects.filter(user=request.user,article=article).exists()if request.user.is_authenticated else False
-    # حالة المستخدم (للأزرار)
-    user_reaction = None
-    user_has_saved = False
-
-    article.views +=1
-    article.save()
+    # رقم المقال من ذاكرة slug (news.slugs) ثم الصف بالمفتاح الأساسي
+    article = get_article_or_404(slug, Article.objects.select_related('category', 'author').defer('search_vector'))
+    latest_articles = widgets.latest_articles()
+    related_articles = related_articles_for(article)
+    like_count=article.like_count
+    dislike_count=article.dislike_count
+    # حالة المستخدم (للأزرار) من news.interactions بدون استعلام لكل زر
+    state = interaction_state(request)
+    si_saved = state.is_saved(article.pk)
+    user_reaction = state.reaction(article.pk)
+    user_has_saved = si_saved
+
+    record_view(article)
 
-
-    if request.user.is_authenticated:
-
-        user_reaction = Reaction.objects.filter(article=article,user=request.user).first()
-        user_has_saved = SavedArticle.objects.filter(article=article,user=request.user).exists()
     context = {
         'article': article,
         'related_articles':related_articles,
         'latest_articles':latest_articles,
-        'user_reaction': user_reaction, # الحالة الحالية للإعجاب
+        'user_reaction': user_reaction, # 'like' أو 'dislike' أو None
         'like_count': like_count,
         'dislike_count':dislike_count ,
         'si_saved' : si_saved ,
@@ -110,20 +139,20 @@ def article_detail(request, slug):
 #====================================
 #start catigory_article
 #====================================
-@login_required
+# صفحة عامة مثل article_list، وتُخزن كاملة للزوار (news.cache)
+@cache_anonymous_page
 def category_articles(request, slug):
     category = get_object_or_404(Category, slug=slug, is_active=True)
-    article = Article.published.filter(category=category)
+    article = Article.published.cards().filter(category=category)
 
-    paginator = Paginator(article, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    print(category)
+    page_obj = paginate(request, article, 12, known_count=category.published_count)
 
     context = {
         'category': category,
         'page_obj': page_obj,
         'articles': page_obj,
+        'categories': widgets.active_categories(),
+        'popular_articles': widgets.trending_articles(),
     }
     return render(request,'news/articles/article_category.html',context)
 
@@ -143,17 +172,14 @@ def contact(request):
         subject = request.POST.get('subject')
         message = request.POST.get('message')
 
-        try:
-            send_mail(
-                f'رسالة جديدة من {name}: {subject}',
-                f'الاسم: {name}\nالبريد الإلكتروني: {email}\nالرسالة: {message}',
-                email,  # من
-                [settings.DEFAULT_FROM_EMAIL],  # إلى
-                fail_silently=False,
-            )
-            messages.success(request, 'تم إرسال رسالتك بنجاح! سنرد عليك قريباً.')
-        except Exception as e:
-            messages.error(request, 'حدث خطأ في إرسال الرسالة. يرجى المحاولة مرة أخرى.')
+        # الإرسال الفعلي يتم لاحقاً من الأمر dispatch_outbox (news.outbox)
+        outbox.enqueue(
+            f'رسالة جديدة من {name}: {subject}',
+            f'الاسم: {name}\nالبريد الإلكتروني: {email}\nالرسالة: {message}',
+            email,  # من
+            [settings.DEFAULT_FROM_EMAIL],  # إلى
+        )
+        messages.success(request, 'تم إرسال رسالتك بنجاح! سنرد عليك قريباً.')
 
         return redirect('news:contact')
 
@@ -168,6 +194,17 @@ def contact(request):
 #====================================
 #start search
 #====================================
+def search_page(request, query):
+    """صفحة نتائج البحث لـ search ونسختها في news.async_views."""
+    articles = Article.objects.none()
+    if query:
+        articles = search_articles(query, Article.published.cards())
+
+    # الترقيم (بالصفحات أو بالمؤشر)
+    return paginate(request, articles, 10, count_key=f'search:{search_cache_key(query)}:' if query else None)
+
+
+@cache_anonymous_page
 def search(request):
     """
     دالة البحث البسيطة - تعمل بشكل صحيح
@@ -176,31 +213,11 @@ def search(request):
     query = request.GET.get('q', '').strip()
 
     # البيانات الأساسية للصفحة
-    breaking_news = Article.published.filter(breaking_news=True)[:6]
-    featured_articles = Article.published.filter(featured=True)[:6]
-    categories = Category.objects.filter(is_active=True)
-
-    # البحث
-    articles = Article.objects.none()
-
-    if query:
-
-        articles = Article.published.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(author__username__icontains=query)
-        ).order_by('-publish')
-
-    # الترقيم
-    paginator = Paginator(articles, 10)
-    page_number = request.GET.get('page')
+    breaking_news = widgets.breaking_news()
+    featured_articles = widgets.featured_articles()
+    categories = widgets.active_categories()
 
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        page_obj = paginator.get_page(paginator.num_pages)
+    page_obj = search_page(request, query)
 
     context = {
         'query': query,
@@ -223,16 +240,33 @@ def search(request):
 #====================================
 @login_required
 def my_saved_articles(request):
-    save_articles=SavedArticle.objects.filter(user=request.user).select_related(
+    """
+    محفوظات المستخدم بالترقيم بالمؤشر على (saved_at, id) عبر الفهرس
+    news_saved_user_idx، مع الأعمدة التي تعرضها البطاقة فقط.
+    العدد من العداد المخزن (ReaderStats) بدلاً من COUNT(*).
+    """
+    categories = widgets.active_categories()
+    current_category = None
+    saved_articles = SavedArticle.objects.filter(user=request.user)
+    category_slug = request.GET.get('category')
+    if category_slug:
+        current_category = next((c for c in categories if c.slug == category_slug), None)
+        if current_category is None:
+            raise Http404('التصنيف غير موجود')
+        saved_articles = saved_articles.filter(article__category=current_category)
+    saved_articles = saved_articles.select_related(
         'article',
         'article__category'
-    ).order_by('-saved_at')
-    category=Category.objects.all()
+    ).only(*SAVED_CARD_FIELDS)
+    page_obj = paginate(request, saved_articles, SAVED_PER_PAGE, cursor=True)
 
     context={
-        'saved_articles':save_articles,
+        'saved_articles':page_obj,
+        'page_obj':page_obj,
+        'saved_count':saved_count(request.user.pk),
         'page_title':'articles saved',
-        'categories':category,
+        'categories':categories,
+        'current_category':current_category,
 
     }
     return render(request,'news/articles/saved_article.html',context)
@@ -248,9 +282,9 @@ def my_saved_articles(request):
 @login_required
 def unsave_artcile(request,slug):
     if request.method=='POST':
-        article=get_object_or_404(Article,slug=slug)
-        saved_article=get_object_or_404(SavedArticle,user=request.user,article=article)
-        saved_article.delete()
+        article=resolve_or_404(slug)
+        if not remove_saved(request.user.pk, article.pk):
+            raise Http404('المقال غير محفوظ')
         messages.success(request,"deleted article sausccessfuly")
     return redirect('news:saved_articles')
 
@@ -263,37 +297,23 @@ def unsave_artcile(request,slug):
 #====================================
 def handle_reaction(request, slug):
     if request.method == 'POST':
-        article = get_object_or_404(Article, slug=slug)
+        # يكفي رقم المقال، بدون جلب صفه (news.slugs)
+        article = resolve_or_404(slug)
         reaction_type = request.POST.get('reaction_type')
 
-        if reaction_type in ['like', 'dislike']:
-            # معالجة الإعجاب/عدم الإعجاب
-            reaction, created = Reaction.objects.get_or_create(
-                user=request.user,
-                article=article
-            )
-
-            if not created and reaction.reaction_type == reaction_type:
-                # إذا كان نفس التفاعل، نزيله
-                reaction.delete()
-                messages.info(request, f'تم إزالة  الأعجاب')
-            else:
-                # إذا كان مختلفاً أو جديداً، نضيفه/نعدله
-                reaction.reaction_type = reaction_type
-                reaction.save()
+        if reaction_type in REACTION_TYPES:
+            # تبديل ذري مع تحديث العدادات في نفس المعاملة (news.interactions)
+            if toggle_reaction(request.user.pk, article.pk, reaction_type):
                 messages.success(request, f'تم الأعجاب ')
+            else:
+                messages.info(request, f'تم إزالة  الأعجاب')
 
         elif reaction_type == 'save':
             # معالجة الحفظ
-            saved, created = SavedArticle.objects.get_or_create(
-                user=request.user,
-                article=article
-            )
-            if not created:
-                saved.delete()
-                messages.info(request, 'تم إزالة المقال من المحفوظات')
-            else:
+            if toggle_saved(request.user.pk, article.pk):
                 messages.success(request, 'تم حفظ المقال بنجاح')
+            else:
+                messages.info(request, 'تم إزالة المقال من المحفوظات')
 
     return redirect('news:article_detail', slug=slug)
 
@@ -301,5 +321,63 @@ def handle_reaction(request, slug):
 #end handle_reaction
 #====================================
 
+#====================================
+#start toggle_interaction
+#====================================
+@require_POST
+def toggle_interaction(request, slug):
+    """
+    نفس handle_reaction لكن يعيد JSON بالحالة الجديدة والعدادات بدلاً من
+    إعادة التوجيه، فلا تُعرض صفحة المقال من جديد ولا يزيد عداد المشاهدات.
+    تستخدمه أزرار صفحة المقال عبر fetch، ويبقى النموذج العادي عند تعطيل JS.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'يجب تسجيل الدخول'}, status=401)
+    article = resolve_or_404(slug)
+    action = request.POST.get('reaction_type')
+
+    if action in REACTION_TYPES:
+        reaction = toggle_reaction(request.user.pk, article.pk, action)
+        data = {'action': action, 'active': reaction == action, 'reaction': reaction}
+    elif action == 'save':
+        saved = toggle_saved(request.user.pk, article.pk)
+        data = {'action': action, 'active': saved, 'saved': saved}
+    else:
+        return JsonResponse({'error': 'نوع تفاعل غير معروف'}, status=400)
+
+    data['like_count'], data['dislike_count'] = reaction_counts(article.pk)
+    return JsonResponse(data)
+
+
 def about(request):
     return render(request,'news/articles/about.html')
+
+
+#====================================
+#start export_articles
+#====================================
+@staff_member_required
+def export_articles(request):
+    """
+    تصدير المقالات كملف CSV أو NDJSON يُرسل تدريجياً (news.exporter)
+    المرشحات: format, status, category, since, until, gzip, without_content
+    """
+    form = ArticleExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    fmt = form.cleaned_data['format'] or 'csv'
+    gzip = form.cleaned_data['gzip']
+    chunks = export_chunks(
+        export_queryset(**form.filters()), fmt, gzip=gzip,
+        content=not form.cleaned_data['without_content'],
+    )
+    response = StreamingHttpResponse(
+        chunks, content_type='application/gzip' if gzip else FORMATS[fmt][0],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, gzip)}"'
+    return response
+
+#====================================
+#end export_articles
+#====================================
@@ -0,0 +1,76 @@
+"""
+بيانات الأشرطة الجانبية (أحدث المقالات، المميزة، الأكثر قراءة، التصنيفات،
+الأخبار العاجلة) مخزنة مؤقتاً لأنها واحدة لكل الزوار.
+
+لكل عنصر رقم جيل خاص به (news.cache) تزيده إشارات Article و Category في
+news.signals عند تغير ما يعرضه فقط، ومدة صلاحية NEWS_WIDGET_CACHE_TIMEOUT
+كشبكة أمان (مثلاً لعدد المشاهدات الذي يُحدّث بدون إشارات). المقالات الرائجة
+(news.trending) تتغير مع كل مشاهدة فلها مدة أقصر NEWS_TRENDING_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_generation, generation_timeout, versioned_key
+
+LATEST = 'widget-latest'
+FEATURED = 'widget-featured'
+MOST_READ = 'widget-most-read'
+BREAKING = 'widget-breaking'
+CATEGORIES = 'widget-categories'
+TRENDING = 'widget-trending'
+
+ARTICLE_WIDGETS = (LATEST, FEATURED, MOST_READ, BREAKING, TRENDING)
+
+
+def _cached(name, limit, build, timeout=None):
+    key = versioned_key(name, limit)
+    value = cache.get(key)
+    if value is None:
+        value = list(build())
+        if timeout is None:
+            timeout = getattr(settings, 'NEWS_WIDGET_CACHE_TIMEOUT', 600)
+        cache.set(key, value, generation_timeout(timeout))
+    return value
+
+
+def _cards():
+    from .models import Article
+
+    return Article.published.cards()
+
+
+def latest_articles(limit=5):
+    return _cached(LATEST, limit, lambda: _cards().order_by('-publish')[:limit])
+
+
+def featured_articles(limit=6):
+    return _cached(FEATURED, limit, lambda: _cards().filter(featured=True).order_by('-publish')[:limit])
+
+
+def most_read_articles(limit=5):
+    return _cached(MOST_READ, limit, lambda: _cards().filter(views__gte=1).order_by('-views')[:limit])
+
+
+def trending_articles(limit=5):
+    """الأكثر رواجاً، أو الأكثر قراءة إن لم تسجل أحداث بعد."""
+    from .trending import top_articles
+
+    def build():
+        return top_articles(limit) or most_read_articles(limit)
+
+    return _cached(TRENDING, limit, build, getattr(settings, 'NEWS_TRENDING_CACHE_TIMEOUT', 120))
+
+
+def breaking_news(limit=6):
+    return _cached(BREAKING, limit, lambda: _cards().filter(breaking_news=True).order_by('-publish')[:limit])
+
+
+def active_categories():
+    from .models import Category
+
+    return _cached(CATEGORIES, 'all', lambda: Category.objects.filter(is_active=True, slug__isnull=False))
+
+
+def invalidate(*names):
+    for name in names:
+        bump_generation(name)
@@ -12,5 +12,18 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'osamh_ahmed_al.settings')
+# صفحات القراءة بنسخها الـ async (news.async_views)، انظر NEWS_ASYNC_VIEWS.
+# التشغيل:
+#   uvicorn osamh_ahmed_al.asgi:application --workers 4
+# أو عبر gunicorn لإدارة العمليات:
+#   gunicorn osamh_ahmed_al.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+# لمقارنة زمن الاستجابة مع WSGI: python manage.py benchmark_views
+#
+# اتصالات قاعدة البيانات: كل عملية تفتح حتى NEWS_ASYNC_QUERY_THREADS + 1
+# اتصالاً دائماً (خيوط الاستعلامات المتوازية + خيط المزامنة، CONN_MAX_AGE=600).
+# مع 4 عمليات و 4 خيوط: 4 × (4 + 1) = 20 اتصالاً، ويجب أن يبقى المجموع لكل
+# الخوادم أقل من max_connections في PostgreSQL (100 افتراضياً) مع هامش
+# للأوامر (manage.py) ولوحة الإدارة.
+os.environ.setdefault('NEWS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
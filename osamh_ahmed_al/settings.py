@@ -112,6 +112,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'news.context_processors.interactions',
             ],
         },
     },
@@ -210,4 +211,117 @@ DEFAULT_FROM_EMAIL = 'osamh@gmail.com'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-django_heroku.settings(locals())
\ No newline at end of file
+django_heroku.settings(locals())
+
+# عدّاد المشاهدات: كل كم ثانية تُكتب الزيادات المجمعة إلى قاعدة البيانات
+NEWS_VIEW_COUNT_FLUSH_INTERVAL = 10
+NEWS_VIEW_COUNT_MAX_PENDING = 500
+
+# إعداد PostgreSQL النصي المستخدم لمتجه البحث (النص يُطبَّع مسبقاً في news.arabic)
+NEWS_SEARCH_CONFIG = 'simple'
+
+# محرك البحث: news.search.DatabaseSearchBackend أو news.search.InvertedIndexSearchBackend
+NEWS_SEARCH_BACKEND = os.environ.get('NEWS_SEARCH_BACKEND', 'news.search.DatabaseSearchBackend')
+NEWS_SEARCH_MAX_RESULTS = 1000
+
+# الترقيم بالمؤشر (?cursor=) لكل صفحات القوائم بدلاً من أرقام الصفحات
+NEWS_CURSOR_PAGINATION = False
+
+# أعداد القوائم: تُحسب فعلياً حتى هذا الحد ثم يُستخدم تقدير PostgreSQL، وتُخزن مؤقتاً
+NEWS_EXACT_COUNT_LIMIT = 10000
+NEWS_COUNT_CACHE_TIMEOUT = 300
+
+# مراقبة عدد الاستعلامات لكل طلب (staging): أضف
+# 'news.middleware.QueryBudgetMiddleware' إلى MIDDLEWARE لتفعيلها.
+# الحدود الافتراضية في news.middleware.QUERY_BUDGETS ويمكن تجاوزها هنا.
+# تُطبق على مسار WSGI فقط: لا تُفعَّل مع NEWS_ASYNC_VIEWS (ASGI) لأن استعلامات
+# الخيوط المتوازية في news.async_views لا تُعد.
+NEWS_QUERY_BUDGETS = {}
+NEWS_QUERY_BUDGET_DEFAULT = 20
+NEWS_QUERY_BUDGET_RAISE = os.environ.get('NEWS_QUERY_BUDGET_RAISE') == '1'
+
+# مدة صلاحية عناصر الشريط الجانبي المخزنة (ثوانٍ)، الإبطال الفعلي يتم عبر الإشارات
+NEWS_WIDGET_CACHE_TIMEOUT = 600
+
+# التخزين المؤقت: Redis مشترك بين كل العمليات عند توفر REDIS_URL (ضروري لإبطال
+# التخزين المؤقت عبر أرقام الأجيال في news.cache)، وإلا ذاكرة العملية المحلية
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# ذاكرة العملية المحلية لا تصل إليها أرقام الأجيال من العمليات الأخرى، فعندها
+# تُخزن الصفحات وعناصر الشريط الجانبي والأعداد NEWS_LOCAL_CACHE_TIMEOUT ثانية
+# فقط، ولا تُخزن حالة تفاعل المستخدم (news.cache.shared_cache). NEWS_SHARED_CACHE
+# يحدد صراحة إن كان cache مشتركاً (None: LocMemCache فقط غير مشترك).
+NEWS_SHARED_CACHE = None
+NEWS_LOCAL_CACHE_TIMEOUT = 5
+
+# مدة تخزين الصفحات الكاملة للزوار غير المسجلين (ثوانٍ)
+NEWS_PAGE_CACHE_TIMEOUT = 60
+
+# خرائط الموقع (news.sitemaps): مدة تخزين الشهر الحالي وقسم الأخبار والفهرس
+# (الأشهر المنتهية تخزن بدون انتهاء)، والنافذة الزمنية لقسم Google News بالساعات
+NEWS_SITEMAP_CACHE_TIMEOUT = 600
+NEWS_SITEMAP_NEWS_HOURS = 48
+
+# نسخ WebP المصغرة من صور المقالات (news.images): العروض بالبكسل وجودة الترميز،
+# وإنشاؤها عند حفظ المقال (أو لاحقاً بالأمر generate_image_derivatives)
+NEWS_IMAGE_WIDTHS = (320, 640, 1024)
+NEWS_IMAGE_WEBP_QUALITY = 80
+NEWS_IMAGE_DERIVATIVES_ON_SAVE = True
+
+# صندوق البريد الصادر (news.outbox): حجم الدفعة، وعدد المحاولات قبل اعتبار
+# الرسالة فاشلة نهائياً، والتأخير الأول بعد الفشل (يتضاعف) وحده الأقصى، ومهلة
+# حجز الدفعة أثناء إرسالها (ثوانٍ). شغّل: python manage.py dispatch_outbox --loop
+NEWS_OUTBOX_BATCH_SIZE = 50
+NEWS_OUTBOX_MAX_ATTEMPTS = 5
+NEWS_OUTBOX_RETRY_DELAY = 60
+NEWS_OUTBOX_MAX_DELAY = 3600
+NEWS_OUTBOX_LEASE = 300
+
+# المقالات الرائجة (news.trending): طول الفترة ونصف عمر الدرجة والنافذة
+# (ثوانٍ)، وأوزان الأحداث، ومدة تخزين القائمة. احذف الفترات القديمة دورياً بـ
+# python manage.py prune_trending
+NEWS_TRENDING_BUCKET = 3600
+NEWS_TRENDING_HALF_LIFE = 6 * 3600
+NEWS_TRENDING_WINDOW = 48 * 3600
+NEWS_TRENDING_VIEW_WEIGHT = 1
+NEWS_TRENDING_REACTION_WEIGHTS = {'like': 3, 'dislike': 1}
+NEWS_TRENDING_CACHE_TIMEOUT = 120
+
+# المقالات ذات الصلة (news.related): عددها لكل مقال، وتحديثها عند حفظ المقال.
+# للبناء الكامل (مثلاً ليلياً): python manage.py build_related_articles
+# المقالات المحفوظة في عملية بلا فهرس حالي: python manage.py build_related_articles --pending (مثلاً كل دقيقة)
+NEWS_RELATED_COUNT = 5
+NEWS_RELATED_REFRESH_ON_SAVE = True
+
+# ذاكرة slug -> المقال داخل كل عملية (news.slugs): أقصى عدد عناصر ومدة
+# صلاحيتها بالثواني، والإحصاءات تُسجل في news.slugs كل N عملية بحث.
+NEWS_SLUG_CACHE_SIZE = 2048
+NEWS_SLUG_CACHE_TTL = 300
+NEWS_SLUG_CACHE_LOG_EVERY = 10000
+
+# نسخ async من article_list و search و article_detail (news.async_views).
+# osamh_ahmed_al/asgi.py يضبط NEWS_ASYNC_VIEWS=1 فتعمل تحت uvicorn، و WSGI
+# (gunicorn العادي) يبقى على النسخ المتزامنة. NEWS_ASYNC_PARALLEL_QUERIES
+# ينفذ استعلامات الصفحة المستقلة في خيوط منفصلة بدلاً من التتابع، عددها
+# NEWS_ASYNC_QUERY_THREADS لكل عملية (ولكل خيط اتصال دائم بقاعدة البيانات).
+NEWS_ASYNC_VIEWS = os.environ.get('NEWS_ASYNC_VIEWS') == '1'
+NEWS_ASYNC_PARALLEL_QUERIES = True
+NEWS_ASYNC_QUERY_THREADS = 4
+
+# حالة تفاعل كل مستخدم (أرقام المقالات المحفوظة والمعجب بها، news.interactions)
+# تُخزن في cache وتُحدّث مع كل تبديل، ومدة الصلاحية تحد من أثر التعديلات من
+# خارج أزرار الموقع (لوحة الإدارة مثلاً).
+NEWS_INTERACTION_STATE_TTL = 600
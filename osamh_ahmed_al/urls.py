@@ -18,17 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from news.sitemaps import ArticleSitemap
+from news.sitemaps import sitemap_index, sitemap_section
 
-sitemaps={
-    'articles': ArticleSitemap,
-
-}
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('news.urls')),
-    path('sitemap.xml',sitemap,{'sitemaps':sitemaps},name='sitemap'),
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='sitemap-section'),
     path('accounts/', include('accounts.urls')),
 ]
 